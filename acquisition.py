@@ -0,0 +1,248 @@
+"""
+Continuous (live) acquisition for the oscilloscope simulation.
+
+Simulated time advances with the wall clock. Samples are generated in
+fixed-size chunks into preallocated NumPy ring buffers, and the signal and
+sweep generators carry their phase from one chunk to the next instead of
+recomputing `t % T_total_sweep` from zero. Once constructed, generating a
+chunk and taking a display snapshot only write into existing buffers.
+"""
+import numpy as np
+
+from signal_engine import Frame, SweepTiming, channel_arrays, fill_sweep, sweep_timing
+
+DEFAULT_CHUNK_SIZE = 65_536
+TWO_PI = 2.0 * np.pi
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO over a preallocated NumPy array.
+
+    With `channels`, the buffer is 2D (channels × capacity) and every write or
+    read moves the same samples of all channels at once.
+    """
+
+    def __init__(self, capacity, dtype=np.float64, channels=None):
+        shape = (int(capacity),) if channels is None else (int(channels), int(capacity))
+        self.data = np.zeros(shape, dtype=dtype)
+        self.capacity = int(capacity)
+        self.write_pos = 0
+        self.total_written = 0
+
+    def __len__(self):
+        return min(self.total_written, self.capacity)
+
+    def clear(self):
+        self.write_pos = 0
+        self.total_written = 0
+
+    def write(self, chunk):
+        """Appends `chunk` (samples along the last axis), overwriting the oldest samples once full."""
+        n = chunk.shape[-1]
+        if n >= self.capacity:
+            self.data[...] = chunk[..., n - self.capacity:]
+            self.write_pos = 0
+        else:
+            first = min(n, self.capacity - self.write_pos)
+            self.data[..., self.write_pos:self.write_pos + first] = chunk[..., :first]
+            if first < n: self.data[..., :n - first] = chunk[..., first:]
+            self.write_pos = (self.write_pos + n) % self.capacity
+        self.total_written += n
+
+    def read_latest(self, n, out):
+        """Copies the newest `n` samples, oldest first, into `out[..., :n]`; returns that view."""
+        n = min(int(n), len(self))
+        start = (self.write_pos - n) % self.capacity
+        first = min(n, self.capacity - start)
+        out[..., :first] = self.data[..., start:start + first]
+        if first < n: out[..., first:n] = self.data[..., :n - first]
+        return out[..., :n]
+
+
+class LiveAcquisition:
+    """
+    Chunked, phase-continuous signal + sweep generator feeding ring buffers.
+
+    The display window holds one record (`params.points` samples) spanning
+    the same time as the static view, so the sample rate is
+    `points / total_time`. Parameter changes apply from the next chunk on
+    without a phase jump, like turning the knob of a signal generator.
+    All enabled channels are generated together into 2D (channels × samples)
+    buffers, each channel carrying its own phase.
+    """
+
+    def __init__(self, params, chunk_size=DEFAULT_CHUNK_SIZE, time_scale=1.0, source=None):
+        self.chunk_size = int(chunk_size)
+        self.time_scale = time_scale # Simulated seconds per wall-clock second
+        self.running = False
+        self.single_shot = False
+        self._single_target = 0
+        self._carry = 0.0 # Fractional samples owed from the previous advance()
+        self.record_length = 0
+        self.channel_ids = ()
+        self.source = source # Optional sources.py input replacing sin/cos
+
+        # Phase state carried across chunks
+        self.signal_phase = np.zeros((1, 1)) # radians per channel, in [0, 2π)
+        self.sweep_phase = 0.0 # seconds into the current sweep cycle
+        self.sample_index = 0
+
+        # Counters
+        self.chunks_generated = 0
+        self.samples_dropped = 0 # Samples skipped because the caller fell behind a full ring
+
+        # Chunk work buffers
+        self._k = np.arange(self.chunk_size, dtype=np.float64)
+        self._x_chunk = np.empty(self.chunk_size, dtype=np.float64)
+        self._t_chunk = np.empty(self.chunk_size, dtype=np.float64)
+        self._scratch = np.empty(self.chunk_size, dtype=np.float64)
+        self._fwd_chunk = np.empty(self.chunk_size, dtype=bool)
+
+        self.set_params(params)
+
+    # --- Configuration ---
+    def set_params(self, params):
+        """Applies new control values; reallocates only when the record length changes."""
+        self.params = params
+        self.timing = sweep_timing(params)
+        self.sample_rate = params.points / self.timing.total_time
+        self.sweep_phase %= self.timing.T_total_sweep
+        active = params.active_channels()
+        self._channels = [ch for _, ch in active]
+        channel_ids = tuple(i for i, _ in active)
+        if params.points != self.record_length or channel_ids != self.channel_ids:
+            self._allocate(params.points, channel_ids)
+        self._update_channel_arrays()
+
+    def _update_channel_arrays(self):
+        # Rows generated from sin/cos: all channels, or channels 2.. when a source feeds channel 1
+        self._first_generated = 1 if self.source is not None else 0
+        channels = self._channels[self._first_generated:]
+        self._channel_A, self._channel_omega, self._channel_phase = channel_arrays(channels) if channels else (None, None, None)
+
+    def set_source(self, source, params=None):
+        """
+        Streams `source` (from its start) instead of the built-in sin/cos
+        input; None restores it. Pass `params` when the input selection
+        changes with it, so channel 1 is never generated from 'capture'/'expr'.
+        """
+        self.source = source
+        self.sample_index = 0
+        if params is not None: self.set_params(params)
+        else: self._update_channel_arrays()
+
+    def _allocate(self, record_length, channel_ids):
+        """(Re)allocates buffers; the rings restart empty, as on a real scope after a channel change."""
+        self.record_length = int(record_length)
+        self.channel_ids = channel_ids
+        n_channels = len(channel_ids)
+        capacity = self.record_length + self.chunk_size
+        self.signal_phase = np.zeros((n_channels, 1))
+        self._y_chunk = np.empty((n_channels, self.chunk_size), dtype=np.float64)
+        self.ring_y = RingBuffer(capacity, channels=n_channels)
+        self.ring_x = RingBuffer(capacity)
+        self.ring_fwd = RingBuffer(capacity, dtype=bool)
+        self._unit = np.arange(self.record_length, dtype=np.float64)
+        self._snap_t = np.empty(self.record_length, dtype=np.float64)
+        self._snap_y = np.empty((n_channels, self.record_length), dtype=np.float64)
+        self._snap_x = np.empty(self.record_length, dtype=np.float64)
+        self._snap_fwd = np.empty(self.record_length, dtype=bool)
+        self._snap_ret = np.empty(self.record_length, dtype=bool)
+
+    # --- Run Control ---
+    def start(self):
+        self.running = True; self.single_shot = False; self._carry = 0.0
+
+    def stop(self):
+        self.running = False; self.single_shot = False
+
+    def single(self):
+        """Acquires exactly one fresh record, then stops."""
+        self.running = True; self.single_shot = True; self._carry = 0.0
+        self._single_target = self.ring_y.total_written + self.record_length
+
+    # --- Generation ---
+    def advance(self, elapsed_seconds):
+        """Generates the samples for `elapsed_seconds` of wall time; returns how many were kept."""
+        if not self.running: return 0
+        wanted = elapsed_seconds * self.time_scale * self.sample_rate + self._carry
+        n = int(wanted); self._carry = wanted - n
+        if self.single_shot: n = min(n, self._single_target - self.ring_y.total_written)
+        capacity = self.ring_y.capacity
+        if n > capacity:
+            # Too far behind to display everything: skip ahead, keeping phase continuous
+            skipped = n - capacity
+            self._skip(skipped); self.samples_dropped += skipped; n = capacity
+        generated = self.generate(n)
+        if self.single_shot and self.ring_y.total_written >= self._single_target: self.stop()
+        return generated
+
+    def generate(self, n_samples):
+        """Generates `n_samples` into the ring buffers, one chunk at a time."""
+        remaining = int(n_samples)
+        while remaining > 0:
+            n = min(remaining, self.chunk_size)
+            self._generate_chunk(n)
+            remaining -= n
+        return int(n_samples)
+
+    def _generate_chunk(self, n):
+        params, timing = self.params, self.timing
+        dt = 1.0 / self.sample_rate
+        k = self._k[:n]; y = self._y_chunk[:, :n]; t_local = self._t_chunk[:n]
+
+        # Every channel in one broadcast: A·sin(k·ω·dt + carried phase + φ)
+        generated = y[self._first_generated:]
+        if generated.shape[0]:
+            np.multiply(k, self._channel_omega * dt, out=generated)
+            np.add(generated, self.signal_phase[self._first_generated:] + self._channel_phase, out=generated)
+            np.sin(generated, out=generated)
+            np.multiply(generated, self._channel_A, out=generated)
+        if self.source is not None:
+            # Sources are addressed by absolute time, so live mode plays through the capture
+            np.add(k, self.sample_index, out=t_local)
+            np.multiply(t_local, dt, out=t_local)
+            self.source.fill(params, t_local, y[0], channels=dict(zip(self.channel_ids[1:], y[1:])))
+
+        np.multiply(k, dt, out=t_local)
+        np.add(t_local, self.sweep_phase, out=t_local)
+        fill_sweep(t_local, timing.Tqt, timing.Tqn, self._x_chunk[:n], self._fwd_chunk[:n], self._scratch[:n])
+
+        self.ring_y.write(y)
+        self.ring_x.write(self._x_chunk[:n])
+        self.ring_fwd.write(self._fwd_chunk[:n])
+        self._skip(n)
+        self.chunks_generated += 1
+
+    def _skip(self, n):
+        """Moves the phase state forward by `n` samples."""
+        dt = 1.0 / self.sample_rate
+        if self._channel_omega is not None:
+            phase = self.signal_phase[self._first_generated:]
+            phase += self._channel_omega * (dt * n)
+            np.remainder(phase, TWO_PI, out=phase)
+        self.sweep_phase = (self.sweep_phase + dt * n) % self.timing.T_total_sweep
+        self.sample_index += n
+
+    # --- Display ---
+    def snapshot(self):
+        """
+        Latest record as a Frame (time relative to the window start), or None
+        before any samples exist. The arrays are reused by the next snapshot.
+        """
+        n = min(len(self.ring_y), self.record_length)
+        if n == 0: return None
+        ys = self.ring_y.read_latest(n, self._snap_y)
+        x = self.ring_x.read_latest(n, self._snap_x)
+        fwd = self.ring_fwd.read_latest(n, self._snap_fwd)
+        t = np.multiply(self._unit[:n], 1.0 / self.sample_rate, out=self._snap_t[:n])
+        ret = np.logical_not(fwd, out=self._snap_ret[:n])
+        timing = self.timing
+        window = SweepTiming(timing.omega, timing.Ty, timing.Tqt, timing.Tqn, timing.T_total_sweep,
+                             self.record_length / self.sample_rate)
+        return Frame(self.params, window, t, ys[0], x, fwd, ret, ys=ys, channel_ids=self.channel_ids)
+
+    def stats(self):
+        return {'running': self.running, 'sample_rate': self.sample_rate, 'samples': self.sample_index,
+                'chunks': self.chunks_generated, 'dropped': self.samples_dropped}
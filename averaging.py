@@ -0,0 +1,199 @@
+"""
+Acquisition modes that combine many sweeps, like on a bench scope.
+
+Every sample is assigned to a bin by its position within the sweep cycle
+(`T_total_sweep` split into one bin per sample period, from the sweep ramp
+and its forward/return mask, so triggered sweeps line up as well). Each
+mode keeps running per-bin accumulators of at most one record per channel:
+
+- 'average': mean over blocks of N sweeps (the running mean is shown until
+  the first block is complete)
+- 'exponential': exponentially weighted mean with weight 1/N per sweep
+- 'peak': min/max envelope over all sweeps since the last reset
+- 'hires': boxcar mean of N adjacent samples (less noise, less bandwidth)
+
+Only the samples that are new since the previous call are accumulated, with
+ufunc.at scatters, so updating costs O(new samples) however many sweeps
+have been combined; the result is then written back over the frame's
+channel data for display and measurements.
+"""
+import numpy as np
+
+from acquisition import RingBuffer
+
+ACQUISITION_MODES = ('normal', 'average', 'exponential', 'peak', 'hires')
+DEFAULT_ACQUISITION_MODE = 'normal'
+DEFAULT_AVERAGE_COUNT = 16 # Sweeps for 'average'/'exponential', samples for 'hires'
+AVERAGE_COUNTS = (2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class SweepAverager:
+    """
+    Running reductions across sweeps.
+
+    `apply(frame, key, sample_index)` accumulates the frame's new samples
+    and overwrites `frame.ys` with the reduced record. Pass `sample_index`
+    (samples generated so far) for a continuous acquisition, so only the
+    newest samples are added; otherwise every frame counts as a fresh
+    acquisition, unless `key` equals the previous frame's key.
+    """
+
+    def __init__(self, mode=DEFAULT_ACQUISITION_MODE, count=DEFAULT_AVERAGE_COUNT):
+        self.mode = mode
+        self.count = int(count)
+        self.updates = 0 # Bumped whenever the reduced record may have changed
+        self._bins = np.empty(0, dtype=np.intp); self._phase = np.empty(0); self._scratch = np.empty(0)
+        self.reset()
+
+    def configure(self, mode=None, count=None):
+        if mode is not None and mode not in ACQUISITION_MODES:
+            raise ValueError(f"Unknown acquisition mode '{mode}', expected one of {ACQUISITION_MODES}")
+        changed = (mode is not None and mode != self.mode) or (count is not None and int(count) != self.count)
+        if mode is not None: self.mode = mode
+        if count is not None: self.count = max(int(count), 1)
+        if changed: self.reset()
+
+    def reset(self):
+        self._layout = None; self._key = None; self._sample_index = None
+        self.sweeps = 0; self._samples = 0 # Sweeps combined so far, counted in samples per sweep
+        self.updates += 1
+
+    @property
+    def status(self):
+        if self.mode == 'normal': return "Normal"
+        if self.mode == 'hires': return f"Hi-Res ({self.count} samples)"
+        if self.mode == 'peak': return f"Peak detect ({self.sweeps} sweeps)"
+        if self.mode == 'exponential': return f"Exponential (N={self.count}), {self.sweeps} sweeps"
+        return f"Average {min(self.sweeps, self.count)}/{self.count}"
+
+    # --- Accumulators ---
+    def _allocate(self, layout, n_channels, n_bins, points):
+        self._layout = layout
+        shape = (n_channels, n_bins)
+        if self.mode == 'average':
+            self._sum = np.zeros(shape); self._n = np.zeros(shape)
+            self._shown = np.zeros(shape); self._complete = np.zeros(shape, dtype=bool)
+        elif self.mode == 'exponential':
+            self._ema = np.zeros(shape); self._n = np.zeros(shape)
+        elif self.mode == 'peak':
+            self._lo = np.full(shape, np.inf); self._hi = np.full(shape, -np.inf)
+        elif self.mode == 'hires':
+            self._ring = RingBuffer(points, channels=n_channels)
+            self._carry = np.zeros((n_channels, 0)) # Last count-1 raw samples of the previous update
+        self.sweeps = 0; self._samples = 0
+
+    def _sweep_bins(self, frame, n_bins):
+        """Bin of every sample: its time since the start of its sweep cycle, in sample periods."""
+        n = frame.t.size
+        if self._bins.size != n:
+            self._bins = np.empty(n, dtype=np.intp); self._phase = np.empty(n); self._scratch = np.empty(n)
+        timing = frame.timing
+        phase, scratch = self._phase, self._scratch
+        np.multiply(frame.x_sweep, timing.Tqt, out=phase) # Forward: x·Tqt
+        np.multiply(frame.x_sweep, -timing.Tqn, out=scratch) # Return: Tqt + (1 - x)·Tqn
+        np.add(scratch, timing.Tqt + timing.Tqn, out=scratch)
+        np.copyto(phase, scratch, where=frame.return_mask)
+        np.multiply(phase, n_bins / timing.T_total_sweep, out=phase)
+        np.rint(phase, out=phase) # Nearest, not floor: x·Tqt lands a rounding error below whole sample periods
+        np.clip(phase, 0, n_bins - 1, out=phase)
+        self._bins[...] = phase
+        return self._bins
+
+    def apply(self, frame, key=None, sample_index=None):
+        """Adds the frame's new samples to the accumulators and returns the frame showing the reduced record."""
+        if self.mode == 'normal': return frame
+        ys = frame.channel_data
+        n_channels, n = ys.shape
+        timing = frame.timing
+        dt = frame.t[1] - frame.t[0] if n > 1 else 0.0
+        if dt <= 0 or timing.T_total_sweep <= 0: return frame
+        record = max(int(round(timing.total_time / dt)), n) # A live record is shorter until the ring has filled
+        n_bins = int(min(max(round(timing.T_total_sweep / dt), 1), record))
+        layout = (n_channels, record, n_bins, frame.channel_ids, timing.Tqt, timing.Tqn)
+        if layout != self._layout: self._allocate(layout, n_channels, n_bins, record)
+
+        # New samples: the tail of a continuous acquisition, or the whole record of a fresh one
+        if sample_index is not None:
+            n_new = n if self._sample_index is None or sample_index < self._sample_index else sample_index - self._sample_index
+            self._sample_index = sample_index
+        else:
+            n_new = 0 if key is not None and key == self._key else n
+            self._key = key
+        n_new = min(int(n_new), n)
+        new = ys[:, n - n_new:]
+        if self.mode == 'hires':
+            self._accumulate_hires(new, sample_index is not None)
+            self._ring.read_latest(n, ys)
+            return frame
+
+        bins = self._sweep_bins(frame, n_bins)
+        # A triggered beam idles between sweeps; those samples belong to no bin and keep their raw values
+        active = None if frame.sweep_starts is None else np.logical_or(frame.forward_mask, frame.return_mask)
+        if n_new:
+            new_bins = bins[n - n_new:]
+            if active is not None: new, new_bins = new[:, active[n - n_new:]], new_bins[active[n - n_new:]]
+            self._accumulate(new_bins, new)
+            self._samples += new_bins.size # Idle samples between triggered sweeps are not part of any sweep
+            self.sweeps = self._samples // n_bins
+            self.updates += 1
+        if active is None: self._write_back(bins, ys)
+        else: ys[:, active] = self._write_back(bins[active], np.empty((n_channels, int(np.count_nonzero(active)))))
+        return frame
+
+    def _accumulate(self, bins, new):
+        rows = np.arange(new.shape[0])[:, None]
+        index = (rows, bins[None, :])
+        if self.mode == 'peak':
+            np.minimum.at(self._lo, index, new)
+            np.maximum.at(self._hi, index, new)
+            return
+        batch_sum = np.zeros(self._n.shape); batch_n = np.zeros(self._n.shape)
+        np.add.at(batch_sum, index, new)
+        np.add.at(batch_n[0], bins, 1.0) # Same bins for every channel
+        batch_n[1:] = batch_n[0]
+        if self.mode == 'average':
+            self._sum += batch_sum; self._n += batch_n
+            done = self._n >= self.count # Block of N sweeps complete in these bins
+            if np.any(done):
+                self._shown[done] = self._sum[done] / self._n[done]
+                self._complete |= done
+                self._sum[done] = 0.0; self._n[done] = 0.0
+        else:
+            # k new samples in a bin decay the old mean by (1 - 1/N)^k and pull it toward their mean;
+            # until a bin has N samples it is a plain mean, so the trace settles as fast as 'average'
+            visited = batch_n > 0
+            total = self._n + batch_n
+            decay = np.where(total <= self.count, self._n / np.maximum(total, 1.0), np.power(1.0 - 1.0 / self.count, batch_n))
+            batch_mean = np.divide(batch_sum, batch_n, out=np.zeros_like(batch_sum), where=visited)
+            self._ema[visited] = decay[visited] * self._ema[visited] + (1.0 - decay[visited]) * batch_mean[visited]
+            self._n += batch_n
+
+    def _write_back(self, bins, ys):
+        """Overwrites every sample with its bin's reduced value."""
+        if self.mode == 'peak':
+            lo = np.take(self._lo, bins, axis=1); hi = np.take(self._hi, bins, axis=1)
+            # Alternate the envelope edges so every decimated pixel column spans min..max
+            ys[:, 0::2] = hi[:, 0::2]; ys[:, 1::2] = lo[:, 1::2]
+            np.copyto(ys, 0.0, where=~np.isfinite(ys))
+        elif self.mode == 'average':
+            running = np.divide(self._sum, self._n, out=np.zeros_like(self._sum), where=self._n > 0)
+            np.copyto(running, self._shown, where=self._complete)
+            np.take(running, bins, axis=1, out=ys)
+        else:
+            np.take(self._ema, bins, axis=1, out=ys)
+        return ys
+
+    def _accumulate_hires(self, new, continuous):
+        """Trailing boxcar mean of `count` samples, continued across calls for a continuous acquisition."""
+        if new.shape[1] == 0: return
+        k = self.count
+        carry = self._carry if continuous else self._carry[:, :0]
+        joined = np.concatenate((carry, new), axis=1)
+        cumsum = np.cumsum(joined, axis=1)
+        cumsum = np.concatenate((np.zeros((joined.shape[0], 1)), cumsum), axis=1)
+        width = np.minimum(np.arange(carry.shape[1] + 1, joined.shape[1] + 1), k) # Shorter window at the start
+        ends = np.arange(carry.shape[1] + 1, joined.shape[1] + 1)
+        filtered = (cumsum[:, ends] - cumsum[:, ends - width]) / width
+        self._ring.write(filtered)
+        self._carry = joined[:, -(k - 1):] if k > 1 else joined[:, :0]
+        self.updates += 1
@@ -0,0 +1,215 @@
+"""
+Headless batch renderer for the oscilloscope figure.
+
+Renders many parameter sets to PNG/SVG with the Agg backend, using the same
+ScopeView, themes and layout as the GUI, fanned out over a process pool.
+Each worker builds one figure and reuses it for every image it renders.
+
+Examples:
+    python batch_render.py --grid A=0.5,1,2 x_factor=1:4:4 --out renders
+    python batch_render.py --config configs.json --format svg --workers 4
+    python batch_render.py --animate phi=-360:360:73 --out phi_sweep.gif
+
+Grid values are comma lists or start:stop:count ranges (inclusive). Config
+files are a JSON list of objects or a CSV with a header row; keys are
+SignalParams fields plus 'theme', 'font_size', 'display', 'name' and (JSON
+only) 'channels', a list of ChannelParams objects.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from signal_engine import SignalEngine, SignalParams, ChannelParams
+from scope_view import ScopeView, THEMES, DEFAULT_THEME, DEFAULT_BASE_FONT_SIZE, style_figure
+
+FIGSIZE = (10, 12) # Same as the GUI figure
+DEFAULT_DPI = 100
+OUTPUT_FORMATS = ('png', 'svg')
+PARAM_FIELDS = {f.name: f.type for f in fields(SignalParams) if f.name != 'channels'}
+CHANNEL_FIELDS = [f.name for f in fields(ChannelParams)]
+RENDER_KEYS = ('theme', 'font_size', 'display', 'name', 'channels')
+
+# --- Per-worker state (one figure per process) ---
+_worker = None
+
+
+class FigureRenderer:
+    """One Agg figure + ScopeView + SignalEngine, reused for every render."""
+
+    def __init__(self, figsize=FIGSIZE, dpi=DEFAULT_DPI):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.fig.subplots(4, 1)
+        self.view = ScopeView(self.fig, blit=False)
+        self.engine = SignalEngine()
+        self._style = None
+
+    def prepare(self, config, keep_persistence=False):
+        """Computes and lays out one configuration; the figure is then ready to save."""
+        theme_name = config.get('theme', DEFAULT_THEME)
+        if theme_name not in THEMES: raise ValueError(f"Unknown theme '{theme_name}', expected one of {list(THEMES)}")
+        font_size = int(config.get('font_size', DEFAULT_BASE_FONT_SIZE))
+        if (theme_name, font_size) != self._style:
+            theme = THEMES[theme_name]
+            self.view.set_theme(theme, font_size)
+            style_figure(self.fig, theme, font_size)
+            self._style = (theme_name, font_size)
+        display = config.get('display', 'lines')
+        if display != self.view.display_mode: self.view.set_display_mode(display)
+        if not keep_persistence and self.view.phosphor is not None: self.view.phosphor.clear()
+        self.view.prepare(self.engine.compute(config_params(config)))
+
+    def render(self, config, path):
+        self.prepare(config)
+        self.fig.savefig(path, facecolor=self.fig.get_facecolor())
+        return path
+
+
+def _init_worker(figsize, dpi):
+    global _worker
+    _worker = FigureRenderer(figsize, dpi)
+
+
+def _render_job(config, path):
+    return _worker.render(config, path)
+
+
+# --- Configurations ---
+def config_params(config):
+    """SignalParams from a configuration dict (unknown keys raise)."""
+    unknown = set(config) - set(PARAM_FIELDS) - set(RENDER_KEYS)
+    if unknown: raise ValueError(f"Unknown configuration keys {sorted(unknown)}")
+    values = {key: config[key] for key in PARAM_FIELDS if key in config}
+    if 'points' in values: values['points'] = int(values['points'])
+    return SignalParams(channels=config_channels(config.get('channels', ())), **values)
+
+
+def config_channels(channels):
+    """ChannelParams tuple from the 'channels' list of a configuration."""
+    if isinstance(channels, (str, dict)) or not hasattr(channels, '__iter__'):
+        raise ValueError(f"'channels' must be a list of channel objects, got {channels!r}")
+    result = []
+    for i, ch in enumerate(channels):
+        if not isinstance(ch, dict): raise ValueError(f"'channels'[{i}] must be an object, got {ch!r}")
+        unknown = set(ch) - set(CHANNEL_FIELDS)
+        if unknown: raise ValueError(f"Unknown keys {sorted(unknown)} in 'channels'[{i}], expected {list(CHANNEL_FIELDS)}")
+        result.append(ChannelParams(**ch))
+    return tuple(result)
+
+
+def parse_value(text):
+    try: return float(text)
+    except ValueError: return text
+
+
+def parse_axis(spec):
+    """'phi=-90,0,90' or 'phi=-360:360:73' -> ('phi', [values])."""
+    if '=' not in spec: raise ValueError(f"Expected name=values, got '{spec}'")
+    name, values = spec.split('=', 1)
+    if ':' in values:
+        start, stop, count = values.split(':')
+        return name, list(np.linspace(float(start), float(stop), int(count)))
+    return name, [parse_value(v) for v in values.split(',')]
+
+
+def grid_configs(specs, base=None):
+    """Cartesian product of the grid axes, each merged over `base`."""
+    axes = [parse_axis(spec) for spec in specs]
+    names = [name for name, _ in axes]
+    return [dict(base or {}, **dict(zip(names, combo))) for combo in itertools.product(*(values for _, values in axes))]
+
+
+def load_configs(path):
+    """Reads a JSON list of configuration objects or a CSV with one configuration per row."""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            return [{key: parse_value(value) for key, value in row.items() if value != ''} for row in csv.DictReader(f)]
+    with open(path) as f:
+        configs = json.load(f)
+    if not isinstance(configs, list): raise ValueError(f"'{path}' must hold a JSON list of configurations")
+    return configs
+
+
+def output_name(index, config, fmt):
+    if 'name' in config: return f"{config['name']}.{fmt}"
+    return f"render_{index:04d}.{fmt}"
+
+
+# --- Batch / Animation ---
+def render_batch(configs, out_dir, fmt='png', workers=None, figsize=FIGSIZE, dpi=DEFAULT_DPI):
+    """Renders every configuration into `out_dir`; returns the written paths and writes manifest.json."""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(config, os.path.join(out_dir, output_name(i, config, fmt))) for i, config in enumerate(configs)]
+    for config, _ in jobs: config_params(config) # Fail fast on bad configurations
+    written = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(figsize, dpi)) as pool:
+        futures = {pool.submit(_render_job, config, path): path for config, path in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                written.append(future.result())
+                print(f"[{done}/{len(jobs)}] {path}")
+            except Exception as e:
+                print(f"Error rendering {path}: {e}"); traceback.print_exc()
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump([{'file': os.path.basename(path), 'config': config} for config, path in jobs], f, indent=2, default=float)
+    return written
+
+
+def render_animation(configs, path, fps=15, figsize=FIGSIZE, dpi=DEFAULT_DPI):
+    """Encodes the configurations as consecutive frames (GIF via Pillow, MP4 etc. via ffmpeg)."""
+    from matplotlib.animation import FFMpegWriter, PillowWriter # Only needed for animations
+
+    renderer = FigureRenderer(figsize, dpi)
+    writer = PillowWriter(fps=fps) if path.lower().endswith('.gif') else FFMpegWriter(fps=fps)
+    with writer.saving(renderer.fig, path, dpi):
+        for i, config in enumerate(configs, start=1):
+            renderer.prepare(config, keep_persistence=True) # Phosphor persistence carries across frames
+            writer.grab_frame(facecolor=renderer.fig.get_facecolor())
+            print(f"[{i}/{len(configs)}] frame")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render oscilloscope figures without a display.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--grid', nargs='+', metavar='NAME=VALUES', help="parameter grid axes, e.g. A=0.5,1,2 phi=-90:90:7")
+    source.add_argument('--config', metavar='FILE', help="JSON or CSV list of configurations")
+    source.add_argument('--animate', nargs='+', metavar='NAME=VALUES', help="parameter sweep encoded as one animation")
+    parser.add_argument('--set', nargs='*', default=[], metavar='NAME=VALUE', help="fixed values applied to every configuration")
+    parser.add_argument('--out', default='renders', help="output directory (or animation file with --animate)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='png')
+    parser.add_argument('--theme', choices=list(THEMES), default=DEFAULT_THEME)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--fps', type=int, default=15, help="animation frame rate")
+    args = parser.parse_args(argv)
+
+    base = {'theme': args.theme}
+    for spec in args.set:
+        name, value = spec.split('=', 1); base[name] = parse_value(value)
+    start = time.perf_counter()
+    if args.animate:
+        configs = grid_configs(args.animate, base)
+        render_animation(configs, args.out, fps=args.fps, dpi=args.dpi)
+        count = len(configs)
+    else:
+        configs = grid_configs(args.grid, base) if args.grid else [dict(base, **config) for config in load_configs(args.config)]
+        count = len(render_batch(configs, args.out, args.format, args.workers, dpi=args.dpi))
+    print(f"Rendered {count} frame(s) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Headless benchmark suite for the frame pipeline.
+
+Times every stage of a slider tick separately on an Agg canvas (no Tk
+display needed): parameter read, signal compute, segment split, artist
+update, styling/legend, tight_layout, full draw and the blit fast path, the
+fast-screen rasterizer, plus the measurement engine and a whole interactive
+tick. Cases sweep record
+lengths, cycle counts and font sizes and include the worst case of short
+sweeps on a fast signal (tqt = tqn = 0.05, x = 10).
+
+Results are written as JSON so runs from two commits can be compared:
+
+    python benchmark.py --out bench.json
+    python benchmark.py --quick --compare bench.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from signal_engine import SignalEngine, SignalParams, split_sweep_segments
+from scope_view import ScopeView, THEMES, DEFAULT_THEME, SCOPE_X_SPAN, style_figure
+from raster_screen import RasterScreen
+from measurements import MeasurementEngine
+from trigger import TriggerEngine
+
+RESULT_VERSION = 1
+DEFAULT_REPEATS = 5
+RECORD_LENGTHS = (1_000, 10_000, 100_000, 1_000_000)
+QUICK_RECORD_LENGTHS = (1_000, 100_000)
+CYCLE_CASES = { # name -> SignalParams overrides; x_factor and the sweep factors set how many cycles are drawn
+    'default': {},
+    'slow': {'x_factor': 0.1},
+    'many_cycles': {'x_factor': 10.0},
+    'worst_short_sweeps': {'x_factor': 10.0, 'tqt_factor': 0.05, 'tqn_factor': 0.05},
+}
+FONT_SIZES = (11, 20)
+STAGES = ('read_params', 'compute', 'split_segments', 'update_artists', 'styling', 'tight_layout', 'draw', 'blit',
+          'raster', 'measure', 'tick')
+REGRESSION_THRESHOLD = 1.25 # Median slower than baseline by more than this factor is reported
+REGRESSION_MIN_MS = 0.5 # ...and by at least this much, so timer noise on tiny stages is not reported
+
+
+class PipelineBench:
+    """One Agg figure and pipeline, timed stage by stage."""
+
+    def __init__(self, font_size, figsize=(10, 12), dpi=100):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.fig.subplots(4, 1)
+        theme = THEMES[DEFAULT_THEME]
+        self.view = ScopeView(self.fig, theme=theme, base_font_size=font_size)
+        style_figure(self.fig, theme, font_size)
+        self.engine = SignalEngine()
+        self.trigger = TriggerEngine()
+        self.measurements = MeasurementEngine()
+        self.view.ensure_artists()
+        self.raster = RasterScreen(1, 1, theme=theme) # Sized to the scope axes once the layout has run
+
+    def run(self, values, repeats):
+        """Returns {stage: [seconds, ...]} for `repeats` ticks after one warm-up tick."""
+        timings = {stage: [] for stage in STAGES}
+        view = self.view
+        for i in range(repeats + 1):
+            laps = {}
+            # Nudge phi every tick so nothing downstream can reuse the previous frame
+            controls = dict(values, phi=values.get('phi', 0.0) + i)
+
+            start = time.perf_counter()
+            params = SignalParams(**controls)
+            laps['read_params'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            frame = self.trigger.apply(self.engine.compute(params))
+            laps['compute'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            split_sweep_segments(frame, n_cols=view.pixel_columns(view.ax[2], SCOPE_X_SPAN))
+            laps['split_segments'] = time.perf_counter() - start
+
+            view.invalidate()
+            start = time.perf_counter()
+            view.update_artists(frame)
+            laps['update_artists'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            view.apply_static(frame)
+            laps['styling'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            view.layout()
+            laps['tight_layout'] = time.perf_counter() - start
+
+            view.mark_static(frame)
+            start = time.perf_counter()
+            self.fig.canvas.draw()
+            laps['draw'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            view.blit_dynamic()
+            laps['blit'] = time.perf_counter() - start
+
+            # Fast screen: the scope panel rasterized and encoded for Tk instead of drawn by matplotlib
+            bbox = view.ax[2].bbox
+            self.raster.resize(bbox.width, bbox.height)
+            start = time.perf_counter()
+            self.raster.render(frame, view.display_mode)
+            self.raster.ppm()
+            laps['raster'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            self.measurements.update(frame)
+            laps['measure'] = time.perf_counter() - start
+
+            # A whole slider tick on the fast path, as the GUI runs it
+            start = time.perf_counter()
+            frame = self.trigger.apply(self.engine.compute(params.with_changes(phi=params.phi + 0.5)))
+            self.measurements.update(frame)
+            view.render(frame)
+            laps['tick'] = time.perf_counter() - start
+
+            if i == 0: continue # Warm-up
+            for stage, seconds in laps.items(): timings[stage].append(seconds)
+        return timings
+
+
+def summarize(samples):
+    ms = np.asarray(samples) * 1e3
+    return {'median_ms': float(np.median(ms)), 'min_ms': float(np.min(ms)), 'mean_ms': float(np.mean(ms)),
+            'p95_ms': float(np.percentile(ms, 95)), 'runs': int(ms.size)}
+
+
+def bench_cases(record_lengths, font_sizes):
+    """(name, SignalParams values, font size) for every benchmark case."""
+    for points in record_lengths:
+        for cycle_name, overrides in CYCLE_CASES.items():
+            for font_size in font_sizes:
+                yield f"{cycle_name}/points={points}/font={font_size}", dict(overrides, points=points), font_size
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(), 'machine': platform.machine(), 'commit': commit or None,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run_suite(record_lengths=RECORD_LENGTHS, font_sizes=FONT_SIZES, repeats=DEFAULT_REPEATS, verbose=True):
+    benches = {}
+    cases = []
+    for name, values, font_size in bench_cases(record_lengths, font_sizes):
+        if font_size not in benches: benches[font_size] = PipelineBench(font_size)
+        bench = benches[font_size]
+        stages = {stage: summarize(samples) for stage, samples in bench.run(values, repeats).items()}
+        cases.append({'case': name, 'params': values, 'font_size': font_size, 'stages': stages})
+        if verbose:
+            print(f"{name:<45} tick {stages['tick']['median_ms']:8.2f} ms  draw {stages['draw']['median_ms']:8.2f} ms  "
+                  f"compute {stages['compute']['median_ms']:8.2f} ms")
+    return {'version': RESULT_VERSION, 'environment': environment(), 'repeats': repeats, 'cases': cases}
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Prints the stages whose median got slower than `threshold` × baseline; returns them."""
+    base_cases = {case['case']: case['stages'] for case in baseline['cases']}
+    regressions = []
+    for case in results['cases']:
+        base = base_cases.get(case['case'])
+        if base is None: continue
+        for stage, stats in case['stages'].items():
+            if stage not in base or base[stage]['median_ms'] <= 0: continue
+            ratio = stats['median_ms'] / base[stage]['median_ms']
+            if ratio > threshold and stats['median_ms'] - base[stage]['median_ms'] >= REGRESSION_MIN_MS:
+                regressions.append((case['case'], stage, base[stage]['median_ms'], stats['median_ms'], ratio))
+    for name, stage, before, after, ratio in regressions:
+        print(f"REGRESSION {name} {stage}: {before:.2f} ms -> {after:.2f} ms ({ratio:.2f}x)")
+    if not regressions: print(f"No stage slower than {threshold:.2f}x baseline")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the oscilloscope frame pipeline headlessly.")
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare against a previous results file")
+    parser.add_argument('--points', type=int, nargs='+', help="record lengths to benchmark")
+    parser.add_argument('--font-sizes', type=int, nargs='+', default=list(FONT_SIZES))
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--quick', action='store_true', help=f"only record lengths {QUICK_RECORD_LENGTHS}")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    record_lengths = args.points or (QUICK_RECORD_LENGTHS if args.quick else RECORD_LENGTHS)
+    results = run_suite(record_lengths, args.font_sizes, args.repeats)
+    if args.out:
+        with open(args.out, 'w') as f: json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)
+        if compare(results, baseline, args.threshold): return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Background frame computation for the Tk front end.
+
+The numeric pipeline (signal synthesis, sweep, trigger, measurements,
+decimation, spectrum) runs on one worker thread; NumPy releases the GIL
+inside its loops, so the Tk thread stays responsive meanwhile. Each job
+computes into one of a small set of preallocated SignalEngines (double
+buffering): the Tk thread can draw the previous result while the next one
+is being computed, and no array is written while it is still on screen.
+
+Jobs are "latest wins": submitting replaces a job that has not started,
+and a job that is running when a newer one arrives is abandoned at its
+next checkpoint, unless no frame has been delivered for MAX_STALE seconds
+(so a continuous drag still shows intermediate frames). The Tk thread
+collects finished results with poll() from an `after` timer and hands the
+buffer back with release().
+"""
+import threading
+import time
+import traceback
+from collections import deque
+
+from signal_engine import SignalEngine
+
+DEFAULT_BUFFERS = 2
+MAX_STALE = 0.1 # Seconds without a delivered frame after which superseded jobs are finished anyway
+
+
+class Cancelled(Exception):
+    """Raised by a pipeline checkpoint when its job has been superseded."""
+
+
+class ComputeResult:
+    """Output of one job; `value` is whatever the pipeline returned."""
+
+    def __init__(self, generation, slot, value, elapsed):
+        self.generation = generation
+        self.slot = slot
+        self.value = value
+        self.elapsed = elapsed
+
+
+class ComputeWorker:
+    """
+    Runs `pipeline(engine, job, checkpoint)` for the latest submitted job
+    on a daemon thread. `engine` is the SignalEngine owning this job's
+    buffers; calling `checkpoint()` between stages raises Cancelled once a
+    newer job is waiting (and a frame was delivered recently), so
+    superseded work stops early.
+    """
+
+    def __init__(self, pipeline, buffers=DEFAULT_BUFFERS, max_stale=MAX_STALE):
+        self.pipeline = pipeline
+        self.max_stale = max_stale
+        self.engines = [SignalEngine() for _ in range(buffers)]
+        self._free = deque(range(buffers)) # FIFO, so the slot on screen is the last one to be reused
+        self._cond = threading.Condition()
+        self._job = None # Latest job not started yet
+        self._generation = 0 # Generation of the latest submitted job
+        self._result = None # Finished result not yet collected by poll()
+        self._running = 0 # Jobs currently in the pipeline (0 or 1)
+        self._stopped = False
+        self._last_delivery = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='compute-worker', daemon=True)
+        self._thread.start()
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0 # Abandoned mid-pipeline or replaced before starting
+        self.superseded = 0 # Finished but replaced by a newer result before it was collected
+
+    @property
+    def busy(self):
+        """True while a job is queued, running, or finished but not collected."""
+        with self._cond: return self._job is not None or self._running > 0 or self._result is not None
+
+    def submit(self, job):
+        """Queues `job` (replacing any queued one); returns its generation."""
+        with self._cond:
+            if self._job is not None: self.cancelled += 1
+            self._generation += 1
+            self._job = (self._generation, job)
+            self.submitted += 1
+            self._cond.notify_all()
+            return self._generation
+
+    def poll(self):
+        """Takes the finished result, if any; its buffer stays reserved until release()."""
+        with self._cond:
+            result, self._result = self._result, None
+            return result
+
+    def release(self, result):
+        """Returns the result's buffer once the Tk thread no longer draws from it."""
+        with self._cond:
+            self._free.append(result.slot)
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _checkpoint(self, generation):
+        if self._stopped: raise Cancelled()
+        if self._generation != generation and time.perf_counter() - self._last_delivery < self.max_stale: raise Cancelled()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (self._job is None or not self._free):
+                    self._cond.wait()
+                if self._stopped: return
+                (generation, job), self._job = self._job, None
+                slot = self._free.popleft()
+                self._running += 1
+            start = time.perf_counter()
+            value = None
+            try:
+                value = self.pipeline(self.engines[slot], job, lambda: self._checkpoint(generation))
+                finished = True
+            except Cancelled:
+                finished = False
+            except Exception as e:
+                print(f"Error in background compute: {e}"); traceback.print_exc()
+                finished = False
+            with self._cond:
+                self._running -= 1
+                if not finished:
+                    self.cancelled += 1; self._free.append(slot)
+                else:
+                    if self._result is not None:
+                        self.superseded += 1; self._free.append(self._result.slot)
+                    self._result = ComputeResult(generation, slot, value, time.perf_counter() - start)
+                    self._last_delivery = time.perf_counter()
+                    self.completed += 1
+                self._cond.notify_all()
+
+    def stats(self):
+        return {'submitted': self.submitted, 'completed': self.completed,
+                'cancelled': self.cancelled, 'superseded': self.superseded}
@@ -0,0 +1,82 @@
+"""
+Pixel-aware min/max (peak-detect) decimation.
+
+Long records are reduced to about two points per horizontal pixel before they
+reach Matplotlib, so drawing cost depends on the canvas width instead of the
+record length. Every run of consecutive samples that falls into the same pixel
+column (and the same trace segment) is replaced by its minimum and maximum,
+which keeps narrow peaks visible where plain striding would alias them away.
+"""
+import numpy as np
+
+DECIMATION_THRESHOLD = 4 # Only decimate when there are more than this many samples per column
+
+
+def pixel_columns(x, n_cols, x_range=None):
+    """Maps x values onto integer pixel columns 0..n_cols-1 spanning `x_range`."""
+    x_min, x_max = (np.nanmin(x), np.nanmax(x)) if x_range is None else x_range
+    span = x_max - x_min
+    if not span > 0: return np.zeros(x.shape, dtype=np.intp)
+    cols = np.multiply(np.subtract(x, x_min), n_cols / span)
+    np.clip(cols, 0, n_cols - 1, out=cols)
+    return cols.astype(np.intp)
+
+
+def minmax_decimate(x, y, n_cols, x_range=None, breaks=None):
+    """
+    Reduces (x, y) to at most two points per pixel column run.
+
+    `breaks` is an optional boolean array marking samples that start a new
+    trace segment; segments are kept apart by NaN in the output, matching
+    the NaN-separated layout used for the scope traces. Each run emits its
+    min and max in the order the trace visits them (rising runs min first).
+    """
+    x = np.asarray(x); y = np.asarray(y)
+    n = x.size
+    if n == 0: return x.astype(np.float64), y.astype(np.float64)
+    n_cols = max(int(n_cols), 1)
+
+    cols = pixel_columns(x, n_cols, x_range)
+    run_start = np.empty(n, dtype=bool)
+    run_start[0] = True
+    np.not_equal(cols[1:], cols[:-1], out=run_start[1:])
+    if breaks is not None: run_start |= breaks
+    starts = np.flatnonzero(run_start)
+    ends = np.append(starts[1:], n) - 1
+
+    y_min = np.minimum.reduceat(y, starts)
+    y_max = np.maximum.reduceat(y, starts)
+    rising = y[starts] <= y[ends]
+
+    n_runs = starts.size
+    if breaks is not None:
+        segment_starts = breaks[starts]; segment_starts[0] = False
+        n_breaks = int(np.count_nonzero(segment_starts))
+    else:
+        segment_starts = None; n_breaks = 0
+
+    # Two output points per run plus one NaN per segment break
+    offsets = 2 * np.arange(n_runs)
+    if n_breaks: offsets += np.cumsum(segment_starts)
+    x_out = np.full(2 * n_runs + n_breaks, np.nan)
+    y_out = np.full(2 * n_runs + n_breaks, np.nan)
+    x_out[offsets] = x[starts]; x_out[offsets + 1] = x[ends]
+    y_out[offsets] = np.where(rising, y_min, y_max)
+    y_out[offsets + 1] = np.where(rising, y_max, y_min)
+    return x_out, y_out
+
+
+def peak_decimate(x, y, n_cols, x_range=None):
+    """
+    Reduces (x, y) with x ascending to one point per pixel column holding the
+    column's maximum, like the positive-peak detector of a spectrum analyzer.
+    """
+    x = np.asarray(x); y = np.asarray(y)
+    if x.size == 0: return x.astype(np.float64), y.astype(np.float64)
+    cols = pixel_columns(x, max(int(n_cols), 1), x_range)
+    starts = np.flatnonzero(np.diff(cols, prepend=-1))
+    return x[starts], np.maximum.reduceat(y, starts)
+
+
+def should_decimate(n_samples, n_cols):
+    return n_cols is not None and n_cols > 0 and n_samples > DECIMATION_THRESHOLD * n_cols
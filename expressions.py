@@ -0,0 +1,213 @@
+"""
+User-defined waveform expressions compiled to vectorized NumPy.
+
+An expression such as `A*sin(w*t + phi) + 0.3*sin(3*w*t)` is parsed once
+with the ast module. Only numbers, the known variables and functions and
+arithmetic operators are accepted, so nothing in the text is ever run as
+Python. The tree is compiled into a flat list of ufunc calls writing into
+a few temporary arrays that are kept from frame to frame; the last call
+writes straight into the caller's output. compile_expression() caches by
+source text, so a slider tick costs a few ufunc passes and no parsing.
+"""
+import ast
+import copy
+import re
+from functools import lru_cache
+
+import numpy as np
+
+TWO_PI = 2.0 * np.pi
+SCALAR_VARIABLES = ('A', 'x', 'w', 'f', 'phi') # Filled by the caller from the controls
+ARRAY_VARIABLES = ('t',) # Plus ch1, ch2, ... (see CHANNEL_NAME)
+CHANNEL_NAME = re.compile(r'ch[1-9][0-9]*$')
+CONSTANTS = {'pi': np.pi, 'e': np.e}
+MAX_LENGTH = 500 # Characters; keeps parsing trivially cheap
+
+
+# --- Waveforms ---
+# Each helper accepts scalars or arrays and writes into `out`, which may be
+# `theta` itself, so they never need a temporary of their own.
+def _cycle_fraction(theta, out, shift=0.0):
+    """frac(θ/2π + shift), in [0, 1)."""
+    r = np.divide(theta, TWO_PI, out=out)
+    if shift: r = np.add(r, shift, out=out)
+    return np.remainder(r, 1.0, out=out)
+
+
+def square(theta, duty=0.5, out=None):
+    """±1 square wave in phase with sin(θ), high for the first `duty` of each cycle."""
+    r = np.less(_cycle_fraction(theta, out), duty, out=out)
+    r = np.multiply(r, 2.0, out=out)
+    return np.subtract(r, 1.0, out=out)
+
+
+def sawtooth(theta, out=None):
+    """Rising ramp from -1 to 1 over each cycle."""
+    r = np.multiply(_cycle_fraction(theta, out), 2.0, out=out)
+    return np.subtract(r, 1.0, out=out)
+
+
+def triangle(theta, out=None):
+    """±1 triangle wave in phase with sin(θ)."""
+    r = np.multiply(_cycle_fraction(theta, out, shift=0.25), 2.0, out=out)
+    r = np.subtract(r, 1.0, out=out)
+    r = np.absolute(r, out=out)
+    r = np.multiply(r, -2.0, out=out)
+    return np.add(r, 1.0, out=out)
+
+
+# name -> (function, min args, max args, writes `out` in several passes)
+FUNCTIONS = {
+    'sin': (np.sin, 1, 1, False), 'cos': (np.cos, 1, 1, False), 'tan': (np.tan, 1, 1, False),
+    'tanh': (np.tanh, 1, 1, False), 'exp': (np.exp, 1, 1, False), 'log': (np.log, 1, 1, False),
+    'log10': (np.log10, 1, 1, False), 'sqrt': (np.sqrt, 1, 1, False), 'abs': (np.absolute, 1, 1, False),
+    'sign': (np.sign, 1, 1, False), 'floor': (np.floor, 1, 1, False),
+    'min': (np.minimum, 2, 2, False), 'max': (np.maximum, 2, 2, False), 'clip': (np.clip, 3, 3, False),
+    'square': (square, 1, 2, True), 'sawtooth': (sawtooth, 1, 1, True), 'triangle': (triangle, 1, 1, True),
+    'noise': ('noise', 0, 1, False), # Gaussian noise with standard deviation `sigma` (default 1)
+}
+BINARY_OPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+              ast.Pow: np.power, ast.Mod: np.remainder}
+UNARY_OPS = {ast.USub: np.negative, ast.UAdd: np.positive}
+
+
+# --- Compiler ---
+# Operand references: ('c', value) constant, ('v', name) variable, ('s', i)
+# scalar result, ('t', i) temporary array, ('o', None) the output array.
+class _Compiler:
+    def __init__(self):
+        self.steps = [] # (function, operand refs, destination ref)
+        self.names = set()
+        self.n_scalars = 0
+        self.n_temps = 0
+        self._free = []
+
+    def _temp(self):
+        if self._free: return ('t', self._free.pop())
+        self.n_temps += 1
+        return ('t', self.n_temps - 1)
+
+    def _release(self, refs):
+        self._free.extend(ref[1] for ref in refs if ref[0] == 't')
+
+    @staticmethod
+    def is_array(ref):
+        return ref[0] == 't' or (ref[0] == 'v' and ref[1] not in SCALAR_VARIABLES)
+
+    def emit(self, func, args, always_array=False, multi_pass=False):
+        if all(ref[0] == 'c' for ref in args) and not always_array:
+            return ('c', float(func(*(value for _, value in args)))) # Constant folding
+        if not always_array and not any(self.is_array(ref) for ref in args):
+            dest = ('s', self.n_scalars); self.n_scalars += 1
+        elif multi_pass:
+            # Later passes re-read the other operands, so only the first one may be overwritten
+            dest = args[0] if args[0][0] == 't' else self._temp()
+            self._release([ref for ref in args if ref != dest])
+        else:
+            self._release(args) # Element-wise ufuncs may write over their own inputs
+            dest = self._temp()
+        self.steps.append((func, args, dest))
+        return dest
+
+    def compile(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return ('c', float(node.value))
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name in CONSTANTS: return ('c', CONSTANTS[name])
+            if name in SCALAR_VARIABLES or name in ARRAY_VARIABLES or CHANNEL_NAME.match(name):
+                self.names.add(name)
+                return ('v', name)
+            raise ValueError(f"Unknown name '{name}' at column {node.col_offset + 1}")
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+            return self.emit(BINARY_OPS[type(node.op)], [self.compile(node.left), self.compile(node.right)])
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+            return self.emit(UNARY_OPS[type(node.op)], [self.compile(node.operand)])
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id
+            if name not in FUNCTIONS: raise ValueError(f"Unknown function '{name}' at column {node.col_offset + 1}")
+            func, min_args, max_args, multi_pass = FUNCTIONS[name]
+            if node.keywords or not min_args <= len(node.args) <= max_args:
+                expected = min_args if min_args == max_args else f"{min_args} to {max_args}"
+                raise ValueError(f"{name}() takes {expected} positional argument(s)")
+            if name == 'noise': self.names.add('noise')
+            return self.emit(func, [self.compile(arg) for arg in node.args], always_array=name == 'noise', multi_pass=multi_pass)
+        raise ValueError(f"Unsupported syntax '{type(node).__name__}' at column {getattr(node, 'col_offset', 0) + 1}")
+
+
+class Expression:
+    """
+    A compiled expression. `evaluate(variables, out)` writes the result
+    into the float64 array `out`; `variables` maps the names in `names`
+    (A, w, phi, t, ch2, ...) to scalars or arrays shaped like `out`.
+    Temporaries are kept between calls, so one Expression must not be
+    evaluated from two threads at once; give each thread its own copy().
+    """
+
+    def __init__(self, text):
+        if len(text) > MAX_LENGTH: raise ValueError(f"Expression longer than {MAX_LENGTH} characters")
+        if not text.strip(): raise ValueError("Empty expression")
+        try:
+            tree = ast.parse(text.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid syntax at column {e.offset}: {e.msg}") from None
+        compiler = _Compiler()
+        result = compiler.compile(tree.body)
+        steps = compiler.steps
+        if steps and steps[-1][2] == result and result[0] == 't':
+            steps[-1] = steps[-1][:2] + (('o', None),) # Last step writes straight into the output
+            result = ('o', None)
+        self.text = text
+        self.steps = [(self._noise if func == 'noise' else func, args, dest) for func, args, dest in steps]
+        self.result = result
+        self.names = frozenset(compiler.names)
+        self.random = 'noise' in self.names
+        self.n_scalars = compiler.n_scalars
+        self.n_temps = compiler.n_temps
+        self._temps = []
+        self._rng = np.random.default_rng()
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+    def copy(self):
+        """The same compiled steps with their own temporaries and noise generator."""
+        clone = copy.copy(self)
+        clone.steps = [(clone._noise if func == self._noise else func, args, dest) for func, args, dest in self.steps]
+        clone._temps = []
+        clone._rng = np.random.default_rng()
+        return clone
+
+    def _noise(self, sigma=1.0, out=None):
+        self._rng.standard_normal(out=out)
+        if sigma != 1.0: np.multiply(out, sigma, out=out)
+        return out
+
+    def evaluate(self, variables, out):
+        if not self._temps or self._temps[0].shape != out.shape:
+            self._temps = [np.empty(out.shape) for _ in range(self.n_temps)]
+        temps = self._temps; scalars = [None] * self.n_scalars
+
+        def value(ref):
+            kind, key = ref
+            if kind == 'c': return key
+            if kind == 'v': return variables[key]
+            if kind == 't': return temps[key]
+            if kind == 's': return scalars[key]
+            return out
+
+        try:
+            for func, args, (kind, key) in self.steps:
+                values = [value(ref) for ref in args]
+                if kind == 's': scalars[key] = func(*values)
+                else: func(*values, out=out if kind == 'o' else temps[key])
+            if self.result[0] != 'o': out[...] = value(self.result)
+        except KeyError as e:
+            raise ValueError(f"'{e.args[0]}' is not available (channel disabled?)") from None
+        return out
+
+
+@lru_cache(maxsize=32)
+def compile_expression(text):
+    """Cached Expression for `text`; raises ValueError for anything but a valid expression."""
+    return Expression(text)
@@ -0,0 +1,160 @@
+"""
+Per-frame timing instrumentation.
+
+FrameProfiler records how long each stage of a frame took (read, compute,
+measure, update, style, layout, draw, blit, ...) into fixed-size ring
+buffers, so memory stays constant however long the app runs. Recording a
+stage is two perf_counter calls and one array store; percentiles, FPS and
+the text report are only computed when someone asks for them (the HUD
+overlay, a stats dump), so the profiler can stay on all the time.
+"""
+import json
+import sys
+import time
+
+import numpy as np
+
+STAT_WINDOW = 512 # Samples kept per stage
+PERCENTILES = (50, 95, 99)
+HUD_REFRESH = 0.25 # Seconds between HUD text refreshes
+HUD_STAGES = ('frame', 'compute', 'average', 'measure', 'traces', 'update', 'layout', 'draw', 'blit', 'raster') # Shown in the overlay, when recorded
+
+
+class TimingRing:
+    """The last `capacity` durations (seconds) in a preallocated array."""
+
+    def __init__(self, capacity=STAT_WINDOW):
+        self._data = np.empty(capacity)
+        self.index = 0
+        self.total = 0 # Samples ever recorded
+
+    def add(self, seconds):
+        self._data[self.index] = seconds
+        self.index += 1
+        if self.index == self._data.size: self.index = 0
+        self.total += 1
+
+    def values(self):
+        return self._data[:min(self.total, self._data.size)]
+
+    def summary(self):
+        """Milliseconds statistics over the window; None before the first sample."""
+        values = self.values()
+        if values.size == 0: return None
+        p = np.percentile(values, PERCENTILES) * 1e3
+        result = {f'p{q}_ms': float(v) for q, v in zip(PERCENTILES, p)}
+        result.update(mean_ms=float(np.mean(values) * 1e3), max_ms=float(np.max(values) * 1e3),
+                      last_ms=float(self._data[self.index - 1] * 1e3), count=self.total)
+        return result
+
+
+class _Stage:
+    """Reusable context manager timing one stage (no allocation per use)."""
+    __slots__ = ('ring', 'start')
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ring.add(time.perf_counter() - self.start)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class FrameProfiler:
+    """
+    Stage timings, frame rate and event counters.
+
+        with profiler.frame():
+            with profiler.stage('compute'): ...
+
+    `frame()` times the whole frame under 'frame' and timestamps it for the
+    FPS estimate; `count(name)` bumps an event counter such as 'coalesced'.
+    """
+
+    def __init__(self, capacity=STAT_WINDOW, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.rings = {}
+        self.counters = {}
+        self._stages = {}
+        self._frame_times = TimingRing(capacity) # Frame start timestamps, not durations
+        self._hud_text = ''; self._hud_time = None
+
+    def stage(self, name):
+        if not self.enabled: return _NULL_STAGE
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self.rings.setdefault(name, TimingRing(self.capacity)))
+        return stage
+
+    def frame(self):
+        if self.enabled: self._frame_times.add(time.perf_counter())
+        return self.stage('frame')
+
+    def count(self, name, n=1):
+        if not self.enabled: return
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        self.rings = {}; self.counters = {}; self._stages = {}
+        self._frame_times = TimingRing(self.capacity)
+        self._hud_time = None
+
+    def fps(self):
+        """Frame rate over the window (0.0 until two frames happened)."""
+        stamps = self._frame_times.values()
+        if stamps.size < 2: return 0.0
+        span = float(np.max(stamps) - np.min(stamps))
+        return (stamps.size - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        return {'fps': self.fps(), 'counters': dict(self.counters),
+                'stages': {name: ring.summary() for name, ring in self.rings.items() if ring.total}}
+
+    def report(self):
+        """Multi-line text table of every stage."""
+        stats = self.stats()
+        lines = [f"FPS {stats['fps']:.1f}  " + "  ".join(f"{k} {v}" for k, v in sorted(stats['counters'].items())),
+                 f"{'stage':<12}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'n':>8}  (ms)"]
+        for name, s in stats['stages'].items():
+            lines.append(f"{name:<12}{s['p50_ms']:9.2f}{s['p95_ms']:9.2f}{s['p99_ms']:9.2f}{s['max_ms']:9.2f}{s['count']:8d}")
+        return "\n".join(lines)
+
+    def hud_text(self):
+        """Compact overlay text, recomputed at most every HUD_REFRESH seconds."""
+        now = time.perf_counter()
+        if self._hud_time is not None and now - self._hud_time < HUD_REFRESH: return self._hud_text
+        self._hud_time = now
+        lines = [f"{self.fps():5.1f} fps  coalesced {self.counters.get('coalesced', 0)}",
+                 f"{'':<8}{'p50':>6}{'p95':>6}{'p99':>6}"]
+        for name in HUD_STAGES:
+            ring = self.rings.get(name)
+            if ring is None or ring.total == 0: continue
+            p50, p95, p99 = np.percentile(ring.values(), PERCENTILES) * 1e3
+            lines.append(f"{name:<8}{p50:6.1f}{p95:6.1f}{p99:6.1f} ms")
+        self._hud_text = "\n".join(lines)
+        return self._hud_text
+
+    def dump(self, path=None):
+        """Writes the stats as JSON to `path`, or the text report to stdout."""
+        if path is None:
+            print(self.report()); sys.stdout.flush()
+            return
+        with open(path, 'w') as f: json.dump(self.stats(), f, indent=2)
+
+
+NULL_PROFILER = FrameProfiler(capacity=1, enabled=False) # Default for views and schedulers without a profiler
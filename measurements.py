@@ -0,0 +1,247 @@
+"""
+Automatic waveform measurements.
+
+Amplitude measurements (peak-to-peak, mean, RMS) are plain reductions over
+the record. Timing measurements (period/frequency, duty cycle, rise/fall
+time, phase between channels) come from one pass that sorts every sample
+into the four bands split by the 10%, 50% and 90% reference levels. Only
+the (few) places where the band changes are looked at after that, so every
+cycle in the record is measured without a Python loop, and the 10%/90%
+bands double as hysteresis against noise at the 50% crossing.
+
+Running statistics across frames are merged batch by batch (Chan et al.),
+so no history is kept or rescanned.
+"""
+import numpy as np
+
+MEASUREMENTS = ('vpp', 'mean', 'rms', 'frequency', 'period', 'duty', 'rise_time', 'fall_time', 'phase')
+REFERENCE_LEVELS = (0.1, 0.5, 0.9) # Low / mid / high reference as fractions of the peak-to-peak range
+MIN_VPP = 1e-12 # Flatter records have no timing measurements
+PHASE_FREQUENCY_TOLERANCE = 0.01 # Phase is only reported between channels this close in frequency
+
+
+def _crossing_times(t, y, idx, level):
+    """Sub-sample times at which y crosses `level` between samples idx-1 and idx."""
+    y0 = y[idx - 1]; y1 = y[idx]
+    dy = y1 - y0
+    frac = np.divide(level - y0, dy, out=np.zeros_like(dy), where=dy != 0)
+    return t[idx - 1] + np.clip(frac, 0.0, 1.0) * (t[idx] - t[idx - 1])
+
+
+def transitions(t, y, low, mid, high):
+    """
+    Finds every complete low→high and high→low transition in one pass.
+
+    A rising transition leaves the band below `low` and reaches the band
+    at/above `high`; a falling one does the opposite. Returns a dict with
+    the `mid`-crossing times of both directions ('rise_mid', 'fall_mid'),
+    the low→high / high→low durations ('rise_times', 'fall_times') and the
+    times those transitions complete ('rise_ends', 'fall_ends').
+    """
+    zone = (y >= low).view(np.int8).copy()
+    zone += (y >= mid).view(np.int8)
+    zone += (y >= high).view(np.int8)
+    starts = np.flatnonzero(zone[1:] != zone[:-1]) + 1
+    starts = np.concatenate(([0], starts))
+    z = zone[starts]
+    runs = np.arange(starts.size)
+
+    # Forward-fill the last definite band (0 = below low, 3 = at/above high) across runs
+    definite = np.where((z == 0) | (z == 3), runs, 0)
+    np.maximum.accumulate(definite, out=definite)
+    filled = z[definite]
+    rising = np.flatnonzero((filled[1:] == 3) & (filled[:-1] == 0)) + 1
+    falling = np.flatnonzero((filled[1:] == 0) & (filled[:-1] == 3)) + 1
+
+    last_low = np.maximum.accumulate(np.where(z == 0, runs, 0))
+    last_high = np.maximum.accumulate(np.where(z == 3, runs, 0))
+    z_prev = np.concatenate(([z[0]], z[:-1]))
+    last_up_mid = np.maximum.accumulate(np.where((z >= 2) & (z_prev < 2), runs, 0))
+    last_down_mid = np.maximum.accumulate(np.where((z < 2) & (z_prev >= 2), runs, 0))
+
+    # Rising: leave the low band at run last_low+1, cross mid last before reaching high at run j
+    leave_low = starts[last_low[rising - 1] + 1]
+    rise_low = _crossing_times(t, y, leave_low, low)
+    rise_mid = _crossing_times(t, y, starts[last_up_mid[rising]], mid)
+    rise_high = _crossing_times(t, y, starts[rising], high)
+
+    leave_high = starts[last_high[falling - 1] + 1]
+    fall_high = _crossing_times(t, y, leave_high, high)
+    fall_mid = _crossing_times(t, y, starts[last_down_mid[falling]], mid)
+    fall_low = _crossing_times(t, y, starts[falling], low)
+
+    return {'rise_mid': rise_mid, 'fall_mid': fall_mid,
+            'rise_times': rise_high - rise_low, 'fall_times': fall_low - fall_high,
+            'rise_ends': rise_high, 'fall_ends': fall_low}
+
+
+def measure_channel(t, y):
+    """
+    Measures one record. Scalar results are in the dict under MEASUREMENTS
+    names (NaN when not measurable; 'phase' is filled in by `measure`);
+    per-cycle arrays are under 'cycles', and the time each of those cycles
+    completes under 'cycle_ends'.
+    """
+    y_min = float(np.min(y)); y_max = float(np.max(y))
+    vpp = y_max - y_min
+    result = dict.fromkeys(MEASUREMENTS, np.nan)
+    result.update(vpp=vpp, mean=float(np.mean(y)), rms=float(np.sqrt(np.dot(y, y) / y.size)))
+    cycles = {name: np.empty(0) for name in ('period', 'frequency', 'duty', 'rise_time', 'fall_time')}
+    ends = dict.fromkeys(cycles, np.empty(0))
+    result['cycles'] = cycles; result['cycle_ends'] = ends; result['rise_mid'] = np.empty(0)
+    if vpp <= MIN_VPP or y.size < 3: return result
+
+    low, mid, high = (y_min + f * vpp for f in REFERENCE_LEVELS)
+    edges = transitions(t, y, low, mid, high)
+    rise_mid, fall_mid = edges['rise_mid'], edges['fall_mid']
+    cycles['rise_time'] = edges['rise_times']; cycles['fall_time'] = edges['fall_times']
+    ends['rise_time'] = edges['rise_ends']; ends['fall_time'] = edges['fall_ends']
+    result['rise_mid'] = rise_mid
+
+    periods = np.diff(rise_mid)
+    cycles['period'] = periods; ends['period'] = rise_mid[1:]
+    cycles['frequency'] = 1.0 / periods[periods > 0]; ends['frequency'] = rise_mid[1:][periods > 0]
+    if periods.size and fall_mid.size:
+        # Duty: time above mid within each complete rising-to-rising cycle
+        nxt = np.searchsorted(fall_mid, rise_mid[:-1])
+        has_fall = nxt < fall_mid.size
+        high_time = fall_mid[nxt[has_fall]] - rise_mid[:-1][has_fall]
+        in_cycle = high_time < periods[has_fall]
+        cycles['duty'] = high_time[in_cycle] / periods[has_fall][in_cycle]
+        ends['duty'] = rise_mid[1:][has_fall][in_cycle]
+
+    for name, values in cycles.items():
+        if values.size: result[name] = float(np.mean(values))
+    if result['period'] > 0: result['frequency'] = 1.0 / result['period'] # Mean period, not mean of 1/period
+    return result
+
+
+def phase_between(reference, other):
+    """
+    Phase of `other` relative to `reference` in degrees, wrapped to
+    (-180, 180]; positive when `other` leads. NaN unless both have a
+    frequency and the frequencies agree.
+    """
+    period = reference['period']; rise_ref = reference['rise_mid']; rise_other = other['rise_mid']
+    if not (period > 0 and other['period'] > 0) or rise_ref.size == 0 or rise_other.size == 0: return np.nan
+    if abs(other['period'] - period) > PHASE_FREQUENCY_TOLERANCE * period: return np.nan
+    nxt = np.searchsorted(rise_other, rise_ref)
+    valid = nxt < rise_other.size
+    if not valid.any(): return np.nan
+    delay = rise_other[nxt[valid]] - rise_ref[valid]
+    # Average on the unit circle so delays that wrap around a period do not cancel out
+    angles = -2.0 * np.pi * delay / period
+    phase = float(np.degrees(np.arctan2(np.mean(np.sin(angles)), np.mean(np.cos(angles)))))
+    return 180.0 if phase == -180.0 else phase
+
+
+def measure(t, ys):
+    """Measures every row of `ys` (channels × samples); phases are relative to the first row."""
+    results = [measure_channel(t, y) for y in np.atleast_2d(ys)]
+    for result in results[1:]: result['phase'] = phase_between(results[0], result)
+    if results: results[0]['phase'] = 0.0 if results[0]['period'] > 0 else np.nan
+    return results
+
+
+class RunningStats:
+    """Count, min, max, mean and standard deviation of a stream of values, without keeping them."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = np.nan
+        self.min = np.nan
+        self.max = np.nan
+        self._m2 = 0.0
+
+    def add(self, values):
+        """Merges a batch of values (NaN ignored) into the statistics."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        n_b = values.size
+        if n_b == 0: return
+        mean_b = float(np.mean(values)); m2_b = float(np.sum(np.square(values - mean_b)))
+        if self.count == 0:
+            self.count, self.mean, self._m2 = n_b, mean_b, m2_b
+            self.min = float(np.min(values)); self.max = float(np.max(values))
+            return
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self._m2 += m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+        self.min = min(self.min, float(np.min(values))); self.max = max(self.max, float(np.max(values)))
+
+    @property
+    def std(self):
+        return float(np.sqrt(self._m2 / self.count)) if self.count else np.nan
+
+
+class MeasurementEngine:
+    """
+    Measures signal_engine Frames and keeps running statistics per channel.
+
+    Channels are keyed by number (1, 2, ...), the horizontal sweep by
+    'sweep'. Cycle measurements feed every cycle of every frame into the
+    statistics; amplitude measurements feed one value per frame. Passing a
+    `key` that identifies the frame's data (e.g. its parameters) lets
+    redraws of unchanged data reuse the previous results instead of
+    measuring the same record again. For a continuous acquisition, pass
+    `sample_index` (samples generated so far) instead: the record is
+    measured for display, but only the cycles completing in the samples
+    that are new since the last update are added to the statistics, so a
+    cycle is counted once however many frames it stays on screen.
+    """
+
+    def __init__(self, include_sweep=True):
+        self.include_sweep = include_sweep
+        self.results = {}
+        self.stats = {}
+        self.frames = 0
+        self._key = None
+        self._sample_index = None
+
+    def reset(self):
+        self.stats = {}
+        self.frames = 0
+
+    def update(self, frame, key=None, sample_index=None):
+        """Measures `frame`, updates the statistics and returns {channel: result}."""
+        if key is not None and key == self._key: return self.results
+        self._key = key
+        t = frame.t
+        n = t.size
+        # Cycles completing after `since` are new; a fresh record counts all of them
+        since = -np.inf
+        if sample_index is not None:
+            previous, self._sample_index = self._sample_index, sample_index
+            if previous is not None and previous <= sample_index:
+                n_new = min(sample_index - previous, n)
+                if n_new == 0: return self.results
+                if n_new < n: since = t[n - n_new - 1]
+        results = dict(zip(frame.channel_ids, measure(t, frame.channel_data)))
+        if self.include_sweep: results['sweep'] = measure_channel(t, frame.x_sweep)
+        for channel, result in results.items():
+            for name in MEASUREMENTS:
+                values = result['cycles'].get(name)
+                if values is None: values = result[name]
+                elif since > -np.inf: values = values[result['cycle_ends'][name] > since]
+                self.stats.setdefault((channel, name), RunningStats()).add(values)
+        self.results = results
+        self.frames += 1
+        return results
+
+    def statistic(self, channel, name):
+        """RunningStats of one measurement (empty if never measured)."""
+        return self.stats.get((channel, name)) or RunningStats()
+
+
+def format_value(value, unit='', digits=4):
+    """Engineering-notation string such as '12.35 ms'; '---' for NaN."""
+    if not np.isfinite(value): return '---'
+    if value == 0: return f"0 {unit}".rstrip()
+    exponent = int(np.clip(np.floor(np.log10(abs(value)) / 3) * 3, -12, 9))
+    prefix = {-12: 'p', -9: 'n', -6: 'µ', -3: 'm', 0: '', 3: 'k', 6: 'M', 9: 'G'}[exponent]
+    return f"{value / 10.0 ** exponent:.{digits}g} {prefix}{unit}".rstrip()
@@ -1,12 +1,26 @@
+import time
+STARTUP_T0 = time.perf_counter() # Startup timing starts before the heavy imports
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, simpledialog
 import tkinter.font as tkFont
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MultipleLocator, AutoMinorLocator
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import traceback
-import time
+import sys
+import threading
+from copy import copy
+from dataclasses import asdict
+from signal_engine import SignalEngine, SignalParams, ChannelParams, sweep_timing
+from themes import THEMES, DEFAULT_THEME, DEFAULT_BASE_FONT_SIZE, FIGURE_TITLE # matplotlib and scope_view are imported in build_plot
+from render_scheduler import RenderScheduler
+from acquisition import LiveAcquisition
+from trigger import TriggerEngine, TriggerSettings, TRIGGER_MODES
+from spectrum import WINDOWS, AVERAGING, DEFAULT_WINDOW
+from measurements import MeasurementEngine, format_value
+from sources import open_capture, frame_data_key, ExpressionSource, CAPTURE_EXTENSIONS, DEFAULT_CAPTURE_RATE
+from instrumentation import FrameProfiler
+from compute_worker import ComputeWorker
+from averaging import SweepAverager, ACQUISITION_MODES, AVERAGE_COUNTS, DEFAULT_ACQUISITION_MODE, DEFAULT_AVERAGE_COUNT
+from session import SessionRecorder
 
 # --- Default Parameters & Ranges ---
 DEFAULT_AMP = 1.0
@@ -16,13 +30,34 @@ DEFAULT_TQT_FACTOR = 1.0
 DEFAULT_TQN_FACTOR = 0.25
 DEFAULT_PHI_UNIT = 'deg'
 DEFAULT_INPUT_FUNC = 'sin'
-DEFAULT_BASE_FONT_SIZE = 11
+DEFAULT_EXPRESSION = 'A*sin(w*t + phi) + 0.3*sin(3*w*t)'
+RENDER_MAX_FPS = 60 # Upper bound on plot renders per second while dragging
+FIGSIZE = (10, 12)
+DEFAULT_BACKGROUND_COMPUTE = True # Compute static frames on the worker thread
+COMPUTE_POLL_MS = 5 # Interval of the Tk timer collecting finished background frames
+FAST_SCREEN_PANEL_FPS = 15 # Redraw rate of the matplotlib panels while the fast screen shows a running acquisition
 
 AMP_RANGE = (0, 10.0)
 X_FACTOR_RANGE = (0.1, 10.0)
 PHI_RANGE = (-360.0, 360.0); PHI_RAD_RANGE = (-2 * np.pi, 2 * np.pi)
 T_FACTOR_RANGE = (0.05, 5.0)
+TRIGGER_LEVEL_RANGE = (-10.0, 10.0); TRIGGER_HYSTERESIS_RANGE = (0.0, 1.0); HOLDOFF_FACTOR_RANGE = (0.0, 5.0)
 FONT_SIZES = [10, 11, 12, 14, 16, 18, 20]
+RECORD_LENGTHS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 50_000_000] # Samples per frame
+DEFAULT_RECORD_LENGTH = 1_000
+DEFAULT_ACQ_MODE = 'static' # 'static' (fixed window from t = 0) or 'live' (continuous acquisition)
+LIVE_TICK_MS = 16 # Wall-clock interval between live acquisition steps
+DEFAULT_SCOPE_DISPLAY = 'lines' # 'lines' (vector traces) or 'phosphor' (intensity-graded persistence)
+DEFAULT_TRIGGER_MODE = 'free' # 'free' keeps the original free-running sweep
+DEFAULT_TRIGGER_SLOPE = 'rising'
+DEFAULT_TRIGGER_LEVEL = 0.0
+DEFAULT_TRIGGER_HYSTERESIS = 0.05
+DEFAULT_HOLDOFF_FACTOR = 0.0
+DEFAULT_SPECTRUM_SCALE = 'db'; DEFAULT_SPECTRUM_AVERAGING = 'none'
+NUM_CHANNELS = 4 # CH1 uses the Input Signal controls; CH2.. are edited in the Channels section
+DEFAULT_CHANNELS = {2: ChannelParams(x_factor=3.0, phi=90.0, enabled=False), # 2:3 Lissajous against CH1 in XY mode
+                    3: ChannelParams(A=0.5, x_factor=4.0, enabled=False),
+                    4: ChannelParams(A=0.75, x_factor=1.0, func='cos', enabled=False)}
 
 # --- Global references ---
 root = None; style = None
@@ -30,28 +65,56 @@ amp_slider = None; omega_slider = None; phi_slider = None
 amp_var = None; omega_var = None; phi_var = None; phi_unit_var = None; phi_label_var = None
 input_func_var = None
 input_title_var = None
+capture_source = None # Memory-mapped capture selected by the 'capture' input radio
+capture_file = None # (path, sample rate) of capture_source, for session recordings
+expression_source = None; expression_var = None # Compiled user expression selected by the 'expr' input radio
+worker_expression_source = None # Same expression with its own temporaries, evaluated by the compute worker
+capture_offset_slider = None; capture_offset_var = None
 tqt_factor_slider = None; tqn_factor_slider = None
 tqt_factor_var = None; tqn_factor_var = None
 theme_var = None; theme_combo = None
 font_size_combo = None; font_size_var = None
+record_length_var = None
 canvas = None; fig = None; ax = None
-line_input = None; line_sweep = None;
+scope_view = None # Owns the plot artists and the blit background
 is_plot_initialized = False
 quick_set_buttons = []; button_wrapper_frame = None;
 redraw_timer_id = None
+render_scheduler = None # Coalesces slider events into at most one render per frame
+live_acquisition = None; acq_mode_var = None; acq_status_var = None
+live_timer_id = None; live_last_tick = None
+scope_display_var = None
+fast_screen_var = None # Scope panel drawn by a RasterScreen into a Tk PhotoImage instead of matplotlib
+fast_screen = None; fast_screen_photo = None; fast_screen_label = None
+fast_screen_place = None; fast_screen_panels_time = 0.0 # Overlay geometry; last matplotlib redraw while live
+spectrum_window_var = None; spectrum_scale_var = None; spectrum_avg_var = None
+engine_lock = threading.RLock() # Guards the trigger, averaging, measurement and spectrum state shared with the compute worker
+measurement_engine = MeasurementEngine() # Per-channel measurements with running statistics
+measurements_var = None
+trigger_engine = TriggerEngine() # Restarts sweeps at edge trigger instants
+sweep_averager = SweepAverager() # Average / peak detect / hi-res over many sweeps
+averaging_mode_var = None; averaging_count_var = None; averaging_status_var = None
+trigger_mode_var = None; trigger_slope_var = None; trigger_status_var = None
+trig_level_slider = None; trig_hyst_slider = None; holdoff_factor_slider = None
+trig_level_var = None; trig_hyst_var = None; holdoff_factor_var = None
+channel_settings = dict(DEFAULT_CHANNELS) # Channel number -> ChannelParams for CH2..CH{NUM_CHANNELS}
+edited_channel = 2; channel_select_var = None; channel_enabled_var = None; channel_func_var = None
+ch_amp_slider = None; ch_omega_slider = None; ch_phi_slider = None
+ch_amp_var = None; ch_omega_var = None; ch_phi_var = None
 global_entry_widgets = [] # Keep list for Entry workaround
+engine = SignalEngine() # Headless signal math, buffers reused between frames
+profiler = FrameProfiler() # Per-stage frame timings, always on; shown by the Perf HUD
+startup_times = {} # Milestone -> seconds since STARTUP_T0, filled by main()
+applied_style = None # (ttk theme, font size) last applied by apply_theme
+plot_placeholder = None # Skeleton shown in the plot pane until the figure exists
+hud_var = None
+compute_worker = None; compute_poll_id = None; background_var = None # Background compute thread (created in main)
+session_recorder = None; session_button_var = None # Control session being recorded, if any
+session_event_kind = None # Overrides the recorded event kind while set (e.g. 'quick_set')
 
 # --- Global Font Objects REMOVED ---
 # Reverting to style-based font control
 
-# --- Theme Definitions ---
-THEMES = {
-    "Dark Scope": {'tk_bg': '#2E2E2E', 'tk_fg': 'white', 'ttk_theme': 'clam', 'fig_bg': 'black', 'ax_bg': 'black', 'text': 'white', 'grid_major': '#888888', 'grid_minor': '#555555', 'spine': '#888888', 'trace_input': 'cyan', 'trace_sweep': '#FFDD00', 'trace_yt_fwd': 'cyan', 'trace_yt_ret': '#FF8888', 'button_bg': '#4F4F4F', 'button_active_bg': '#6A6A6A'},
-    "Light": {'tk_bg': '#F0F0F0', 'tk_fg': 'black', 'ttk_theme': 'vista', 'fig_bg': 'white', 'ax_bg': 'white', 'text': 'black', 'grid_major': '#D0D0D0', 'grid_minor': '#EAEAEA', 'spine': 'black', 'trace_input': 'blue', 'trace_sweep': 'orange', 'trace_yt_fwd': 'blue', 'trace_yt_ret': 'red', 'button_bg': '#E1E1E1', 'button_active_bg': '#CFCFCF'},
-    "Blueprint": {'tk_bg': '#D0E0F0', 'tk_fg': '#1A2E40', 'ttk_theme': 'alt', 'fig_bg': '#2A4D69', 'ax_bg': '#4B86B4', 'text': '#FFFFFF', 'grid_major': '#ADCBE3', 'grid_minor': '#63ACE5', 'spine': '#ADCBE3', 'trace_input': '#FFFFB3', 'trace_sweep': '#FFD633', 'trace_yt_fwd': '#FFFFB3', 'trace_yt_ret': '#FF8888', 'button_bg': '#87CEEB', 'button_active_bg': '#A1DFFF'}
-}
-DEFAULT_THEME = "Dark Scope"
-
 # --- Global Color Variables ---
 bg_color=None; text_color=None; grid_major_color=None; grid_minor_color=None; spine_color=None
 trace_color_input=None; trace_color_sweep=None; trace_color_yt_fwd=None; trace_color_yt_ret = None;
@@ -63,6 +126,16 @@ def get_phi_format(): return "{:.1f}" if phi_unit_var.get() == 'deg' else "{:.3f
 def get_xfactor_range(): return X_FACTOR_RANGE
 def get_amp_range(): return AMP_RANGE
 def get_t_factor_range(): return T_FACTOR_RANGE
+def get_trigger_level_range(): return TRIGGER_LEVEL_RANGE
+def get_trigger_hysteresis_range(): return TRIGGER_HYSTERESIS_RANGE
+def get_holdoff_factor_range(): return HOLDOFF_FACTOR_RANGE
+def get_capture_offset_range(): return (0.0, capture_source.duration if capture_source else 1.0)
+def format_record_length(points): return f"{points:,}"
+
+def get_record_length():
+    """Samples per frame from the record length combobox."""
+    try: return int(record_length_var.get().replace(',', ''))
+    except (ValueError, AttributeError, tk.TclError): return DEFAULT_RECORD_LENGTH
 
 def create_entry_handler(entry_var, slider, slider_range_provider, format_spec_provider):
     # --- THIS FUNCTION HAS THE CORRECTED SYNTAX ---
@@ -106,13 +179,259 @@ def create_entry_handler(entry_var, slider, slider_range_provider, format_spec_p
     return handler
 
 def update_input_title(*args):
-    """Updates the title label based on sin/cos selection."""
+    """Updates the title label based on sin/cos/capture selection."""
     global input_func_var, input_title_var, is_plot_initialized
+    if input_func_var and input_func_var.get() == 'capture' and capture_source is None:
+        if not open_capture_dialog(): input_func_var.set(DEFAULT_INPUT_FUNC)
+        return
+    if input_func_var and input_func_var.get() == 'expr' and expression_source is None:
+        if not apply_expression(): input_func_var.set(DEFAULT_INPUT_FUNC)
+        return
     if input_func_var and input_title_var:
-        func_name = input_func_var.get()  # 'sin' or 'cos'
-        input_title_var.set(f"Input Signal: y = A{func_name}(wt+phi)")
+        func_name = input_func_var.get()  # 'sin', 'cos', 'capture' or 'expr'
+        if func_name == 'capture': input_title_var.set(f"Input Signal: y = A·{capture_source.name}")
+        elif func_name == 'expr': input_title_var.set(f"Input Signal: y = {expression_source.name}")
+        else: input_title_var.set(f"Input Signal: y = A{func_name}(wt+phi)")
     is_plot_initialized = False
-    update_plot()
+    request_render(func=input_func_var.get() if input_func_var else None)
+
+def open_capture_dialog():
+    """Asks for a capture file and selects it as the input; returns True once one is loaded."""
+    global capture_source, capture_file
+    path = filedialog.askopenfilename(parent=root, title="Open Capture",
+                                      filetypes=[("Captures", " ".join(f"*{ext}" for ext in CAPTURE_EXTENSIONS)), ("All files", "*.*")])
+    if not path: return False
+    sample_rate = None
+    if not path.lower().endswith('.wav'):
+        sample_rate = simpledialog.askfloat("Sample Rate", "Sample rate of the capture (S/s):", parent=root,
+                                            initialvalue=DEFAULT_CAPTURE_RATE, minvalue=1e-9)
+        if sample_rate is None: return False
+    try: capture_source = open_capture(path, sample_rate=sample_rate)
+    except Exception as e: print(f"Error opening capture '{path}': {e}"); traceback.print_exc(); return False
+    capture_file = (path, sample_rate)
+    if capture_offset_slider:
+        capture_offset_slider.config(from_=0.0, to=capture_source.duration); capture_offset_slider.set(0.0)
+    input_func_var.set('capture'); update_input_title()
+    return True
+
+def apply_expression(event=None):
+    """Compiles the expression entry and selects it as the input; returns True if it compiled."""
+    global expression_source, worker_expression_source
+    text = expression_var.get().strip()
+    try: expression_source = ExpressionSource(text)
+    except ValueError as e: print(f"Invalid expression '{text}': {e}"); return False
+    worker_expression_source = ExpressionSource(text)
+    input_func_var.set('expr'); update_input_title()
+    return True
+
+def get_input_source(worker=False):
+    """
+    The expression source for 'expr', the capture source positioned at the
+    offset slider for 'capture', else None (sin/cos). Sources hold buffers
+    and state, so a `worker` job gets sources of its own: a copy of the
+    capture per frame (the worker may still be filling the last one) and
+    the worker's own expression. The Tk thread uses the shared ones.
+    """
+    if input_func_var and input_func_var.get() == 'expr': return worker_expression_source if worker else expression_source
+    if capture_source is None or not input_func_var or input_func_var.get() != 'capture': return None
+    if not capture_offset_slider: return capture_source.at_offset(capture_source.offset) if worker else capture_source
+    offset = capture_offset_slider.get()
+    if capture_offset_var: capture_offset_var.set(f"{offset:.4g}")
+    if worker: return capture_source.at_offset(offset)
+    capture_source.offset = offset
+    return capture_source
+
+
+def read_controls():
+    """Every control value as a flat, JSON-friendly dict (the state recorded in sessions)."""
+    params = read_signal_params()
+    controls = {'A': params.A, 'x_factor': params.x_factor, 'phi': params.phi, 'phi_unit': params.phi_unit,
+                'func': params.func, 'tqt_factor': params.tqt_factor, 'tqn_factor': params.tqn_factor, 'points': params.points,
+                'channels': [asdict(ch) for ch in params.channels],
+                'trigger_mode': trigger_mode_var.get(), 'trigger_slope': trigger_slope_var.get(),
+                'trigger_level': trig_level_slider.get(), 'trigger_hysteresis': trig_hyst_slider.get(),
+                'holdoff_factor': holdoff_factor_slider.get(), 'display': scope_display_var.get(), 'fast_screen': fast_screen_var.get(),
+                'averaging': averaging_mode_var.get(), 'averaging_count': int(averaging_count_var.get()),
+                'theme': theme_var.get(), 'font_size': int(font_size_var.get()),
+                'spectrum_window': spectrum_window_var.get(), 'spectrum_scale': spectrum_scale_var.get(),
+                'spectrum_averaging': spectrum_avg_var.get()}
+    if expression_source is not None: controls['expression'] = expression_source.name
+    if capture_file is not None:
+        controls['capture'] = {'path': capture_file[0], 'sample_rate': capture_file[1]}
+        controls['capture_offset'] = capture_offset_slider.get()
+    return controls
+
+def read_signal_params():
+    """Collects the current control values into a SignalParams."""
+    return SignalParams(A=amp_slider.get(), x_factor=omega_slider.get(), phi=phi_slider.get(),
+                        tqt_factor=tqt_factor_slider.get(), tqn_factor=tqn_factor_slider.get(),
+                        func=input_func_var.get(), phi_unit=phi_unit_var.get(), points=get_record_length(),
+                        channels=read_channel_params())
+
+
+# --- Channels ---
+def store_edited_channel():
+    """Saves the Channels section controls into the settings of the channel being edited."""
+    if not all([channel_enabled_var, channel_func_var, ch_amp_slider, ch_omega_slider, ch_phi_slider]): return
+    ch = ChannelParams(A=ch_amp_slider.get(), x_factor=ch_omega_slider.get(), phi=ch_phi_slider.get(),
+                       func=channel_func_var.get(), enabled=channel_enabled_var.get())
+    channel_settings[edited_channel] = ch
+    ch_amp_var.set(f"{ch.A:.2f}"); ch_omega_var.set(f"{ch.x_factor:.2f}"); ch_phi_var.set(f"{ch.phi:.1f}")
+
+def read_channel_params():
+    """ChannelParams for CH2..CH{NUM_CHANNELS}, including the one currently being edited."""
+    store_edited_channel()
+    return tuple(channel_settings[i] for i in range(2, NUM_CHANNELS + 1))
+
+def on_channel_select(event=None):
+    """Loads the selected channel's settings into the Channels section controls."""
+    global edited_channel
+    store_edited_channel()
+    edited_channel = int(channel_select_var.get()[2:]) # 'CH3' -> 3
+    ch = channel_settings[edited_channel]
+    channel_enabled_var.set(ch.enabled); channel_func_var.set(ch.func)
+    ch_amp_slider.set(ch.A); ch_omega_slider.set(ch.x_factor); ch_phi_slider.set(ch.phi)
+    ch_amp_var.set(f"{ch.A:.2f}"); ch_omega_var.set(f"{ch.x_factor:.2f}"); ch_phi_var.set(f"{ch.phi:.1f}")
+    request_render(channel=edited_channel)
+
+
+def read_trigger_settings(timing):
+    """The trigger controls as TriggerSettings (holdoff scaled to `timing`); None while the controls do not exist yet."""
+    if not all([trigger_mode_var, trigger_slope_var, trig_level_slider, trig_hyst_slider, holdoff_factor_slider]): return None
+    level = trig_level_slider.get(); hysteresis = trig_hyst_slider.get(); holdoff_factor = holdoff_factor_slider.get()
+    trig_level_var.set(f"{level:.2f}"); trig_hyst_var.set(f"{hysteresis:.2f}"); holdoff_factor_var.set(f"{holdoff_factor:.2f}")
+    return TriggerSettings(mode=trigger_mode_var.get(), slope=trigger_slope_var.get(), level=level,
+                           hysteresis=hysteresis, holdoff=holdoff_factor * timing.Ty)
+
+def apply_trigger(frame, settings=None, out=None):
+    """
+    Configures the trigger (from its controls unless `settings` are given)
+    and restarts the frame's sweeps at trigger instants; see TriggerEngine.apply for `out`.
+    """
+    if settings is None: settings = read_trigger_settings(frame.timing)
+    if settings is None: return frame
+    with engine_lock:
+        trigger_engine.configure(**asdict(settings))
+        return trigger_engine.apply(frame, out=out)
+
+def arm_trigger():
+    with engine_lock: trigger_engine.arm()
+    request_render(trigger='arm')
+
+
+# --- Averaging ---
+def apply_averaging(frame, data_key, sample_index=None, settings=None):
+    """
+    Combines the frame with earlier sweeps per the Averaging controls (or
+    `settings`, a dict of SweepAverager.configure arguments); returns it with its measurement key.
+    """
+    with engine_lock:
+        if settings is not None: sweep_averager.configure(**settings)
+        if sweep_averager.mode == 'normal' or frame is trigger_engine.held_frame: return frame, data_key
+        frame = sweep_averager.apply(frame, key=data_key, sample_index=sample_index)
+        return frame, (data_key, sweep_averager.updates)
+
+def read_averaging_settings():
+    return {'mode': averaging_mode_var.get(), 'count': int(averaging_count_var.get())}
+
+def on_averaging_change(event=None):
+    try:
+        with engine_lock: sweep_averager.configure(**read_averaging_settings()); status = sweep_averager.status
+    except ValueError as e: print(f"Error configuring averaging: {e}"); return
+    averaging_status_var.set(status)
+    request_render(averaging=(averaging_mode_var.get(), averaging_count_var.get()))
+
+def reset_averaging():
+    with engine_lock: sweep_averager.reset()
+    request_render(averaging_reset=True)
+
+def engine_status():
+    """(trigger status, averaging status), read together under the engine lock."""
+    with engine_lock: return trigger_engine.status, sweep_averager.status
+
+def show_engine_status(status):
+    trigger_status, averaging_status = status
+    if trigger_status_var: trigger_status_var.set(trigger_status)
+    if averaging_status_var: averaging_status_var.set(averaging_status)
+
+
+# --- Background Compute ---
+def compute_pipeline(engine, job, checkpoint):
+    """
+    Worker-thread half of a frame: synthesis, trigger, measurements and
+    trace decimation into `engine`'s buffers. Touches no Tk variables or
+    artists; `checkpoint()` abandons the job once a newer one is waiting.
+
+    The trigger, averaging and spectrum settings come with the job. Each
+    stage that updates the shared engines runs under `engine_lock`, after a
+    checkpoint, so an abandoned job leaves them as they were and the Tk
+    thread never sees (or reconfigures) them halfway through a stage.
+    """
+    params, source, columns, data_key, settings = job
+    with profiler.stage('compute'):
+        frame = engine.compute(params, source)
+        with engine_lock:
+            checkpoint()
+            # The triggered sweep overwrites this buffer's own sweep arrays, keeping frames double-buffered
+            frame = apply_trigger(frame, settings['trigger'], out=(frame.x_sweep, frame.forward_mask, frame.return_mask))
+    with profiler.stage('average'), engine_lock:
+        checkpoint()
+        frame, data_key = apply_averaging(frame, data_key, settings=settings['averaging'])
+    with profiler.stage('measure'), engine_lock:
+        checkpoint()
+        measured = measure_frame(frame, data_key)
+        status = engine_status()
+    with profiler.stage('traces'):
+        with engine_lock:
+            checkpoint()
+            scope_view.spectrum.configure(**settings['spectrum'])
+        traces = scope_view.trace_data(frame, columns)
+    return frame, measured, status, traces
+
+def use_background_compute():
+    """Static frames go to the worker; live acquisition keeps generating on the Tk thread."""
+    if compute_worker is None or background_var is None or not background_var.get(): return False
+    return not (acq_mode_var and acq_mode_var.get() == 'live')
+
+def submit_frame(params):
+    """Snapshots everything the pipeline needs from Tk and hands it to the worker."""
+    source = get_input_source(worker=True)
+    settings = {'trigger': read_trigger_settings(sweep_timing(params)), 'averaging': read_averaging_settings(),
+                'spectrum': read_spectrum_settings()}
+    data_key = frame_data_key(params, source, settings['trigger'])
+    compute_worker.submit((params, source, scope_view.columns(), data_key, settings))
+    schedule_compute_poll()
+
+def schedule_compute_poll():
+    global compute_poll_id
+    if compute_poll_id is None: compute_poll_id = root.after(COMPUTE_POLL_MS, poll_compute)
+
+def poll_compute():
+    """Draws the latest finished background frame (only set_data + draw run here)."""
+    global compute_poll_id, is_plot_initialized
+    compute_poll_id = None
+    result = compute_worker.poll()
+    if result is not None:
+        try:
+            frame, measured, status, traces = result.value
+            with profiler.frame():
+                show_measurements(*measured)
+                show_engine_status(status)
+                if not is_plot_initialized:
+                    scope_view.reset()
+                    is_plot_initialized = True
+                scope_view.render(frame, traces)
+                if fast_screen_active(): draw_fast_screen(frame)
+        except Exception as e: print(f"Error drawing background frame: {e}"); traceback.print_exc()
+        finally: compute_worker.release(result)
+    if compute_worker.busy: schedule_compute_poll()
+
+
+def request_render(**changes):
+    """Asks for a plot update; renders are coalesced to at most RENDER_MAX_FPS."""
+    if session_recorder: record_session_event(next((key for key in changes if not key.startswith('.')), 'slider'))
+    if render_scheduler: render_scheduler.request(**changes)
+    else: update_plot()
 
 
 def update_plot(*args):
@@ -121,227 +440,78 @@ def update_plot(*args):
     (Reorganized Version)
     """
     # Declare necessary globals (required for standalone function)
-    global canvas, fig, ax, is_plot_initialized
+    global canvas, fig, ax, scope_view, is_plot_initialized
     global amp_slider, omega_slider, phi_slider, tqt_factor_slider, tqn_factor_slider, font_size_combo
     global amp_var, omega_var, phi_var, tqt_factor_var, tqn_factor_var, phi_unit_var, input_func_var, font_size_var
-    global line_input, line_sweep
-    global ax_bg_color, text_color, grid_major_color, grid_minor_color, spine_color
-    global trace_color_input, trace_color_sweep, trace_color_yt_fwd, trace_color_yt_ret
 
     # --- 1. Readiness Check ---
     widgets_and_vars_ready = all([
-        canvas, fig,
+        canvas, fig, scope_view,
         amp_slider, omega_slider, phi_slider, tqt_factor_slider, tqn_factor_slider, font_size_combo,
         amp_var, omega_var, phi_var, tqt_factor_var, tqn_factor_var, phi_unit_var, input_func_var, font_size_var,
-        # Also check colors needed early
-        ax_bg_color, text_color, grid_major_color, grid_minor_color, spine_color,
-        trace_color_input, trace_color_sweep, trace_color_yt_fwd, trace_color_yt_ret
     ])
     # Explicitly check the axes array separately
-    axes_ready = ax is not None and len(ax) == 3 # Assuming ax is assigned elsewhere
+    axes_ready = ax is not None and len(ax) == 4 # Assuming ax is assigned elsewhere
 
     if not widgets_and_vars_ready or not axes_ready:
         # print("Plot update skipped: Components not ready.")
         return
 
     try:
-        # --- 2. Get Parameters & Calculate Font Sizes ---
-        try:
-            base_font_size = int(font_size_var.get())
-        except (ValueError, tk.TclError):
-            base_font_size = DEFAULT_BASE_FONT_SIZE
-            if font_size_var: font_size_var.set(str(DEFAULT_BASE_FONT_SIZE)) # Prevent error loop
-
-        plot_title_fontsize = base_font_size + 3
-        plot_label_fontsize = base_font_size + 1
-        plot_legend_fontsize = base_font_size - 1
-        plot_text_fontsize = base_font_size - 2
-        tick_label_fontsize = base_font_size - 1
-
-        A = amp_slider.get()
-        x_factor = omega_slider.get()
-        phi_value = phi_slider.get()
-        current_phi_unit = phi_unit_var.get()
-        tqt_factor = tqt_factor_slider.get()
-        tqn_factor = tqn_factor_slider.get()
-        selected_func = input_func_var.get()
-
-        # --- 3. Update Tkinter Variable Displays ---
-        amp_var.set(f"{A:.2f}")
-        omega_var.set(f"{x_factor:.2f}")
-        phi_format_spec = get_phi_format() # Assumes get_phi_format depends on phi_unit_var
-        phi_var.set(phi_format_spec.format(phi_value))
-        tqt_factor_var.set(f"{tqt_factor:.2f}")
-        tqn_factor_var.set(f"{tqn_factor:.2f}")
-
-        # --- 4. Core Signal Calculations ---
-        omega = x_factor * np.pi
-        phi_rad = np.deg2rad(phi_value) if current_phi_unit == 'deg' else phi_value
-        phi_display_deg = phi_value if current_phi_unit == 'deg' else np.rad2deg(phi_value)
-
-        x_factor_safe = max(x_factor, 1e-6)
-        Ty = 2.0 / x_factor_safe # Period of input signal
-
-        Tqt = max(0.001, tqt_factor * Ty)
-        Tqn = max(0.001, tqn_factor * Ty)
-        T_total_sweep = Tqt + Tqn
-
-        # Determine time range and points
-        total_time = max(0.1, 3 * T_total_sweep, 5 * Ty, 1.5 * Tqt) # Ensure enough time
-        points = 1000 # Use a reasonable number of points
-        t = np.linspace(0, total_time, points, endpoint=False)
-
-        # Calculate Input Signal y(t)
-        if selected_func == 'cos':
-            y = A * np.cos(omega * t + phi_rad)
-        else: # Default to sin
-            y = A * np.sin(omega * t + phi_rad)
-
-        # Calculate Horizontal Sweep Signal x(t) (Normalized 0 to 1)
-        x_sweep_signal = np.zeros_like(t)
-        t_cycle = t % T_total_sweep
-        forward_mask_sweep = t_cycle < Tqt
-        if Tqt > 1e-9: x_sweep_signal[forward_mask_sweep] = t_cycle[forward_mask_sweep] / Tqt
-        return_mask_sweep = ~forward_mask_sweep
-        if Tqn > 1e-9:
-            time_in_return = t_cycle[return_mask_sweep] - Tqt
-            x_sweep_signal[return_mask_sweep] = 1.0 - (time_in_return / Tqn)
-        else:
-            x_sweep_signal[return_mask_sweep] = 0.0
-        x_sweep_signal = np.clip(x_sweep_signal, 0, 1)
-
-        # --- 5. Prepare Plot Metadata ---
-        y_lim_val = max(abs(A) * 1.1, 0.5)
-        input_legend_label = (f'A = {A:.2f}, x = {x_factor:.2f}\n'
-                              f'ω = {omega:.2f} rad/s\n'
-                              f'φ = {phi_display_deg:.1f}°\n'
-                              f'func = {selected_func}')
-        sweep_title_text = f'2. Horiz. Sweep (Tqt={Tqt:.3f}s, Tqn={Tqn:.3f}s)'
-        scope_title_text = f'3. Oscilloscope (Y vs Sweep)'
-        input_title_text = '1. Input Signal'
-
-        # --- 6. Plotting ---
-        ax1, ax2, ax3 = ax # Unpack axes
-
-        # Always clear scope axes as it's fully replotted
-        ax3.clear()
-
-        # Initialize line objects if first time
-        if not is_plot_initialized:
-            ax1.clear()
-            ax2.clear()
-            line_input, = ax1.plot(t, y, color=trace_color_input) # Label set later
-            line_sweep, = ax2.plot(t, x_sweep_signal, color=trace_color_sweep)
-            is_plot_initialized = True
-        # Check if line objects exist before using them (safety check)
-        elif line_input is None or line_sweep is None:
-             print("Error: Plot lines not initialized despite is_plot_initialized=True. Re-initializing.")
-             is_plot_initialized = False # Force re-init next time
-             # Could call the function again or just return to avoid deeper errors
-             return
-
-        # --- 6a. Update Line Data (Axes 1 & 2) ---
-        line_input.set_data(t, y)
-        line_input.set_label(input_legend_label) # Update label text
-        line_sweep.set_data(t, x_sweep_signal)
-
-        # --- 6b. Apply Styling and Configuration (All Axes - runs every time for theme/font changes) ---
-        for i, ax_i in enumerate(ax):
-            ax_i.set_facecolor(ax_bg_color)
-            ax_i.grid(True, which='major', axis='both', linestyle='-', linewidth='0.6', color=grid_major_color)
-            ax_i.grid(True, which='minor', axis='both', linestyle=':', linewidth='0.4', color=grid_minor_color)
-            ax_i.tick_params(axis='both', colors=text_color, labelsize=tick_label_fontsize, which='both')
-            for spine in ax_i.spines.values():
-                spine.set_edgecolor(spine_color)
-            # Ensure text elements have the correct color
-            if ax_i.title: ax_i.title.set_color(text_color)
-            if ax_i.xaxis.label: ax_i.xaxis.label.set_color(text_color)
-            if ax_i.yaxis.label: ax_i.yaxis.label.set_color(text_color)
-
-        # Axis 1: Input Signal
-        ax1.set_title(input_title_text, fontsize=plot_title_fontsize, color=text_color)
-        ax1.set_xlabel('Time (s)', fontsize=plot_label_fontsize, color=text_color)
-        ax1.set_ylabel('Input Signal', fontsize=plot_label_fontsize, color=text_color)
-        ax1.set_xlim(0, total_time)
-        ax1.set_ylim(-y_lim_val, y_lim_val)
-        major_step_y0 = max(y_lim_val / 4, 1e-6); minor_step_y0 = major_step_y0 / 5
-        ax1.yaxis.set_major_locator(MultipleLocator(major_step_y0))
-        ax1.yaxis.set_minor_locator(MultipleLocator(minor_step_y0))
-        ax1.xaxis.set_minor_locator(AutoMinorLocator())
-        # Update/create legend for Axis 1
-        ax1.legend(fontsize=plot_legend_fontsize, loc='center left', bbox_to_anchor=(1, 0.5),
-                   facecolor=ax_bg_color, edgecolor=grid_major_color, labelcolor=text_color)
-
-        # Axis 2: Sweep Signal
-        ax2.set_title(sweep_title_text, fontsize=plot_title_fontsize, color=text_color)
-        ax2.set_xlabel('Time (s)', fontsize=plot_label_fontsize, color=text_color)
-        ax2.set_ylabel('Norm. Horiz. Pos.', fontsize=plot_label_fontsize, color=text_color)
-        ax2.set_xlim(0, total_time)
-        ax2.set_ylim(-0.1, 1.1)
-        ax2.xaxis.set_minor_locator(AutoMinorLocator())
-        ax2.yaxis.set_major_locator(MultipleLocator(0.2))
-        ax2.yaxis.set_minor_locator(MultipleLocator(0.05))
-        # Add text annotations to Axis 2
-        for txt in ax2.texts: txt.remove() # Clear previous text
-        if total_time > 0 and T_total_sweep > 0 and Tqt > 1e-9 and Tqn > 1e-9:
-            mid_fwd = Tqt / 2
-            mid_ret = Tqt + Tqn / 2
-            text_bg = list(plt.cm.colors.to_rgba(ax_bg_color))
-            text_bg[3] = 0.5 # Alpha
-            text_bg = tuple(text_bg)
-            if mid_fwd < total_time: ax2.text(mid_fwd, 0.55, 'Fwd\nSweep', ha='center', va='bottom', fontsize=plot_text_fontsize, color=text_color, backgroundcolor=text_bg)
-            if mid_ret < total_time: ax2.text(mid_ret, 0.45, 'Return\nSweep', ha='center', va='top', fontsize=plot_text_fontsize, color=text_color, backgroundcolor=text_bg)
-
-
-        # Axis 3: Oscilloscope Screen (already cleared, needs full setup)
-        ax3.set_title(scope_title_text, fontsize=plot_title_fontsize, color=text_color)
-        ax3.set_xlabel('Normalized Sweep Position', fontsize=plot_label_fontsize, color=text_color)
-        ax3.set_ylabel('Output Signal y(t)', fontsize=plot_label_fontsize, color=text_color)
-        ax3.set_xlim(-0.05, 1.05)
-        ax3.set_ylim(-y_lim_val, y_lim_val)
-        major_step_y2 = max(y_lim_val / 4, 1e-6); minor_step_y2 = major_step_y2 / 5
-        ax3.yaxis.set_major_locator(MultipleLocator(major_step_y2))
-        ax3.yaxis.set_minor_locator(MultipleLocator(minor_step_y2))
-        ax3.xaxis.set_major_locator(MultipleLocator(0.2))
-        ax3.xaxis.set_minor_locator(MultipleLocator(0.05))
-
-        # --- 6c. Plot Data Segments (Axis 3) ---
-        num_cycles_to_plot = int(np.ceil(total_time / T_total_sweep)) if T_total_sweep > 1e-9 else 1
-        first_tqt_plot = True; first_tqn_plot = True
-        for k in range(num_cycles_to_plot):
-            t_start = k * T_total_sweep
-            t_mid = t_start + Tqt
-            t_end = (k + 1) * T_total_sweep
-            idx_tqt = (t >= t_start) & (t < t_mid) # Use < t_mid?
-            idx_tqn = (t >= t_mid) & (t < t_end)
-
-            if np.any(idx_tqt):
-                label = 'Forward (Tqt)' if first_tqt_plot else ""
-                ax3.plot(x_sweep_signal[idx_tqt], y[idx_tqt], linestyle='-', color=trace_color_yt_fwd, label=label)
-                first_tqt_plot = False
-            if np.any(idx_tqn):
-                label = 'Return (Tqn)' if first_tqn_plot else ""
-                ax3.plot(x_sweep_signal[idx_tqn], y[idx_tqn], linestyle='--', color=trace_color_yt_ret, label=label)
-                first_tqn_plot = False
-
-        # Add legend to Axis 3 if traces were plotted
-        if not first_tqt_plot or not first_tqn_plot:
-            ax3.legend(fontsize=plot_legend_fontsize, loc='center left', bbox_to_anchor=(1, 0.5),
-                       facecolor=ax_bg_color, edgecolor=grid_major_color, labelcolor=text_color)
-
-        # --- 7. Final Adjustments & Redraw ---
-        try:
-            fig.tight_layout(rect=[0, 0.02, 0.92, 0.95]) # Adjust rect as needed [left, bottom, right, top]
-        except ValueError as e:
-            print(f"Warning: tight_layout failed: {e}. Plot might overlap.")
-            # Consider fig.subplots_adjust as fallback if necessary
+        if use_background_compute():
+            # Drawing happens in poll_compute once the worker has the frame ready
+            with profiler.stage('read'): params = read_signal_params()
+            show_param_values(params)
+            submit_frame(params)
+            return
 
-        canvas.draw()
+        with profiler.frame():
+            # --- 2. Get Parameters ---
+            with profiler.stage('read'): params = read_signal_params()
+
+            # --- 3. Update Tkinter Variable Displays ---
+            show_param_values(params)
+
+            # --- 4. Core Signal Calculations ---
+            with profiler.stage('compute'):
+                frame = None; data_key = None; sample_index = None
+                if acq_mode_var and acq_mode_var.get() == 'live':
+                    frame = get_live_acquisition(params).snapshot() # None until the first samples arrive
+                    if frame is not None: sample_index = live_acquisition.sample_index; data_key = ('live', sample_index)
+                if frame is None:
+                    source = get_input_source()
+                    frame = engine.compute(params, source)
+                trigger = read_trigger_settings(frame.timing)
+                frame = apply_trigger(frame, trigger)
+                if sample_index is None: data_key = frame_data_key(params, source, trigger)
+            with profiler.stage('average'):
+                frame, data_key = apply_averaging(frame, data_key, sample_index)
+                show_engine_status(engine_status())
+            with profiler.stage('measure'): update_measurements(frame, data_key, sample_index)
+
+            # --- 5. Plotting ---
+            # Traces are min/max-decimated to the canvas width before drawing.
+            # Styling, layout and a full redraw only run when theme, font size,
+            # axis limits or the window size changed; otherwise the traces are blitted.
+            if not is_plot_initialized:
+                scope_view.reset()
+                is_plot_initialized = True
+            if matplotlib_panels_due(): scope_view.render(frame)
+            if fast_screen_active(): draw_fast_screen(frame)
 
     except Exception as e:
         print(f"Error during plot update: {e}")
         traceback.print_exc()
 
+def show_param_values(params):
+    """Writes the slider values into their entry fields."""
+    amp_var.set(f"{params.A:.2f}")
+    omega_var.set(f"{params.x_factor:.2f}")
+    phi_format_spec = get_phi_format() # Assumes get_phi_format depends on phi_unit_var
+    phi_var.set(phi_format_spec.format(params.phi))
+    tqt_factor_var.set(f"{params.tqt_factor:.2f}")
+    tqn_factor_var.set(f"{params.tqn_factor:.2f}")
+
 # --- Other Functions ---
 def update_phase_unit():
     global phi_slider, phi_var, phi_unit_var, phi_label_var, is_plot_initialized
@@ -349,7 +519,7 @@ def update_phase_unit():
     try: current_unit=phi_unit_var.get(); current_value_str=phi_var.get(); current_value=float(current_value_str); target_range=get_phi_range(); new_format_spec=get_phi_format(); new_label_text="Phase (φ radians):" if current_unit=='rad' else "Phase (φ degrees):"; phi_label_var.set(new_label_text); min_val,max_val=target_range; phi_slider.config(from_=min_val,to=max_val); clamped_value=max(min_val,min(current_value,max_val)); phi_slider.set(clamped_value); phi_var.set(new_format_spec.format(clamped_value));
     except ValueError: print(f"Invalid numeric value '{current_value_str}' during unit change."); return
     except Exception as e: print(f"Error updating phase unit: {e}"); traceback.print_exc(); return
-    is_plot_initialized = False; update_plot()
+    is_plot_initialized = False; request_render(phi_unit=phi_unit_var.get())
 
 def set_phase_value(angle_in_degrees):
     global phi_slider, phi_var, phi_unit_var
@@ -358,7 +528,194 @@ def set_phase_value(angle_in_degrees):
     except Exception as e: print(f"Error getting phase params: {e}"); return
     if current_unit=='deg':value_to_set=float(angle_in_degrees)
     else:value_to_set=np.deg2rad(float(angle_in_degrees))
-    clamped_value=max(min_val,min(value_to_set,max_val)); phi_slider.set(clamped_value); phi_var.set(format_spec.format(clamped_value))
+    global session_event_kind
+    clamped_value=max(min_val,min(value_to_set,max_val))
+    session_event_kind = 'quick_set' # The slider command fires from set()
+    try: phi_slider.set(clamped_value)
+    finally: session_event_kind = None
+    phi_var.set(format_spec.format(clamped_value))
+
+# --- Live Acquisition ---
+def get_live_acquisition(params):
+    """Returns the live acquisition, created on first use, with `params` applied."""
+    global live_acquisition
+    source = get_input_source()
+    if live_acquisition is None: live_acquisition = LiveAcquisition(params, source=source)
+    elif live_acquisition.source is not source: live_acquisition.set_source(source, params)
+    else: live_acquisition.set_params(params)
+    return live_acquisition
+
+def update_acquisition_status():
+    if not acq_status_var: return
+    if live_acquisition is None or acq_mode_var.get() != 'live': acq_status_var.set("Static window"); return
+    state = "Single" if live_acquisition.single_shot else ("Running" if live_acquisition.running else "Stopped")
+    acq_status_var.set(f"{state} @ {live_acquisition.sample_rate / 1e3:.1f} kS/s")
+
+def start_acquisition(single=False):
+    global live_timer_id, live_last_tick
+    try:
+        acq_mode_var.set('live')
+        acq = get_live_acquisition(read_signal_params())
+        if single: acq.single()
+        else: acq.start()
+        live_last_tick = time.perf_counter()
+        if live_timer_id is None: live_timer_id = root.after(LIVE_TICK_MS, live_tick)
+    except Exception as e: print(f"Error starting acquisition: {e}"); traceback.print_exc()
+    update_acquisition_status()
+
+def stop_acquisition():
+    global live_timer_id
+    if live_acquisition: live_acquisition.stop()
+    if live_timer_id is not None:
+        try: root.after_cancel(live_timer_id)
+        except ValueError: pass
+        live_timer_id = None
+    update_acquisition_status(); request_render(acq_mode=acq_mode_var.get())
+
+def on_acq_mode_change():
+    if acq_mode_var.get() != 'live': stop_acquisition()
+    else: update_acquisition_status(); request_render(acq_mode='live')
+
+def on_scope_display_change():
+    if scope_view: scope_view.set_display_mode(scope_display_var.get())
+    request_render(scope_display=scope_display_var.get())
+
+# --- Fast Screen ---
+def fast_screen_active():
+    return bool(fast_screen_var and fast_screen_var.get() and scope_view)
+
+def on_fast_screen_toggle():
+    global fast_screen_place
+    enabled = fast_screen_var.get()
+    if scope_view: scope_view.set_fast_screen(enabled)
+    if not enabled and fast_screen_label is not None: fast_screen_label.place_forget(); fast_screen_place = None
+    request_render(fast_screen=enabled)
+
+def on_plot_resize(event):
+    """The overlay follows the scope axes once the resized figure has been laid out."""
+    if fast_screen_active(): request_render(fast_screen_resize=(event.width, event.height))
+
+def matplotlib_panels_due():
+    """False while the fast screen shows a running live acquisition and the panels were redrawn less than 1/FAST_SCREEN_PANEL_FPS ago."""
+    global fast_screen_panels_time
+    now = time.perf_counter()
+    running = live_acquisition is not None and live_acquisition.running and acq_mode_var.get() == 'live'
+    if fast_screen_active() and running and now - fast_screen_panels_time < 1.0 / FAST_SCREEN_PANEL_FPS: return False
+    fast_screen_panels_time = now
+    return True
+
+def draw_fast_screen(frame):
+    """Rasterizes the scope traces and shows them in a PhotoImage laid over the data area of the scope axes."""
+    global fast_screen, fast_screen_photo, fast_screen_label, fast_screen_place
+    bbox = ax[2].bbox
+    width, height = int(round(bbox.width)), int(round(bbox.height))
+    if width < 2 or height < 2: return
+    with profiler.stage('raster'):
+        if fast_screen is None:
+            from raster_screen import RasterScreen # Needs matplotlib's colors, loaded by now
+            fast_screen = RasterScreen(width, height, theme=scope_view.theme)
+        elif fast_screen.theme is not scope_view.theme: fast_screen.set_theme(scope_view.theme)
+        fast_screen.resize(width, height)
+        fast_screen.render(frame, scope_view.display_mode)
+        if fast_screen_photo is None:
+            fast_screen_photo = tk.PhotoImage(master=root)
+            fast_screen_label = tk.Label(canvas.get_tk_widget(), image=fast_screen_photo, borderwidth=0, highlightthickness=0)
+        fast_screen_photo.configure(data=fast_screen.ppm(), format='ppm')
+    # matplotlib measures from the bottom left corner of the figure, Tk from the top left
+    place = (int(round(bbox.x0)), int(round(fig.bbox.height - bbox.y1)), width, height)
+    if place != fast_screen_place:
+        fast_screen_label.place(x=place[0], y=place[1], width=width, height=height)
+        fast_screen_place = place
+
+def measure_frame(frame, data_key, sample_index=None):
+    """Measures the frame (skipped when its data is unchanged); returns the results and a copy of each channel's frequency statistics."""
+    with engine_lock:
+        results = measurement_engine.update(frame, key=data_key, sample_index=sample_index)
+        return results, {channel: copy(measurement_engine.statistic(channel, 'frequency')) for channel in results}
+
+def update_measurements(frame, data_key, sample_index=None):
+    """Measures the frame and refreshes the readout."""
+    if not measurements_var: return
+    show_measurements(*measure_frame(frame, data_key, sample_index))
+
+def show_measurements(results, frequency_stats):
+    """Formats measurement results and running frequency statistics into the readout."""
+    if not measurements_var: return
+    lines = []
+    for channel, result in results.items():
+        name = f"CH{channel}" if channel != 'sweep' else "SWP"
+        lines.append(f"{name}  Vpp {format_value(result['vpp'], 'V')}  RMS {format_value(result['rms'], 'V')}  "
+                     f"Mean {format_value(result['mean'], 'V')}")
+        phase = f"{result['phase']:+.1f}°" if np.isfinite(result['phase']) else '---'
+        duty = f"{result['duty'] * 100:.1f}%" if np.isfinite(result['duty']) else '---'
+        lines.append(f"     f {format_value(result['frequency'], 'Hz')}  Duty {duty}  "
+                     f"Rise {format_value(result['rise_time'], 's', 3)}  Fall {format_value(result['fall_time'], 's', 3)}  φ {phase}")
+        freq_stats = frequency_stats[channel]
+        if freq_stats.count:
+            lines.append(f"     f μ {format_value(freq_stats.mean, 'Hz')}  σ {format_value(freq_stats.std, 'Hz', 3)}  "
+                         f"min {format_value(freq_stats.min, 'Hz')}  max {format_value(freq_stats.max, 'Hz')}  n={freq_stats.count}")
+    measurements_var.set("\n".join(lines))
+
+def reset_measurement_stats():
+    with engine_lock: measurement_engine.reset()
+    request_render(measurement_reset=True)
+
+def read_spectrum_settings():
+    return {'window_name': spectrum_window_var.get(), 'scale': spectrum_scale_var.get(), 'averaging': spectrum_avg_var.get()}
+
+def on_spectrum_change(event=None):
+    if scope_view: scope_view.set_spectrum(**read_spectrum_settings())
+    request_render(spectrum=(spectrum_window_var.get(), spectrum_scale_var.get(), spectrum_avg_var.get()))
+
+def reset_spectrum_average():
+    if scope_view: scope_view.reset_spectrum()
+    request_render(spectrum_reset=True)
+
+def on_hud_toggle():
+    if scope_view: scope_view.set_hud(hud_var.get())
+    request_render(hud=hud_var.get())
+
+def save_perf_stats():
+    path = filedialog.asksaveasfilename(title="Save Performance Stats", defaultextension='.json', filetypes=[("JSON", "*.json")])
+    if not path: return
+    try: profiler.dump(path); print(f"Performance stats written to {path}")
+    except OSError as e: print(f"Error saving performance stats: {e}")
+
+# --- Session Recording ---
+def record_session_event(kind):
+    """Adds the changed controls to the session being recorded; slider keys (widget paths) are recorded as 'slider'."""
+    if not session_recorder: return
+    try: session_recorder.record(read_controls(), kind=session_event_kind or kind)
+    except Exception as e: print(f"Error recording session event: {e}"); traceback.print_exc()
+
+def toggle_session_recording():
+    """Starts a recording, or stops it and asks where to save it."""
+    global session_recorder
+    if session_recorder is None:
+        try: session_recorder = SessionRecorder(read_controls())
+        except Exception as e: print(f"Error starting session recording: {e}"); traceback.print_exc(); return
+        session_button_var.set("Stop & Save…")
+        return
+    recorder, session_recorder = session_recorder, None
+    session_button_var.set("Record Session")
+    path = filedialog.asksaveasfilename(title="Save Session", defaultextension='.json.gz',
+                                        filetypes=[("Compressed session", "*.json.gz"), ("Session", "*.json")])
+    if not path: return
+    try: recorder.save(path); print(f"Session with {len(recorder.events)} events ({recorder.duration:.1f}s) written to {path}")
+    except OSError as e: print(f"Error saving session: {e}")
+
+def live_tick():
+    """Advances simulated time by the elapsed wall time and requests a render."""
+    global live_timer_id, live_last_tick
+    live_timer_id = None
+    if live_acquisition is None or not live_acquisition.running: update_acquisition_status(); return
+    try:
+        now = time.perf_counter()
+        live_acquisition.advance(now - live_last_tick); live_last_tick = now
+    except Exception as e: print(f"Error during acquisition: {e}"); traceback.print_exc(); return
+    request_render(live=live_acquisition.sample_index)
+    update_acquisition_status()
+    live_timer_id = root.after(LIVE_TICK_MS, live_tick)
 
 # --- Button Redraw Functions (Corrected) ---
 def perform_redraw_buttons():
@@ -393,8 +750,8 @@ def schedule_redraw_buttons(event):
 
 def apply_theme(theme_name):
     """Applies the selected visual theme AND FONT SIZE to the GUI and plots."""
-    global root, style, fig, ax, canvas, is_plot_initialized, bg_color, text_color, grid_major_color, grid_minor_color, spine_color, trace_color_input, trace_color_sweep, trace_color_yt_fwd, trace_color_yt_ret, ax_bg_color, tk_bg_color, tk_fg_color, fig_bg_color, button_bg_color, button_active_bg_color
-    global font_size_var, global_entry_widgets # Keep Entry workaround list
+    global root, style, fig, ax, canvas, scope_view, is_plot_initialized, bg_color, text_color, grid_major_color, grid_minor_color, spine_color, trace_color_input, trace_color_sweep, trace_color_yt_fwd, trace_color_yt_ret, ax_bg_color, tk_bg_color, tk_fg_color, fig_bg_color, button_bg_color, button_active_bg_color
+    global font_size_var, global_entry_widgets, applied_style # Keep Entry workaround list
 
     print(f"Applying theme: {theme_name}"); theme_settings = THEMES.get(theme_name, THEMES[DEFAULT_THEME])
     tk_bg_color=theme_settings['tk_bg']; tk_fg_color=theme_settings['tk_fg']; fig_bg_color=theme_settings['fig_bg']; ax_bg_color=theme_settings['ax_bg']; text_color=theme_settings['text']; grid_major_color=theme_settings['grid_major']; grid_minor_color=theme_settings['grid_minor']; spine_color=theme_settings['spine']; trace_color_input=theme_settings['trace_input']; trace_color_sweep=theme_settings['trace_sweep']; trace_color_yt_fwd=theme_settings['trace_yt_fwd']; trace_color_yt_ret=theme_settings['trace_yt_ret']; button_bg_color=theme_settings['button_bg']; button_active_bg_color=theme_settings['button_active_bg']
@@ -405,9 +762,14 @@ def apply_theme(theme_name):
             try: base_font_size = int(font_size_var.get())
             except (ValueError, tk.TclError): font_size_var.set(str(DEFAULT_BASE_FONT_SIZE)); base_font_size = DEFAULT_BASE_FONT_SIZE
 
+        # Only what differs from the applied style is redone: theme_use() restyles every widget, and
+        # Entry fonts only need touching when the size changed
+        previous_ttk_theme, previous_font_size = applied_style or (None, None)
+        font_changed = base_font_size != previous_font_size
         selected_ttk_theme=theme_settings.get('ttk_theme','default'); available_themes=style.theme_names()
-        if selected_ttk_theme in available_themes: style.theme_use(selected_ttk_theme)
-        else: style.theme_use('default'); print(f"Warning: ttk theme '{selected_ttk_theme}' not found.")
+        if selected_ttk_theme not in available_themes: print(f"Warning: ttk theme '{selected_ttk_theme}' not found."); selected_ttk_theme = 'default'
+        if selected_ttk_theme != previous_ttk_theme: style.theme_use(selected_ttk_theme)
+        applied_style = (selected_ttk_theme, base_font_size)
 
         default_font_family = "Arial"
         try: default_font = tkFont.nametofont("TkDefaultFont"); default_font_family = default_font.actual("family")
@@ -433,38 +795,35 @@ def apply_theme(theme_name):
         style.configure("QuickSetLabel.TLabel", foreground=tk_fg_color, background=tk_bg_color, font=(default_font_family, quick_set_label_size))
 
         # --- Explicitly update Entry widget fonts (Workaround) ---
-        for entry_widget in global_entry_widgets:
-             try: entry_widget.configure(font=entry_font_tuple)
-             except tk.TclError as e: print(f"Warning: Could not configure font for an entry widget: {e}")
+        if font_changed:
+            for entry_widget in global_entry_widgets:
+                 try: entry_widget.configure(font=entry_font_tuple)
+                 except tk.TclError as e: print(f"Warning: Could not configure font for an entry widget: {e}")
 
         # --- Explicit Combobox font workaround REMOVED ---
 
         # --- Update Plot ---
-        if fig: fig.patch.set_facecolor(fig_bg_color);
-        current_title = "Oscilloscope Simulation"
+        current_title = FIGURE_TITLE
         if fig and fig.texts: current_title = fig.texts[0].get_text()
-        fig.suptitle(current_title, fontsize=title_size+2, color=text_color)
-        is_plot_initialized = False; update_plot();
-        if button_wrapper_frame: schedule_redraw_buttons(event=None)
+        if fig:
+            from scope_view import style_figure # Already loaded once the figure exists
+            style_figure(fig, theme_settings, base_font_size, current_title)
+        if scope_view: scope_view.set_theme(theme_settings, base_font_size) # Recolors the existing artists in place
+        if render_scheduler: render_scheduler.cancel() # Rendering synchronously below
+        update_plot()
+        if button_wrapper_frame and font_changed: schedule_redraw_buttons(event=None)
     except Exception as e: print(f"Error applying theme '{theme_name}': {e}"); traceback.print_exc()
 
 def on_theme_change(event=None):
     selected_theme = theme_var.get();
     if selected_theme: apply_theme(selected_theme)
+    record_session_event('theme')
 
 def on_font_size_change(*args):
     global theme_var
     current_theme = theme_var.get() if theme_var else DEFAULT_THEME
     apply_theme(current_theme)
-
-# --- GUI Setup ---
-root = tk.Tk(); root.title("Oscilloscope Simulation"); style = ttk.Style()
-
-style.configure("TRadiobutton"); style.configure("QuickSet.TButton", padding=(4,2))
-
-main_pane = tk.PanedWindow(root, orient=tk.HORIZONTAL, sashwidth=8, relief=tk.RAISED, bg='grey'); main_pane.pack(fill=tk.BOTH, expand=True)
-control_frame = ttk.Frame(root, padding="15 10", style='TFrame'); plot_frame = ttk.Frame(root, style='TFrame')
-main_pane.add(control_frame, minsize=400, sticky="nsew"); main_pane.add(plot_frame, minsize=450, sticky="nsew")
+    record_session_event('font_size')
 
 # --- Control Creation Helper ---
 def create_control(parent, label_text_provider, var, slider_range_provider, default_val, format_spec_provider):
@@ -478,77 +837,253 @@ def create_control(parent, label_text_provider, var, slider_range_provider, defa
     min_val,max_val=slider_range_provider();slider=ttk.Scale(widget_frame,from_=min_val,to=max_val,orient=tk.HORIZONTAL,length=280);slider.set(default_val);slider.pack(side=tk.LEFT,fill=tk.X,expand=True,padx=(5,5))
     entry=ttk.Entry(widget_frame,textvariable=var,width=8, style='TEntry');entry.pack(side=tk.RIGHT,padx=(0,5)) # Font set by style & workaround
     global_entry_widgets.append(entry) # Add for workaround
-    slider.config(command=lambda val: update_plot())
+    slider.config(command=lambda val: request_render(**{str(slider): float(val)}))
     handler=create_entry_handler(var,slider,slider_range_provider,format_spec_provider);
     entry.bind('<Return>',handler)
     return slider
 
-# --- Populate control_frame ---
-title_label = ttk.Label(control_frame, text="Oscilloscope Controls", style='Title.TLabel'); title_label.pack(pady=(0, 5), anchor='w')
-config_frame = ttk.Frame(control_frame); config_frame.pack(fill=tk.X, pady=(5,10))
-theme_frame = ttk.Frame(config_frame); theme_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10));
-ttk.Label(theme_frame, text="Theme:").pack(side=tk.LEFT, padx=(0, 5)); # Font from style
-theme_var = tk.StringVar(value=DEFAULT_THEME);
-theme_combo = ttk.Combobox(theme_frame, textvariable=theme_var, values=list(THEMES.keys()), state="readonly", width=12); # Font from style
-theme_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5); theme_combo.bind('<<ComboboxSelected>>', on_theme_change)
-font_size_frame = ttk.Frame(config_frame); font_size_frame.pack(side=tk.LEFT, padx=(10,0))
-ttk.Label(font_size_frame, text="Font Size:").pack(side=tk.LEFT, padx=(0,5)); # Font from style
-font_size_var = tk.StringVar(value=str(DEFAULT_BASE_FONT_SIZE))
-font_size_values = [str(size) for size in FONT_SIZES]
-font_size_combo = ttk.Combobox(font_size_frame, textvariable=font_size_var, values=font_size_values, state="readonly", width=4) # Font from style
-font_size_combo.pack(side=tk.LEFT)
-font_size_combo.bind('<<ComboboxSelected>>', on_font_size_change)
-ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X, pady=15)
-
-# --- Input Signal Section ---
-input_title_var = tk.StringVar(value=f"Input Signal: A {DEFAULT_INPUT_FUNC}(ωt + φ)")
-ttk.Label(control_frame, textvariable=input_title_var, style='Title.TLabel').pack(pady=(0, 5), anchor='w')
-input_func_frame = ttk.Frame(control_frame); input_func_frame.pack(fill=tk.X, padx=5, pady=(0,5))
-input_func_var = tk.StringVar(value=DEFAULT_INPUT_FUNC)
-sin_radio = ttk.Radiobutton(input_func_frame, text="sin", variable=input_func_var, value='sin', command=update_input_title, style='TRadiobutton'); cos_radio = ttk.Radiobutton(input_func_frame, text="cos", variable=input_func_var, value='cos', command=update_input_title, style='TRadiobutton'); sin_radio.pack(side=tk.LEFT, padx=5); cos_radio.pack(side=tk.LEFT, padx=5) # Font from style
-amp_var=tk.StringVar(value=f"{DEFAULT_AMP:.2f}"); amp_slider=create_control(control_frame,lambda:"Amplitude (A):",amp_var,get_amp_range,DEFAULT_AMP,lambda:"{:.2f}")
-omega_var=tk.StringVar(value=f"{DEFAULT_X_FACTOR:.2f}"); omega_slider=create_control(control_frame, lambda: "Ang. Freq Factor (x) [ω = x*π]:", omega_var, get_xfactor_range, DEFAULT_X_FACTOR, lambda: "{:.2f}")
-phi_unit_var=tk.StringVar(value=DEFAULT_PHI_UNIT); phi_var=tk.StringVar(value=f"{DEFAULT_PHI:.1f}"); phi_label_var=tk.StringVar(value="Phase (φ degrees):")
-phi_slider=create_control(control_frame,lambda:phi_label_var,phi_var,get_phi_range,DEFAULT_PHI,get_phi_format)
-unit_frame=ttk.Frame(control_frame); unit_frame.pack(fill=tk.X,padx=5,pady=(3,3));
-deg_radio = ttk.Radiobutton(unit_frame,text="Degrees",variable=phi_unit_var,value='deg',command=update_phase_unit,style='TRadiobutton'); rad_radio = ttk.Radiobutton(unit_frame,text="Radians",variable=phi_unit_var,value='rad',command=update_phase_unit,style='TRadiobutton'); # Font from style
-deg_radio.pack(side=tk.LEFT,padx=5); rad_radio.pack(side=tk.LEFT,padx=5)
-quick_phase_frame=ttk.Frame(control_frame); quick_phase_frame.pack(fill=tk.X,padx=5,pady=(3,10));
-ttk.Label(quick_phase_frame,text="Quick Set φ:", style="QuickSetLabel.TLabel").pack(side=tk.LEFT,padx=(0,5),anchor='w'); # Font from style
-button_wrapper_frame = ttk.Frame(quick_phase_frame); button_wrapper_frame.pack(side=tk.LEFT, fill=tk.X, expand=True);
-button_wrapper_frame.bind('<Configure>', schedule_redraw_buttons)
-quick_angles_deg = [-90, -60, -45, -30, 0, 30, 45, 60, 90]; angle_labels = {-90:"-90°/-π/2",-60:"-60°/-π/3",-45:"-45°/-π/4",-30:"-30°/-π/6",0:"0°",30:"30°/π/6",45:"45°/π/4",60:"60°/π/3",90:"90°/π/2"}
-quick_set_buttons = [];
-for i, angle_deg in enumerate(quick_angles_deg):
-    btn_text = angle_labels.get(angle_deg, f"{angle_deg}°")
-    button = ttk.Button(button_wrapper_frame, text=btn_text, style="QuickSet.TButton", command=lambda deg=angle_deg: set_phase_value(deg)) # Font from style
-    button.grid(row=0, column=i, sticky='w', padx=2, pady=1)
-    quick_set_buttons.append(button)
-ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
-
-# --- Sweep Parameters Section ---
-ttk.Label(control_frame,text="Sweep Parameters", style='Title.TLabel').pack(pady=(0,15),anchor='w')
-tqt_factor_var=tk.StringVar(value=f"{DEFAULT_TQT_FACTOR:.2f}"); tqt_factor_slider=create_control(control_frame,lambda:"Fwd Sweep Factor (x Ty):",tqt_factor_var,get_t_factor_range,DEFAULT_TQT_FACTOR,lambda:"{:.2f}")
-tqn_factor_var=tk.StringVar(value=f"{DEFAULT_TQN_FACTOR:.2f}"); tqn_factor_slider=create_control(control_frame,lambda:"Ret Sweep Factor (x Ty):",tqn_factor_var,get_t_factor_range,DEFAULT_TQN_FACTOR,lambda:"{:.2f}")
-
-# --- Populate plot_frame ---
-fig, ax = plt.subplots(3, 1, figsize=(10, 9)); fig.suptitle('Oscilloscope Simulation', fontsize=16) # Adjusted figsize
-canvas = FigureCanvasTkAgg(fig, master=plot_frame); canvas_widget = canvas.get_tk_widget(); canvas_widget.pack(fill=tk.BOTH, expand=True)
+# --- Control Panel ---
+def build_controls(control_frame):
+    """Creates every control widget and its Tk variable (no matplotlib needed)."""
+    global theme_var, theme_combo, font_size_var, font_size_combo, record_length_var, hud_var
+    global input_title_var, input_func_var, capture_offset_var, capture_offset_slider, expression_var
+    global amp_var, amp_slider, omega_var, omega_slider, phi_unit_var, phi_var, phi_label_var, phi_slider
+    global button_wrapper_frame, quick_set_buttons
+    global channel_select_var, channel_enabled_var, channel_func_var
+    global ch_amp_var, ch_amp_slider, ch_omega_var, ch_omega_slider, ch_phi_var, ch_phi_slider
+    global tqt_factor_var, tqt_factor_slider, tqn_factor_var, tqn_factor_slider
+    global trigger_mode_var, trigger_status_var, trigger_slope_var
+    global trig_level_var, trig_level_slider, trig_hyst_var, trig_hyst_slider, holdoff_factor_var, holdoff_factor_slider
+    global acq_mode_var, acq_status_var, scope_display_var, fast_screen_var, background_var, session_button_var
+    global averaging_mode_var, averaging_count_var, averaging_status_var
+    global spectrum_window_var, spectrum_scale_var, spectrum_avg_var, measurements_var
+    title_label = ttk.Label(control_frame, text="Oscilloscope Controls", style='Title.TLabel'); title_label.pack(pady=(0, 5), anchor='w')
+    config_frame = ttk.Frame(control_frame); config_frame.pack(fill=tk.X, pady=(5,10))
+    theme_frame = ttk.Frame(config_frame); theme_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10));
+    ttk.Label(theme_frame, text="Theme:").pack(side=tk.LEFT, padx=(0, 5)); # Font from style
+    theme_var = tk.StringVar(value=DEFAULT_THEME);
+    theme_combo = ttk.Combobox(theme_frame, textvariable=theme_var, values=list(THEMES.keys()), state="readonly", width=12); # Font from style
+    theme_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5); theme_combo.bind('<<ComboboxSelected>>', on_theme_change)
+    font_size_frame = ttk.Frame(config_frame); font_size_frame.pack(side=tk.LEFT, padx=(10,0))
+    ttk.Label(font_size_frame, text="Font Size:").pack(side=tk.LEFT, padx=(0,5)); # Font from style
+    font_size_var = tk.StringVar(value=str(DEFAULT_BASE_FONT_SIZE))
+    font_size_values = [str(size) for size in FONT_SIZES]
+    font_size_combo = ttk.Combobox(font_size_frame, textvariable=font_size_var, values=font_size_values, state="readonly", width=4) # Font from style
+    font_size_combo.pack(side=tk.LEFT)
+    font_size_combo.bind('<<ComboboxSelected>>', on_font_size_change)
+    record_frame = ttk.Frame(control_frame); record_frame.pack(fill=tk.X, pady=(0,5))
+    ttk.Label(record_frame, text="Record Length:").pack(side=tk.LEFT, padx=(0, 5)); # Font from style
+    record_length_var = tk.StringVar(value=format_record_length(DEFAULT_RECORD_LENGTH))
+    record_length_combo = ttk.Combobox(record_frame, textvariable=record_length_var, values=[format_record_length(n) for n in RECORD_LENGTHS], state="readonly", width=12)
+    record_length_combo.pack(side=tk.LEFT)
+    record_length_combo.bind('<<ComboboxSelected>>', lambda event: request_render(points=get_record_length()))
+    perf_frame = ttk.Frame(control_frame); perf_frame.pack(fill=tk.X, pady=(0,5))
+    hud_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(perf_frame, text="Perf HUD", variable=hud_var, command=on_hud_toggle).pack(side=tk.LEFT, padx=(0,5))
+    ttk.Button(perf_frame, text="Dump Stats", style="QuickSet.TButton", command=lambda: profiler.dump()).pack(side=tk.LEFT, padx=2)
+    ttk.Button(perf_frame, text="Save Stats…", style="QuickSet.TButton", command=save_perf_stats).pack(side=tk.LEFT, padx=2)
+    background_var = tk.BooleanVar(value=DEFAULT_BACKGROUND_COMPUTE)
+    ttk.Checkbutton(perf_frame, text="Background Compute", variable=background_var, command=lambda: request_render(background=background_var.get())).pack(side=tk.LEFT, padx=(10,0))
+    session_button_var = tk.StringVar(value="Record Session")
+    ttk.Button(perf_frame, textvariable=session_button_var, style="QuickSet.TButton", command=toggle_session_recording).pack(side=tk.LEFT, padx=(10,2))
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X, pady=15)
+
+    # --- Input Signal Section ---
+    input_title_var = tk.StringVar(value=f"Input Signal: A {DEFAULT_INPUT_FUNC}(ωt + φ)")
+    ttk.Label(control_frame, textvariable=input_title_var, style='Title.TLabel').pack(pady=(0, 5), anchor='w')
+    input_func_frame = ttk.Frame(control_frame); input_func_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    input_func_var = tk.StringVar(value=DEFAULT_INPUT_FUNC)
+    sin_radio = ttk.Radiobutton(input_func_frame, text="sin", variable=input_func_var, value='sin', command=update_input_title, style='TRadiobutton'); cos_radio = ttk.Radiobutton(input_func_frame, text="cos", variable=input_func_var, value='cos', command=update_input_title, style='TRadiobutton'); sin_radio.pack(side=tk.LEFT, padx=5); cos_radio.pack(side=tk.LEFT, padx=5) # Font from style
+    capture_radio = ttk.Radiobutton(input_func_frame, text="capture", variable=input_func_var, value='capture', command=update_input_title, style='TRadiobutton'); capture_radio.pack(side=tk.LEFT, padx=5)
+    ttk.Button(input_func_frame, text="Open Capture…", style="QuickSet.TButton", command=open_capture_dialog).pack(side=tk.LEFT, padx=5)
+    expression_frame = ttk.Frame(control_frame); expression_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Radiobutton(expression_frame, text="expr", variable=input_func_var, value='expr', command=update_input_title, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    expression_var = tk.StringVar(value=DEFAULT_EXPRESSION)
+    expression_entry = ttk.Entry(expression_frame, textvariable=expression_var, style='TEntry'); expression_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+    global_entry_widgets.append(expression_entry) # Add for workaround
+    expression_entry.bind('<Return>', apply_expression)
+    capture_offset_var=tk.StringVar(value="0"); capture_offset_slider=create_control(control_frame,lambda:"Capture Offset (s):",capture_offset_var,get_capture_offset_range,0.0,lambda:"{:.4g}")
+    amp_var=tk.StringVar(value=f"{DEFAULT_AMP:.2f}"); amp_slider=create_control(control_frame,lambda:"Amplitude (A):",amp_var,get_amp_range,DEFAULT_AMP,lambda:"{:.2f}")
+    omega_var=tk.StringVar(value=f"{DEFAULT_X_FACTOR:.2f}"); omega_slider=create_control(control_frame, lambda: "Ang. Freq Factor (x) [ω = x*π]:", omega_var, get_xfactor_range, DEFAULT_X_FACTOR, lambda: "{:.2f}")
+    phi_unit_var=tk.StringVar(value=DEFAULT_PHI_UNIT); phi_var=tk.StringVar(value=f"{DEFAULT_PHI:.1f}"); phi_label_var=tk.StringVar(value="Phase (φ degrees):")
+    phi_slider=create_control(control_frame,lambda:phi_label_var,phi_var,get_phi_range,DEFAULT_PHI,get_phi_format)
+    unit_frame=ttk.Frame(control_frame); unit_frame.pack(fill=tk.X,padx=5,pady=(3,3));
+    deg_radio = ttk.Radiobutton(unit_frame,text="Degrees",variable=phi_unit_var,value='deg',command=update_phase_unit,style='TRadiobutton'); rad_radio = ttk.Radiobutton(unit_frame,text="Radians",variable=phi_unit_var,value='rad',command=update_phase_unit,style='TRadiobutton'); # Font from style
+    deg_radio.pack(side=tk.LEFT,padx=5); rad_radio.pack(side=tk.LEFT,padx=5)
+    quick_phase_frame=ttk.Frame(control_frame); quick_phase_frame.pack(fill=tk.X,padx=5,pady=(3,10));
+    ttk.Label(quick_phase_frame,text="Quick Set φ:", style="QuickSetLabel.TLabel").pack(side=tk.LEFT,padx=(0,5),anchor='w'); # Font from style
+    button_wrapper_frame = ttk.Frame(quick_phase_frame); button_wrapper_frame.pack(side=tk.LEFT, fill=tk.X, expand=True);
+    button_wrapper_frame.bind('<Configure>', schedule_redraw_buttons)
+    quick_angles_deg = [-90, -60, -45, -30, 0, 30, 45, 60, 90]; angle_labels = {-90:"-90°/-π/2",-60:"-60°/-π/3",-45:"-45°/-π/4",-30:"-30°/-π/6",0:"0°",30:"30°/π/6",45:"45°/π/4",60:"60°/π/3",90:"90°/π/2"}
+    quick_set_buttons = [];
+    for i, angle_deg in enumerate(quick_angles_deg):
+        btn_text = angle_labels.get(angle_deg, f"{angle_deg}°")
+        button = ttk.Button(button_wrapper_frame, text=btn_text, style="QuickSet.TButton", command=lambda deg=angle_deg: set_phase_value(deg)) # Font from style
+        button.grid(row=0, column=i, sticky='w', padx=2, pady=1)
+        quick_set_buttons.append(button)
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
+
+    # --- Channels Section ---
+    ttk.Label(control_frame,text="Channels", style='Title.TLabel').pack(pady=(0,5),anchor='w')
+    channel_frame = ttk.Frame(control_frame); channel_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Label(channel_frame, text="Edit:").pack(side=tk.LEFT, padx=(0,5))
+    channel_select_var = tk.StringVar(value=f"CH{edited_channel}")
+    channel_combo = ttk.Combobox(channel_frame, textvariable=channel_select_var, values=[f"CH{i}" for i in range(2, NUM_CHANNELS + 1)], state="readonly", width=5)
+    channel_combo.pack(side=tk.LEFT); channel_combo.bind('<<ComboboxSelected>>', on_channel_select)
+    default_channel = DEFAULT_CHANNELS[edited_channel]
+    channel_enabled_var = tk.BooleanVar(value=default_channel.enabled); channel_func_var = tk.StringVar(value=default_channel.func)
+    ttk.Checkbutton(channel_frame, text="On", variable=channel_enabled_var, command=lambda: request_render(channel_enabled=channel_enabled_var.get())).pack(side=tk.LEFT, padx=(10,5))
+    ttk.Radiobutton(channel_frame, text="sin", variable=channel_func_var, value='sin', command=lambda: request_render(channel_func='sin'), style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    ttk.Radiobutton(channel_frame, text="cos", variable=channel_func_var, value='cos', command=lambda: request_render(channel_func='cos'), style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    ch_amp_var=tk.StringVar(value=f"{default_channel.A:.2f}"); ch_amp_slider=create_control(control_frame,lambda:"Channel Amplitude (A):",ch_amp_var,get_amp_range,default_channel.A,lambda:"{:.2f}")
+    ch_omega_var=tk.StringVar(value=f"{default_channel.x_factor:.2f}"); ch_omega_slider=create_control(control_frame,lambda:"Channel Freq Factor (x):",ch_omega_var,get_xfactor_range,default_channel.x_factor,lambda:"{:.2f}")
+    ch_phi_var=tk.StringVar(value=f"{default_channel.phi:.1f}"); ch_phi_slider=create_control(control_frame,lambda:"Channel Phase (φ degrees):",ch_phi_var,lambda:PHI_RANGE,default_channel.phi,lambda:"{:.1f}")
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
+
+    # --- Sweep Parameters Section ---
+    ttk.Label(control_frame,text="Sweep Parameters", style='Title.TLabel').pack(pady=(0,15),anchor='w')
+    tqt_factor_var=tk.StringVar(value=f"{DEFAULT_TQT_FACTOR:.2f}"); tqt_factor_slider=create_control(control_frame,lambda:"Fwd Sweep Factor (x Ty):",tqt_factor_var,get_t_factor_range,DEFAULT_TQT_FACTOR,lambda:"{:.2f}")
+    tqn_factor_var=tk.StringVar(value=f"{DEFAULT_TQN_FACTOR:.2f}"); tqn_factor_slider=create_control(control_frame,lambda:"Ret Sweep Factor (x Ty):",tqn_factor_var,get_t_factor_range,DEFAULT_TQN_FACTOR,lambda:"{:.2f}")
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
+
+    # --- Trigger Section ---
+    ttk.Label(control_frame,text="Trigger", style='Title.TLabel').pack(pady=(0,5),anchor='w')
+    trigger_frame = ttk.Frame(control_frame); trigger_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Label(trigger_frame, text="Mode:").pack(side=tk.LEFT, padx=(0,5))
+    trigger_mode_var = tk.StringVar(value=DEFAULT_TRIGGER_MODE); trigger_status_var = tk.StringVar(value="Free running")
+    trigger_mode_combo = ttk.Combobox(trigger_frame, textvariable=trigger_mode_var, values=list(TRIGGER_MODES), state="readonly", width=8)
+    trigger_mode_combo.pack(side=tk.LEFT); trigger_mode_combo.bind('<<ComboboxSelected>>', lambda event: request_render(trigger_mode=trigger_mode_var.get()))
+    trigger_slope_var = tk.StringVar(value=DEFAULT_TRIGGER_SLOPE)
+    ttk.Radiobutton(trigger_frame, text="Rising", variable=trigger_slope_var, value='rising', command=lambda: request_render(trigger_slope='rising'), style='TRadiobutton').pack(side=tk.LEFT, padx=(10,5))
+    ttk.Radiobutton(trigger_frame, text="Falling", variable=trigger_slope_var, value='falling', command=lambda: request_render(trigger_slope='falling'), style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    trigger_arm_frame = ttk.Frame(control_frame); trigger_arm_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Button(trigger_arm_frame, text="Arm", style="QuickSet.TButton", command=arm_trigger).pack(side=tk.LEFT, padx=2)
+    ttk.Label(trigger_arm_frame, textvariable=trigger_status_var).pack(side=tk.LEFT, padx=(10,0))
+    trig_level_var=tk.StringVar(value=f"{DEFAULT_TRIGGER_LEVEL:.2f}"); trig_level_slider=create_control(control_frame,lambda:"Trigger Level:",trig_level_var,get_trigger_level_range,DEFAULT_TRIGGER_LEVEL,lambda:"{:.2f}")
+    trig_hyst_var=tk.StringVar(value=f"{DEFAULT_TRIGGER_HYSTERESIS:.2f}"); trig_hyst_slider=create_control(control_frame,lambda:"Trigger Hysteresis:",trig_hyst_var,get_trigger_hysteresis_range,DEFAULT_TRIGGER_HYSTERESIS,lambda:"{:.2f}")
+    holdoff_factor_var=tk.StringVar(value=f"{DEFAULT_HOLDOFF_FACTOR:.2f}"); holdoff_factor_slider=create_control(control_frame,lambda:"Holdoff (x Ty):",holdoff_factor_var,get_holdoff_factor_range,DEFAULT_HOLDOFF_FACTOR,lambda:"{:.2f}")
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
+
+    # --- Acquisition Section ---
+    ttk.Label(control_frame,text="Acquisition", style='Title.TLabel').pack(pady=(0,5),anchor='w')
+    acq_mode_var = tk.StringVar(value=DEFAULT_ACQ_MODE); acq_status_var = tk.StringVar(value="Static window")
+    acq_mode_frame = ttk.Frame(control_frame); acq_mode_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Radiobutton(acq_mode_frame, text="Static", variable=acq_mode_var, value='static', command=on_acq_mode_change, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    ttk.Radiobutton(acq_mode_frame, text="Live", variable=acq_mode_var, value='live', command=on_acq_mode_change, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    acq_button_frame = ttk.Frame(control_frame); acq_button_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Button(acq_button_frame, text="Run", style="QuickSet.TButton", command=start_acquisition).pack(side=tk.LEFT, padx=2)
+    ttk.Button(acq_button_frame, text="Stop", style="QuickSet.TButton", command=stop_acquisition).pack(side=tk.LEFT, padx=2)
+    ttk.Button(acq_button_frame, text="Single", style="QuickSet.TButton", command=lambda: start_acquisition(single=True)).pack(side=tk.LEFT, padx=2)
+    ttk.Label(acq_button_frame, textvariable=acq_status_var).pack(side=tk.LEFT, padx=(10,0))
+    averaging_frame = ttk.Frame(control_frame); averaging_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Label(averaging_frame, text="Averaging:").pack(side=tk.LEFT, padx=(0,5))
+    averaging_mode_var = tk.StringVar(value=DEFAULT_ACQUISITION_MODE); averaging_count_var = tk.StringVar(value=str(DEFAULT_AVERAGE_COUNT))
+    averaging_mode_combo = ttk.Combobox(averaging_frame, textvariable=averaging_mode_var, values=list(ACQUISITION_MODES), state="readonly", width=11)
+    averaging_mode_combo.pack(side=tk.LEFT); averaging_mode_combo.bind('<<ComboboxSelected>>', on_averaging_change)
+    ttk.Label(averaging_frame, text="N:").pack(side=tk.LEFT, padx=(10,5))
+    averaging_count_combo = ttk.Combobox(averaging_frame, textvariable=averaging_count_var, values=[str(n) for n in AVERAGE_COUNTS], state="readonly", width=4)
+    averaging_count_combo.pack(side=tk.LEFT); averaging_count_combo.bind('<<ComboboxSelected>>', on_averaging_change)
+    ttk.Button(averaging_frame, text="Reset", style="QuickSet.TButton", command=reset_averaging).pack(side=tk.LEFT, padx=(10,2))
+    averaging_status_var = tk.StringVar(value=sweep_averager.status)
+    ttk.Label(averaging_frame, textvariable=averaging_status_var).pack(side=tk.LEFT, padx=(10,0))
+    scope_display_var = tk.StringVar(value=DEFAULT_SCOPE_DISPLAY)
+    scope_display_frame = ttk.Frame(control_frame); scope_display_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Label(scope_display_frame, text="Scope Display:").pack(side=tk.LEFT, padx=(0,5))
+    ttk.Radiobutton(scope_display_frame, text="Lines", variable=scope_display_var, value='lines', command=on_scope_display_change, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    ttk.Radiobutton(scope_display_frame, text="Phosphor", variable=scope_display_var, value='phosphor', command=on_scope_display_change, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    ttk.Radiobutton(scope_display_frame, text="XY", variable=scope_display_var, value='xy', command=on_scope_display_change, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    fast_screen_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(scope_display_frame, text="Fast Screen", variable=fast_screen_var, command=on_fast_screen_toggle).pack(side=tk.LEFT, padx=(10,0))
+
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
+
+    # --- Spectrum Section ---
+    ttk.Label(control_frame,text="Spectrum", style='Title.TLabel').pack(pady=(0,5),anchor='w')
+    spectrum_frame = ttk.Frame(control_frame); spectrum_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Label(spectrum_frame, text="Window:").pack(side=tk.LEFT, padx=(0,5))
+    spectrum_window_var = tk.StringVar(value=DEFAULT_WINDOW)
+    spectrum_window_combo = ttk.Combobox(spectrum_frame, textvariable=spectrum_window_var, values=list(WINDOWS), state="readonly", width=14)
+    spectrum_window_combo.pack(side=tk.LEFT); spectrum_window_combo.bind('<<ComboboxSelected>>', on_spectrum_change)
+    spectrum_scale_var = tk.StringVar(value=DEFAULT_SPECTRUM_SCALE)
+    ttk.Radiobutton(spectrum_frame, text="dB", variable=spectrum_scale_var, value='db', command=on_spectrum_change, style='TRadiobutton').pack(side=tk.LEFT, padx=(10,5))
+    ttk.Radiobutton(spectrum_frame, text="Linear", variable=spectrum_scale_var, value='linear', command=on_spectrum_change, style='TRadiobutton').pack(side=tk.LEFT, padx=5)
+    spectrum_avg_frame = ttk.Frame(control_frame); spectrum_avg_frame.pack(fill=tk.X, padx=5, pady=(0,5))
+    ttk.Label(spectrum_avg_frame, text="Averaging:").pack(side=tk.LEFT, padx=(0,5))
+    spectrum_avg_var = tk.StringVar(value=DEFAULT_SPECTRUM_AVERAGING)
+    spectrum_avg_combo = ttk.Combobox(spectrum_avg_frame, textvariable=spectrum_avg_var, values=list(AVERAGING), state="readonly", width=6)
+    spectrum_avg_combo.pack(side=tk.LEFT); spectrum_avg_combo.bind('<<ComboboxSelected>>', on_spectrum_change)
+    ttk.Button(spectrum_avg_frame, text="Reset", style="QuickSet.TButton", command=reset_spectrum_average).pack(side=tk.LEFT, padx=(10,2))
+
+    ttk.Separator(control_frame,orient=tk.HORIZONTAL).pack(fill=tk.X,pady=15)
+
+    # --- Measurements Section ---
+    measurements_title_frame = ttk.Frame(control_frame); measurements_title_frame.pack(fill=tk.X, pady=(0,5))
+    ttk.Label(measurements_title_frame,text="Measurements", style='Title.TLabel').pack(side=tk.LEFT, anchor='w')
+    ttk.Button(measurements_title_frame, text="Reset Stats", style="QuickSet.TButton", command=reset_measurement_stats).pack(side=tk.LEFT, padx=(10,2))
+    measurements_var = tk.StringVar(value="")
+    ttk.Label(control_frame, textvariable=measurements_var, font="TkFixedFont", justify=tk.LEFT).pack(fill=tk.X, padx=5, anchor='w')
+
+
+# --- Plot Panel ---
+def build_plot(plot_frame):
+    """Imports matplotlib, creates the figure and canvas, and replaces the skeleton placeholder."""
+    global fig, ax, canvas, scope_view, plot_placeholder
+    from matplotlib.figure import Figure # Deferred: importing matplotlib dominates startup
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from scope_view import ScopeView
+    startup_times['matplotlib'] = time.perf_counter() - STARTUP_T0
+
+    fig = Figure(figsize=FIGSIZE); ax = fig.subplots(4, 1)
+    canvas = FigureCanvasTkAgg(fig, master=plot_frame)
+    if plot_placeholder is not None: plot_placeholder.destroy(); plot_placeholder = None
+    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    scope_view = ScopeView(fig, theme=THEMES.get(theme_var.get(), THEMES[DEFAULT_THEME]), profiler=profiler, lock=engine_lock)
+    scope_view.set_fast_screen(fast_screen_var is not None and fast_screen_var.get())
+    canvas.mpl_connect('resize_event', on_plot_resize)
 
 # --- Initial Setup ---
-def final_initialization():
-    global is_plot_initialized, quick_set_buttons
-    root.update_idletasks()
-    # Button width caching removed
-    apply_theme(DEFAULT_THEME)
+def final_initialization(plot_frame):
+    """Second startup phase, run once the skeleton window is on screen: figure, first render, timing report."""
+    try:
+        build_plot(plot_frame)
+        root.update_idletasks()
+        apply_theme(theme_var.get()) # Styles the figure and renders the first frame
+        root.update_idletasks() # Paints it
+        startup_times['first_frame'] = time.perf_counter() - STARTUP_T0
+        report_startup()
+    except Exception as e: print(f"Error during startup: {e}"); traceback.print_exc()
     root.after(50, perform_redraw_buttons) # Initial draw after widths are known
 
+def report_startup():
+    steps = "  ".join(f"{name} {seconds * 1e3:.0f} ms" for name, seconds in startup_times.items())
+    print(f"Startup: {steps}")
+
 
-# --- Main Loop ---
-root.after(50, final_initialization)
-root.mainloop()
+# --- Main Entry Point ---
+def main(argv=None):
+    """Builds the window, shows the controls with a plot skeleton, then creates the figure and runs Tk."""
+    global root, style, render_scheduler, plot_placeholder, compute_worker
+    startup_times['imports'] = time.perf_counter() - STARTUP_T0
+    root = tk.Tk(); root.title("Oscilloscope Simulation"); style = ttk.Style()
+    render_scheduler = RenderScheduler(root, lambda changes: update_plot(), max_fps=RENDER_MAX_FPS, profiler=profiler)
+    compute_worker = ComputeWorker(compute_pipeline)
 
+    style.configure("TRadiobutton"); style.configure("QuickSet.TButton", padding=(4,2))
 
+    main_pane = tk.PanedWindow(root, orient=tk.HORIZONTAL, sashwidth=8, relief=tk.RAISED, bg='grey'); main_pane.pack(fill=tk.BOTH, expand=True)
+    control_frame = ttk.Frame(root, padding="15 10", style='TFrame'); plot_frame = ttk.Frame(root, style='TFrame')
+    main_pane.add(control_frame, minsize=400, sticky="nsew"); main_pane.add(plot_frame, minsize=450, sticky="nsew")
+    build_controls(control_frame)
+    plot_placeholder = ttk.Label(plot_frame, text=f"{FIGURE_TITLE}\n\nPreparing plots…", style='Title.TLabel', anchor='center', justify=tk.CENTER)
+    plot_placeholder.pack(fill=tk.BOTH, expand=True)
+    apply_theme(DEFAULT_THEME) # Controls only; the figure does not exist yet
 
+    root.update() # Skeleton window on screen before matplotlib is imported
+    startup_times['window'] = time.perf_counter() - STARTUP_T0
+    root.after_idle(lambda: final_initialization(plot_frame))
+    root.mainloop()
+    return 0
 
 
+if __name__ == '__main__':
+    sys.exit(main())
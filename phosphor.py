@@ -0,0 +1,121 @@
+"""
+Digital-phosphor (intensity-graded) accumulation for the scope view.
+
+Every sweep drawn into the scope panel is binned into a 2D hit-count
+histogram over (sweep position, y) with one bin per screen pixel. The
+histogram decays exponentially each frame, so frequently visited paths glow
+brighter and old traces fade out. Memory depends only on the pixel size of
+the panel, never on how many waveforms have been accumulated.
+"""
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap, to_rgba
+
+from signal_engine import sweep_segment_starts
+
+DEFAULT_DECAY = 0.85 # Fraction of intensity kept from one frame to the next
+MAX_INTERPOLATION = 16 # Cap on sub-steps inserted between two samples
+
+
+def phosphor_cmap(theme):
+    """Colormap from the theme's axes background through the forward trace color to white."""
+    # Zero hits are fully transparent so the grid stays visible under the image
+    return LinearSegmentedColormap.from_list('phosphor', [to_rgba(theme['ax_bg'], 0.0), theme['trace_yt_fwd'], 'white'])
+
+
+class PhosphorDisplay:
+    """Decaying hit-count histogram with one bin per display pixel."""
+
+    def __init__(self, width, height, x_range=(0.0, 1.0), y_range=(-1.0, 1.0), decay=DEFAULT_DECAY):
+        self.decay = decay
+        self.x_range = tuple(x_range); self.y_range = tuple(y_range)
+        self.hits = np.zeros((1, 1), dtype=np.float32)
+        self._intensity = np.zeros((1, 1), dtype=np.float32)
+        self.waveforms = 0 # Sweeps accumulated since the last clear
+        self.resize(width, height)
+
+    @property
+    def shape(self):
+        return self.hits.shape # (height, width)
+
+    def resize(self, width, height):
+        """Matches the histogram to the panel size in pixels; clears it if the size changed."""
+        shape = (max(int(height), 1), max(int(width), 1))
+        if shape != self.hits.shape:
+            self.hits = np.zeros(shape, dtype=np.float32)
+            self._intensity = np.zeros(shape, dtype=np.float32)
+            self.waveforms = 0
+
+    def set_ranges(self, x_range, y_range):
+        """Changes the data ranges mapped onto the histogram; clears it on change."""
+        x_range = tuple(x_range); y_range = tuple(y_range)
+        if x_range != self.x_range or y_range != self.y_range:
+            self.x_range = x_range; self.y_range = y_range
+            self.clear()
+
+    def clear(self):
+        self.hits.fill(0.0)
+        self.waveforms = 0
+
+    def fade(self):
+        """Applies one frame of exponential decay."""
+        self.hits *= self.decay
+
+    def accumulate(self, x, y, breaks=None, interpolate=True, waveforms=1):
+        """
+        Adds the samples (x, y) to the histogram.
+
+        `x` and `y` may have any (matching) shape, e.g. a batch of
+        waveforms from compute_frames_batch. With `interpolate`, straight
+        sub-steps are inserted between consecutive samples so sparse records
+        still draw connected traces; `breaks` marks samples that start a new
+        segment and must not be joined to the previous one.
+        """
+        x = np.asarray(x, dtype=np.float64).ravel(); y = np.asarray(y, dtype=np.float64).ravel()
+        height, width = self.hits.shape
+        (x0, x1), (y0, y1) = self.x_range, self.y_range
+        cols = (x - x0) * (width / (x1 - x0))
+        rows = (y - y0) * (height / (y1 - y0))
+        if interpolate and cols.size > 1:
+            cols, rows = self._interpolate(cols, rows, breaks)
+
+        # Out-of-screen (and NaN) samples land in one extra overflow bin that is dropped
+        inside = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+        np.copyto(cols, 0.0, where=~inside); np.copyto(rows, 0.0, where=~inside)
+        flat = rows.astype(np.intp) * width
+        flat += cols.astype(np.intp)
+        flat[~inside] = width * height
+        counts = np.bincount(flat, minlength=width * height + 1)
+        self.hits += counts[:-1].reshape(height, width)
+        self.waveforms += waveforms
+
+    def accumulate_frame(self, frame):
+        """Adds the sweeps of every channel of a signal_engine Frame; no segment is joined to the next one."""
+        ys = frame.channel_data
+        n_channels = ys.shape[0]
+        breaks = sweep_segment_starts(frame.x_sweep, frame.forward_mask)
+        if n_channels > 1:
+            # All channels in one pass; each row starts its own segment
+            breaks = np.tile(breaks, n_channels)
+        self.accumulate(np.broadcast_to(frame.x_sweep, ys.shape), ys, breaks=breaks, waveforms=frame.num_cycles * n_channels)
+
+    @staticmethod
+    def _interpolate(cols, rows, breaks):
+        steps = np.maximum(np.abs(np.diff(cols)), np.abs(np.diff(rows)))
+        if breaks is not None: steps[np.asarray(breaks).ravel()[1:]] = 0.0
+        finite = np.isfinite(steps)
+        n_sub = int(min(np.ceil(steps[finite].max()), MAX_INTERPOLATION)) if finite.any() else 1
+        if n_sub <= 1: return cols, rows
+        frac = np.arange(n_sub, dtype=np.float64) / n_sub
+        joined = (steps > 0)[:, None] # Broken segments only keep their starting sample
+        sub_cols = cols[:-1, None] + np.diff(cols)[:, None] * frac
+        sub_rows = rows[:-1, None] + np.diff(rows)[:, None] * frac
+        sub_cols = np.where(joined | (frac == 0), sub_cols, np.nan)
+        return np.append(sub_cols.ravel(), cols[-1]), np.append(sub_rows.ravel(), rows[-1])
+
+    def intensity(self):
+        """Log-scaled intensity in [0, 1] for display; the returned array is reused."""
+        peak = float(self.hits.max())
+        if peak <= 0: self._intensity.fill(0.0); return self._intensity
+        np.log1p(self.hits, out=self._intensity)
+        self._intensity *= 1.0 / np.log1p(peak)
+        return self._intensity
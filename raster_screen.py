@@ -0,0 +1,258 @@
+"""
+Direct raster renderer for the oscilloscope panel.
+
+Even on the blit path, matplotlib spends milliseconds per frame pushing
+Line2D paths through Agg and copying the whole canvas to Tk. RasterScreen
+skips all of that for the scope panel: traces are rasterized with NumPy
+straight into an RGBA framebuffer the size of the panel, on top of a
+graticule that is pre-rendered from the theme colors and only redrawn when
+the size, the limits or the theme change. The GUI shows the framebuffer in
+a Tk PhotoImage (see ppm()); the annotated panels stay in matplotlib.
+
+- 'lines': every sweep segment is reduced to one vertical span per pixel
+  column (min..max of its samples there, joined to the previous column),
+  and all spans of one color are filled at once with a cumulative sum over
+  a per-column difference image, so the cost is O(samples + pixels) however
+  noisy the signal.
+- 'xy': CH1 against the next channel as line segments between consecutive
+  samples that land on different pixels.
+- 'phosphor': a PhosphorDisplay histogram colored through the theme's
+  phosphor colormap and blended over the graticule.
+"""
+import numpy as np
+from matplotlib.colors import to_rgba
+
+from phosphor import PhosphorDisplay, phosphor_cmap
+from scope_view import scope_axes, channel_color
+from themes import THEMES, DEFAULT_THEME
+
+MINOR_DOT = 3 # Minor grid lines light one pixel in MINOR_DOT, like matplotlib's ':' style
+PHOSPHOR_LEVELS = 256 # Entries of the phosphor color lookup table
+SPAN_PIXELS_DIRECT = 0.1 # Spans covering less than this share of the screen are written pixel by pixel
+XY_MAX_SEGMENTS = 200_000 # Longer XY paths (after merging repeated pixels) are strided down
+
+
+def rgba32(color):
+    """A matplotlib color as one uint32 holding the RGBA bytes in memory order."""
+    return np.array([round(c * 255) for c in to_rgba(color)], dtype=np.uint8).view(np.uint32)[0]
+
+
+class RasterScreen:
+    """RGBA framebuffer of the scope panel with a pre-rendered graticule."""
+
+    def __init__(self, width, height, theme=None):
+        self.theme = theme if theme is not None else THEMES[DEFAULT_THEME]
+        self.width = 0; self.height = 0
+        self.x_range = (0.0, 1.0); self.y_range = (-1.0, 1.0)
+        self.phosphor = None
+        self._scratch = np.empty(0); self._run_start = np.empty(0, dtype=bool) # Per-sample buffers of the lines mode
+        self._grid = None # (x_steps, y_steps) the background was rendered with
+        self._ppm = None; self._ppm_header = b''
+        self._set_colors()
+        self.resize(width, height)
+
+    def set_theme(self, theme):
+        self.theme = theme
+        self._set_colors()
+        self._grid = None
+
+    def resize(self, width, height):
+        """Matches the framebuffer to the panel size in pixels."""
+        width = max(int(round(width)), 2); height = max(int(round(height)), 2)
+        if (width, height) == (self.width, self.height): return
+        self.width, self.height = width, height
+        self.pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        self._pixels32 = self.pixels.view(np.uint32)[..., 0] # One store per pixel
+        self._background = np.empty_like(self.pixels)
+        self._grid = None
+
+    def _set_colors(self):
+        theme = self.theme
+        lut = phosphor_cmap(theme)(np.linspace(0.0, 1.0, PHOSPHOR_LEVELS))
+        self._phosphor_rgb = lut[:, :3] * 255.0; self._phosphor_alpha = lut[:, 3:]
+
+    # --- Coordinates ---
+    def _set_axes(self, mode, y_lim):
+        """Takes the limits and grid steps of the matplotlib scope axes; re-renders the graticule when they changed."""
+        x_range, y_range, x_steps, y_steps = scope_axes(mode, y_lim)
+        grid = (x_range, y_range, x_steps, y_steps)
+        if grid == self._grid: return
+        self.x_range, self.y_range = x_range, y_range
+        self._render_background(x_steps, y_steps)
+        self._grid = grid
+
+    def to_columns(self, x, out=None):
+        """Pixel column of every x value (pixel centers span the x-limits); off-screen values land on -1 or width."""
+        return self._to_pixels(self._scale_x(x, out), self.width)
+
+    def to_rows(self, y):
+        """Pixel row of every y value, row 0 at the top."""
+        y0, y1 = self.y_range
+        scaled = np.multiply(y, -(self.height - 1) / (y1 - y0))
+        scaled += y1 * (self.height - 1) / (y1 - y0)
+        return self._to_pixels(scaled, self.height)
+
+    def _scale_x(self, x, out=None):
+        x0, x1 = self.x_range
+        scaled = np.multiply(x, (self.width - 1) / (x1 - x0), out=out)
+        scaled -= x0 * (self.width - 1) / (x1 - x0)
+        return np.rint(scaled, out=scaled)
+
+    @staticmethod
+    def _to_pixels(scaled, size):
+        np.clip(scaled, -1, size, out=scaled) # Also keeps huge values castable
+        with np.errstate(invalid='ignore'): pixels = np.rint(scaled, out=scaled).astype(np.intp) # NaN -> never on screen
+        return np.clip(pixels, -1, size, out=pixels)
+
+    # --- Graticule ---
+    def _render_background(self, x_steps, y_steps):
+        theme = self.theme
+        background = self._background
+        background32 = background.view(np.uint32)[..., 0]
+        background32.fill(rgba32(theme['ax_bg']))
+        (x0, x1), (y0, y1) = self.x_range, self.y_range
+        for steps, color, dotted in ((1, 'grid_minor', True), (0, 'grid_major', False)):
+            color32 = rgba32(theme[color])
+            step = MINOR_DOT if dotted else 1
+            for col in self.to_columns(self._ticks(x0, x1, x_steps[steps])): background32[::step, col] = color32
+            for row in self.to_rows(self._ticks(y0, y1, y_steps[steps])): background32[row, ::step] = color32
+        spine = rgba32(theme['spine'])
+        background32[[0, -1], :] = spine; background32[:, [0, -1]] = spine
+
+    @staticmethod
+    def _ticks(lo, hi, step):
+        """Multiples of `step` within [lo, hi], as MultipleLocator places them."""
+        return np.arange(np.ceil(lo / step - 1e-9), np.floor(hi / step + 1e-9) + 1) * step
+
+    # --- Rendering ---
+    def render(self, frame, mode='lines'):
+        """Draws `frame` over the graticule and returns the (height, width, 4) uint8 framebuffer."""
+        self._set_axes(mode, frame.y_lim)
+        np.copyto(self.pixels, self._background)
+        if mode == 'phosphor': self._draw_phosphor(frame)
+        elif mode == 'xy': self._draw_xy(frame)
+        else: self._draw_lines(frame)
+        if self.phosphor is not None and mode != 'phosphor': self.phosphor = None
+        return self.pixels
+
+    def _draw_lines(self, frame):
+        x = frame.x_sweep; n = x.size
+        if n == 0: return
+        fwd, ret = frame.forward_mask, frame.return_mask
+        if self._scratch.size != n: self._scratch = np.empty(n); self._run_start = np.empty(n, dtype=bool)
+        cols = self._scale_x(x, out=self._scratch) # Rounded, still float: only the run columns are converted
+        # Runs: consecutive samples of one sweep direction in one pixel column
+        run_start = self._run_start; run_start[0] = True
+        np.not_equal(cols[1:], cols[:-1], out=run_start[1:])
+        run_start[1:] |= fwd[1:] != fwd[:-1]
+        run_start[1:] |= ret[1:] != ret[:-1] # A triggered beam idles after the return sweep
+        starts = np.flatnonzero(run_start)
+        ends = np.append(starts[1:], n) - 1
+        run_cols = self._to_pixels(cols[starts], self.width)
+        run_fwd = fwd[starts]; lit = run_fwd | ret[starts]
+        # A run continues the previous one's sweep segment unless the direction flipped or the ramp restarted
+        # (what sweep_segment_starts finds per sample, here per run)
+        joined = np.zeros(starts.size, dtype=bool)
+        step = np.diff(run_cols)
+        joined[1:] = lit[:-1] & (run_fwd[1:] == run_fwd[:-1]) & np.where(run_fwd[1:], step > 0, step < 0)
+        for row, channel_id in enumerate(frame.channel_ids):
+            y = frame.channel_data[row]
+            top = self.to_rows(np.maximum.reduceat(y, starts)); bottom = self.to_rows(np.minimum.reduceat(y, starts))
+            first = self.to_rows(y[starts]); last = self.to_rows(y[ends])
+            if channel_id == 1:
+                self._draw_runs(run_cols, top, bottom, first, last, joined, lit & run_fwd, rgba32(self.theme['trace_yt_fwd']))
+                self._draw_runs(run_cols, top, bottom, first, last, joined, lit & ~run_fwd, rgba32(self.theme['trace_yt_ret']))
+            else:
+                # Extra channels show their forward sweeps only, as in the matplotlib view
+                self._draw_runs(run_cols, top, bottom, first, last, joined, lit & run_fwd, rgba32(channel_color(self.theme, channel_id)))
+
+    def _draw_runs(self, cols, top, bottom, first, last, joined, selected, color):
+        """Fills each selected run's span and joins it to the previous run of its segment."""
+        prev_cols = np.roll(cols, 1); prev_last = np.roll(last, 1)
+        top = top.copy(); bottom = bottom.copy()
+        # Next column over: extending the span to the previous sample is the whole connecting line
+        adjacent = joined & (np.abs(cols - prev_cols) <= 1) & selected
+        np.minimum(top, prev_last, out=top, where=adjacent); np.maximum(bottom, prev_last, out=bottom, where=adjacent)
+        self.fill_spans(cols[selected], top[selected], bottom[selected], color)
+        gaps = joined & ~adjacent & selected # Sparse records: straight lines across the empty columns
+        if np.any(gaps): self.draw_segments(prev_cols[gaps], prev_last[gaps], cols[gaps], first[gaps], color)
+
+    def fill_spans(self, cols, top, bottom, color):
+        """Lights rows top..bottom of each column in `cols`."""
+        height, width = self.height, self.width
+        top = np.clip(top, 0, height); bottom = np.clip(bottom, -1, height - 1)
+        keep = (top <= bottom) & (cols >= 0) & (cols < width)
+        if not np.any(keep): return
+        cols = cols[keep]; top = top[keep]; bottom = bottom[keep]
+        lengths = bottom - top + 1
+        total = int(lengths.sum())
+        if total <= SPAN_PIXELS_DIRECT * height * width:
+            # Short spans (smooth traces): write their pixels directly
+            first = np.cumsum(lengths) - lengths
+            rows = np.repeat(top - first, lengths) + np.arange(total)
+            self._pixels32[rows, np.repeat(cols, lengths)] = color
+            return
+        # Long spans (noise, steep edges): +1 at each span's top, -1 below its bottom, summed down the
+        # columns; laid out column by column, so one flat cumsum does it and each column sums back to zero
+        stride = height + 1; size = stride * width
+        edges = np.bincount(cols * stride + top, minlength=size)
+        edges -= np.bincount(cols * stride + bottom + 1, minlength=size)
+        covered = np.cumsum(edges, out=edges).reshape(width, stride)[:, :height] > 0
+        np.copyto(self._pixels32, color, where=covered.T)
+
+    def draw_segments(self, c0, r0, c1, r1, color):
+        """Straight lines from (c0, r0) to (c1, r1), one pixel per step along the longer axis."""
+        if c0.size == 0: return
+        dc = c1 - c0; dr = r1 - r0
+        steps = np.maximum(np.abs(dc), np.abs(dr))
+        counts = steps + 1
+        segment = np.repeat(np.arange(counts.size), counts)
+        step = np.arange(segment.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        frac = step / np.maximum(steps, 1)[segment]
+        cols = c0[segment] + np.rint(frac * dc[segment]).astype(np.intp)
+        rows = r0[segment] + np.rint(frac * dr[segment]).astype(np.intp)
+        inside = (cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height)
+        self._pixels32[rows[inside], cols[inside]] = color
+
+    def _draw_xy(self, frame):
+        ys = frame.channel_data
+        if ys.shape[0] < 2 or ys.shape[1] == 0: return
+        cols = self.to_columns(ys[0]); rows = self.to_rows(ys[1])
+        # Consecutive samples on the same pixel add nothing to the path
+        moved = np.empty(cols.size, dtype=bool); moved[0] = True
+        moved[1:] = (cols[1:] != cols[:-1]) | (rows[1:] != rows[:-1])
+        cols = cols[moved]; rows = rows[moved]
+        stride = max(-(-cols.size // XY_MAX_SEGMENTS), 1)
+        if stride > 1: cols = cols[::stride]; rows = rows[::stride]
+        color = rgba32(self.theme['trace_yt_fwd'])
+        if cols.size == 1: self.draw_segments(cols, rows, cols, rows, color)
+        else: self.draw_segments(cols[:-1], rows[:-1], cols[1:], rows[1:], color)
+
+    def _draw_phosphor(self, frame):
+        """Decays and adds to the persistence histogram, then blends it over the graticule."""
+        if self.phosphor is None: self.phosphor = PhosphorDisplay(self.width, self.height, self.x_range, self.y_range)
+        else:
+            self.phosphor.resize(self.width, self.height)
+            self.phosphor.set_ranges(self.x_range, self.y_range)
+        self.phosphor.fade()
+        self.phosphor.accumulate_frame(frame)
+        level = np.rint(self.phosphor.intensity()[::-1] * (PHOSPHOR_LEVELS - 1)).astype(np.intp) # Histogram row 0 is the bottom
+        glowing = level > 0
+        level = level[glowing]
+        alpha = self._phosphor_alpha[level]
+        rgb = self.pixels[..., :3]
+        rgb[glowing] = rgb[glowing] * (1.0 - alpha) + self._phosphor_rgb[level] * alpha
+
+    # --- Output ---
+    def ppm(self):
+        """
+        The framebuffer as a binary PPM image, in a bytearray reused between
+        frames; Tk's PhotoImage reads it directly (no PNG or base64 encoding).
+        """
+        header = f"P6 {self.width} {self.height} 255\n".encode()
+        size = len(header) + self.width * self.height * 3
+        if self._ppm is None or header != self._ppm_header or len(self._ppm) != size:
+            self._ppm = bytearray(size); self._ppm[:len(header)] = header; self._ppm_header = header
+        rgb = np.frombuffer(self._ppm, dtype=np.uint8, offset=len(header)).reshape(self.height, self.width, 3)
+        for i in range(3): rgb[..., i] = self.pixels[..., i] # Plane by plane is several times faster than one [..., :3] copy
+        return self._ppm
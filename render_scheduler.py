@@ -0,0 +1,92 @@
+"""
+Frame-rate-limited render scheduling for the Tk front end.
+
+Slider callbacks fire once per intermediate value while dragging. Instead of
+rendering each one, callers mark the state dirty through `request()`; the
+scheduler merges pending changes and renders at most once per frame budget
+using the widget's `after` timer, always from the latest state.
+"""
+import time
+import traceback
+from collections import deque
+
+from instrumentation import NULL_PROFILER
+
+DEFAULT_MAX_FPS = 60
+FPS_WINDOW = 60 # Renders used for the achieved-FPS estimate
+
+
+class RenderScheduler:
+    """Coalesces render requests onto `widget.after` ticks."""
+
+    def __init__(self, widget, render_callback, max_fps=DEFAULT_MAX_FPS, profiler=None):
+        self.widget = widget
+        self.render_callback = render_callback
+        self.max_fps = max_fps
+        self.pending_changes = {}
+        self.timer_id = None
+        self.last_render_time = None
+        self._render_times = deque(maxlen=FPS_WINDOW)
+        self.profiler = profiler if profiler is not None else NULL_PROFILER # Mirrors the counters for the HUD
+
+        # Counters
+        self.requests = 0
+        self.renders = 0
+        self.coalesced = 0
+
+    @property
+    def frame_interval(self):
+        return 1.0 / self.max_fps if self.max_fps and self.max_fps > 0 else 0.0
+
+    @property
+    def dirty(self):
+        return self.timer_id is not None
+
+    def request(self, **changes):
+        """Marks the state dirty; `changes` are merged with other pending ones (latest value wins)."""
+        self.requests += 1; self.profiler.count('requests')
+        self.pending_changes.update(changes)
+        if self.timer_id is not None:
+            self.coalesced += 1; self.profiler.count('coalesced')
+            return
+        delay = 0.0
+        if self.last_render_time is not None:
+            delay = max(0.0, self.last_render_time + self.frame_interval - time.perf_counter())
+        self.timer_id = self.widget.after(int(round(delay * 1000)), self._on_timer)
+
+    def cancel(self):
+        """Drops a pending render, e.g. before a caller renders synchronously."""
+        if self.timer_id is not None:
+            try: self.widget.after_cancel(self.timer_id)
+            except Exception as e: print(f"Error cancelling render timer: {e}")
+        self.timer_id = None
+        self.pending_changes = {}
+
+    def flush(self):
+        """Renders immediately if a render is pending."""
+        if self.timer_id is None: return
+        try: self.widget.after_cancel(self.timer_id)
+        except Exception as e: print(f"Error cancelling render timer: {e}")
+        self._on_timer()
+
+    def _on_timer(self):
+        self.timer_id = None
+        changes = self.pending_changes; self.pending_changes = {}
+        now = time.perf_counter()
+        self.last_render_time = now
+        self._render_times.append(now)
+        self.renders += 1
+        try:
+            self.render_callback(changes)
+        except Exception as e:
+            print(f"Error during scheduled render: {e}"); traceback.print_exc()
+
+    def achieved_fps(self):
+        """Render rate over the last FPS_WINDOW renders (0.0 until two renders happened)."""
+        if len(self._render_times) < 2: return 0.0
+        span = self._render_times[-1] - self._render_times[0]
+        return (len(self._render_times) - 1) / span if span > 0 else 0.0
+
+    def stats(self):
+        return {'requests': self.requests, 'renders': self.renders, 'coalesced': self.coalesced,
+                'max_fps': self.max_fps, 'achieved_fps': self.achieved_fps()}
@@ -0,0 +1,538 @@
+"""
+Matplotlib rendering of the four oscilloscope panels.
+
+ScopeView owns the axes artists and splits each frame into a static part
+(styling, limits, locators, layout) and a dynamic part (traces, legend text,
+sweep title/annotations). The static part is only re-rendered when something
+it depends on changes; otherwise the cached background is restored and only
+the dynamic artists are blitted on top.
+"""
+import threading
+
+from matplotlib.colors import to_rgba
+from matplotlib.ticker import MultipleLocator, AutoMinorLocator
+
+import numpy as np
+
+from decimation import peak_decimate
+from signal_engine import split_sweep_segments, decimate_time_trace
+from phosphor import PhosphorDisplay, phosphor_cmap
+from spectrum import SpectrumAnalyzer
+from instrumentation import NULL_PROFILER
+from themes import THEMES, DEFAULT_THEME, DEFAULT_BASE_FONT_SIZE, FIGURE_TITLE # Re-exported for existing callers
+
+LAYOUT_RECT = [0, 0.02, 0.92, 0.95] # [left, bottom, right, top] for tight_layout
+SCOPE_XLIM = (-0.05, 1.05)
+SCOPE_X_SPAN = 1.0 / (SCOPE_XLIM[1] - SCOPE_XLIM[0]) # Share of the scope axis covered by the 0..1 sweep
+DISPLAY_MODES = ('lines', 'phosphor', 'xy') # Scope panel: vector traces, intensity-graded persistence or CH1 vs CH2
+XY_MAX_POINTS = 20_000 # XY traces have no time axis to decimate along, so long records are strided down
+
+
+def style_figure(fig, theme, base_font_size=DEFAULT_BASE_FONT_SIZE, title=FIGURE_TITLE):
+    """Figure background and suptitle for a theme (the axes themselves are styled by ScopeView)."""
+    fig.patch.set_facecolor(theme['fig_bg'])
+    fig.suptitle(title, fontsize=base_font_size + 5, color=theme['text'])
+
+
+def scope_axes(display_mode, y_lim):
+    """Limits and (major, minor) grid steps of the scope panel: (x_range, y_range, x_steps, y_steps)."""
+    major_step_y = max(y_lim / 4, 1e-6)
+    y_steps = (major_step_y, major_step_y / 5)
+    if display_mode == 'xy': return (-y_lim, y_lim), (-y_lim, y_lim), y_steps, y_steps
+    return SCOPE_XLIM, (-y_lim, y_lim), (0.2, 0.05), y_steps
+
+
+def channel_color(theme, channel_id):
+    """Trace color of a channel: the input trace color for CH1, then the theme's channel colors."""
+    if channel_id == 1: return theme['trace_input']
+    colors = theme['trace_channels']
+    return colors[(channel_id - 2) % len(colors)]
+
+
+class ScopeView:
+    """Draws signal_engine Frames into a figure with four stacked axes (the last one is the spectrum)."""
+
+    def __init__(self, fig, theme=None, base_font_size=DEFAULT_BASE_FONT_SIZE, blit=True, decimate=True, profiler=None, lock=None):
+        self.fig = fig
+        self.ax = list(fig.axes) if len(fig.axes) == 4 else list(fig.subplots(4, 1))
+        self.theme = theme if theme is not None else THEMES[DEFAULT_THEME]
+        self.base_font_size = base_font_size
+        self.blit = blit
+        self.decimate = decimate # Min/max-decimate traces to ~2 points per pixel column
+        self.display_mode = 'lines'
+        self.fast_screen = False # Scope traces are drawn by a RasterScreen outside the figure
+        self.phosphor = None; self.phosphor_image = None
+        self.spectrum = SpectrumAnalyzer()
+        self.lock = lock if lock is not None else threading.RLock() # Guards `spectrum`, whose average trace_data updates from any thread
+        self.profiler = profiler if profiler is not None else NULL_PROFILER # Times the render stages
+        self.show_hud = False; self.hud_text = None
+
+        self.line_input = None; self.line_sweep = None
+        self.line_scope_fwd = None; self.line_scope_ret = None; self.line_xy = None; self.line_spectrum = None
+        self.channel_lines = {} # Channel number -> (time-trace, scope, spectrum) lines for channels 2, 3, ...
+        self.input_legend = None; self.sweep_texts = ()
+        self._artists_ready = False
+        self._static_key = None
+        self._layout_key = None # Static key and font size the current layout was computed for
+        self._background = None
+        self._sweep_layer = None # (content key, background with the sweep panel drawn on it)
+
+        # Counters, handy when checking how often the slow path runs
+        self.full_redraws = 0
+        self.blit_redraws = 0
+
+        fig.canvas.mpl_connect('draw_event', self._on_draw)
+        fig.canvas.mpl_connect('resize_event', self._on_resize)
+
+    # --- Configuration ---
+    def set_theme(self, theme, base_font_size=None):
+        """
+        Switches theme (and optionally font size) in place: existing artists
+        are recolored and keep their data. The next render restyles the axes
+        and redraws; the layout is only recomputed when the font size changed.
+        """
+        self.theme = theme
+        if base_font_size is not None: self.base_font_size = base_font_size
+        if self._artists_ready: self._restyle_artists()
+        self.invalidate()
+
+    def set_display_mode(self, mode):
+        """Selects vector traces ('lines'), digital phosphor ('phosphor') or XY ('xy') for the scope panel."""
+        if mode not in DISPLAY_MODES: raise ValueError(f"Unknown display mode '{mode}', expected one of {DISPLAY_MODES}")
+        if mode != self.display_mode and self.phosphor is not None: self.phosphor.clear()
+        self.display_mode = mode
+        self.invalidate()
+
+    def set_fast_screen(self, enabled):
+        """Leaves the scope traces to a raster renderer; the panel keeps its axes, labels and legend."""
+        self.fast_screen = bool(enabled)
+        if self.phosphor is not None: self.phosphor.clear()
+        self.invalidate()
+
+    @property
+    def scope_mode(self):
+        """What the scope panel draws itself: the display mode, or 'raster' when the fast screen has taken over."""
+        return 'raster' if self.fast_screen else self.display_mode
+
+    def set_hud(self, enabled):
+        """Shows or hides the performance overlay (profiler stage percentiles) in the figure corner."""
+        self.show_hud = bool(enabled)
+        if self.hud_text is not None: self.hud_text.set_visible(self.show_hud)
+        self.invalidate()
+
+    def set_spectrum(self, **settings):
+        """Configures the spectrum view (window_name, scale, averaging, averages); see SpectrumAnalyzer."""
+        with self.lock: self.spectrum.configure(**settings)
+        self.invalidate()
+
+    def reset_spectrum(self):
+        """Restarts the spectrum average."""
+        with self.lock: self.spectrum.reset()
+
+    def reset(self):
+        """Forces the axes to be cleared and all artists recreated on the next render."""
+        self._artists_ready = False
+        self._layout_key = None
+        self.invalidate()
+
+    def invalidate(self):
+        """Forces styling, layout and a full redraw on the next render."""
+        self._static_key = None
+        self._background = None
+        self._sweep_layer = None
+
+    @property
+    def use_blit(self):
+        return self.blit and self.fig.canvas.supports_blit
+
+    def pixel_columns(self, ax_i, x_span=1.0):
+        """Width in device pixels of the data span `x_span` (fraction of the x-limits) of `ax_i`."""
+        if not self.decimate: return None
+        return max(int(ax_i.bbox.width * x_span), 1)
+
+    def font_sizes(self):
+        base = self.base_font_size
+        return {'title': base + 3, 'label': base + 1, 'legend': base - 1, 'text': base - 2, 'tick': base - 1}
+
+    # --- Rendering ---
+    def render(self, frame, traces=None):
+        """Draws `frame`, taking the blit fast path whenever the static part is unchanged."""
+        profiler = self.profiler
+        self.ensure_artists()
+        with profiler.stage('update'): self.update_artists(frame, traces)
+        key = self._static_key_for(frame)
+        if not self.use_blit or key != self._static_key or self._background is None:
+            with profiler.stage('style'): self.apply_static(frame)
+            self._layout_if_needed(key)
+            self._static_key = key
+            with profiler.stage('draw'): self.fig.canvas.draw() # draw_event recaptures the background
+            self.full_redraws += 1
+        else:
+            with profiler.stage('blit'): self.blit_dynamic()
+            self.blit_redraws += 1
+
+    def prepare(self, frame):
+        """
+        Brings every artist up to date for `frame` without drawing, for
+        callers that draw the figure themselves (savefig, animation writers).
+        Styling and layout are only redone when the static part changed.
+        """
+        self.ensure_artists()
+        self.update_artists(frame)
+        key = ('prepared', self._static_key_for(frame))
+        if key != self._static_key:
+            self.apply_static(frame)
+            self._layout_if_needed(key)
+            self._static_key = key
+            self._background = None
+            self._sweep_layer = None
+
+    def ensure_artists(self):
+        """Creates the plot artists on first use (render() and prepare() do this themselves)."""
+        if not self._artists_ready: self._create_artists()
+
+    def mark_static(self, frame):
+        """
+        Records the static part of `frame` as styled and drawn, so render()
+        takes the blit path while it stays unchanged. For callers that run
+        the styling, layout and draw stages themselves (benchmark.py).
+        """
+        self.ensure_artists()
+        self._static_key = self._static_key_for(frame)
+
+    def _layout_if_needed(self, key):
+        """tight_layout only when limits, labels or font size changed, not for color-only restyles."""
+        layout_key = (key, self.base_font_size)
+        if layout_key == self._layout_key: return
+        with self.profiler.stage('layout'): self.layout()
+        self._layout_key = layout_key
+
+    def _static_key_for(self, frame):
+        # Theme/font changes go through reset(); window resizes through _on_resize
+        return (frame.timing.total_time, frame.t.size, frame.y_lim, self.display_mode, frame.channel_ids, self.spectrum.scale)
+
+    def _create_artists(self):
+        theme = self.theme
+        ax1, ax2, ax3, ax4 = self.ax
+        for ax_i in self.ax: ax_i.clear()
+        self.line_input, = ax1.plot([], [], color=theme['trace_input']) # Label set per frame
+        self.line_sweep, = ax2.plot([], [], color=theme['trace_sweep'])
+        # One persistent artist per sweep direction; segments are NaN-separated
+        self.line_scope_fwd, = ax3.plot([], [], linestyle='-', color=theme['trace_yt_fwd'], label='Forward (Tqt)')
+        self.line_scope_ret, = ax3.plot([], [], linestyle='--', color=theme['trace_yt_ret'], label='Return (Tqn)')
+        self.line_xy, = ax3.plot([], [], color=theme['trace_yt_fwd'], label='_xy')
+        self.line_spectrum, = ax4.plot([], [], color=theme['trace_input'])
+        self.channel_lines = {}
+        text_bg = to_rgba(theme['ax_bg'], alpha=0.5)
+        self.sweep_texts = (
+            ax2.text(0, 0.55, 'Fwd\nSweep', ha='center', va='bottom', color=theme['text'], backgroundcolor=text_bg),
+            ax2.text(0, 0.45, 'Return\nSweep', ha='center', va='top', color=theme['text'], backgroundcolor=text_bg))
+        self.phosphor_image = ax3.imshow(np.zeros((1, 1)), extent=(0.0, 1.0, -1.0, 1.0), origin='lower', aspect='auto',
+                                         interpolation='nearest', cmap=phosphor_cmap(theme), vmin=0.0, vmax=1.0)
+        self.input_legend = None
+        self._style_hud()
+        self._artists_ready = True
+        self.invalidate()
+
+    def _restyle_artists(self):
+        """Applies the current theme's colors to the existing trace and text artists."""
+        theme = self.theme
+        self.line_input.set_color(theme['trace_input'])
+        self.line_sweep.set_color(theme['trace_sweep'])
+        self.line_scope_fwd.set_color(theme['trace_yt_fwd'])
+        self.line_scope_ret.set_color(theme['trace_yt_ret'])
+        self.line_xy.set_color(theme['trace_yt_fwd'])
+        self.line_spectrum.set_color(theme['trace_input'])
+        for channel_id, lines in self.channel_lines.items():
+            for line in lines: line.set_color(channel_color(theme, channel_id))
+        text_bg = to_rgba(theme['ax_bg'], alpha=0.5)
+        for txt in self.sweep_texts:
+            txt.set_color(theme['text']); txt.set_backgroundcolor(text_bg)
+        self.phosphor_image.set_cmap(phosphor_cmap(theme))
+        self._style_hud()
+
+    def _style_hud(self):
+        """Creates the overlay text on first use and restyles it for the current theme and font size."""
+        theme = self.theme
+        if self.hud_text is None:
+            self.hud_text = self.fig.text(0.005, 0.995, '', ha='left', va='top', family='monospace', zorder=10)
+        self.hud_text.set_color(theme['text'])
+        self.hud_text.set_fontsize(self.font_sizes()['text'])
+        self.hud_text.set_bbox({'facecolor': to_rgba(theme['ax_bg'], alpha=0.7), 'edgecolor': theme['spine'], 'pad': 3})
+        self.hud_text.set_visible(self.show_hud)
+
+    def _sync_channel_artists(self, channel_ids):
+        """Keeps exactly one time-trace line and one scope line per extra channel."""
+        wanted = [i for i in channel_ids if i != 1]
+        if list(self.channel_lines) == wanted: return
+        for channel_id in list(self.channel_lines):
+            if channel_id not in wanted:
+                for line in self.channel_lines.pop(channel_id): line.remove()
+        ax1, _, ax3, ax4 = self.ax
+        for channel_id in wanted:
+            if channel_id in self.channel_lines: continue
+            color = channel_color(self.theme, channel_id)
+            line_t, = ax1.plot([], [], color=color)
+            line_scope, = ax3.plot([], [], color=color, label=f'CH{channel_id}')
+            line_spectrum, = ax4.plot([], [], color=color)
+            self.channel_lines[channel_id] = (line_t, line_scope, line_spectrum)
+        self.channel_lines = {i: self.channel_lines[i] for i in wanted}
+        self.invalidate()
+
+    def dynamic_artists(self):
+        """Artists that change between two slider ticks and are drawn on top of the background."""
+        artists = [self.line_input, self.line_sweep, self.line_scope_fwd, self.line_scope_ret, self.line_xy, self.line_spectrum,
+                   *(line for lines in self.channel_lines.values() for line in lines), self.phosphor_image,
+                   self.ax[1].title, *self.sweep_texts]
+        if self.input_legend is not None: artists.append(self.input_legend)
+        if self.show_hud and self.hud_text is not None: artists.append(self.hud_text)
+        return artists
+
+    def sweep_layer_artists(self):
+        """Dynamic artists of the sweep panel, which only change with the sweep timing (not with A, x or φ)."""
+        return [self.line_sweep, self.ax[1].title, *self.sweep_texts]
+
+    def _sweep_layer_key(self):
+        texts = tuple((txt.get_position(), txt.get_visible()) for txt in self.sweep_texts)
+        x, y = (np.asarray(data).tobytes() for data in self.line_sweep.get_data())
+        return self.ax[1].title.get_text(), texts, x, y
+
+    def columns(self):
+        """Pixel columns per panel plus the display mode: everything trace_data() needs from the figure."""
+        ax1, ax2, ax3, ax4 = self.ax
+        return {'time': self.pixel_columns(ax1), 'sweep': self.pixel_columns(ax2),
+                'scope': self.pixel_columns(ax3, SCOPE_X_SPAN), 'spectrum': self.pixel_columns(ax4), 'mode': self.scope_mode}
+
+    def trace_data(self, frame, columns, spectrum=True):
+        """
+        Decimated trace arrays for `frame` (time traces, sweep, scope
+        segments in 'lines' mode, spectrum unless `spectrum` is False).
+        Touches no artists, so it can run on a worker thread with `columns`
+        taken from columns() beforehand.
+        """
+        ys = frame.channel_data
+        traces = {'time': [decimate_time_trace(frame, y, columns['time']) for y in ys],
+                  'sweep': decimate_time_trace(frame, frame.x_sweep, columns['sweep'])}
+        if spectrum: traces['spectrum'] = self.spectrum_traces(frame, columns['spectrum'])
+        if columns['mode'] == 'lines':
+            n_cols = columns['scope']
+            # Extra channels show their forward sweeps only, one line each
+            traces['scope'] = [split_sweep_segments(frame, n_cols=n_cols)] + \
+                              [split_sweep_segments(frame, y=y, n_cols=n_cols)[:2] for y in ys[1:]]
+        return traces
+
+    def update_artists(self, frame, traces=None):
+        """Pushes the frame's data and parameter text into the dynamic artists (`traces` from trace_data, if precomputed)."""
+        mode = self.scope_mode
+        if traces is None: traces = self.trace_data(frame, self.columns())
+        elif ('scope' in traces) != (mode == 'lines'):
+            # Display mode changed after the traces were computed: redo them, but keep the spectrum (already averaged in)
+            traces = dict(self.trace_data(frame, self.columns(), spectrum=False), spectrum=traces['spectrum'])
+        params, timing = frame.params, frame.timing
+        Tqt, Tqn = timing.Tqt, timing.Tqn
+        ys = frame.channel_data
+        multi_channel = len(frame.channel_ids) > 1
+        self._sync_channel_artists(frame.channel_ids)
+        channel_params = dict(params.active_channels())
+
+        ax2 = self.ax[1]
+        legend_lines = []
+        for row, channel_id in enumerate(frame.channel_ids):
+            ch = channel_params[channel_id]
+            label = (f'A = {ch.A:.2f}, x = {ch.x_factor:.2f}\n'
+                     f'ω = {ch.x_factor * np.pi:.2f} rad/s\n'
+                     f'φ = {ch.phi_deg:.1f}°\n'
+                     f'func = {ch.func}')
+            if multi_channel: label = f'CH{channel_id}: {label}'
+            line = self.line_input if channel_id == 1 else self.channel_lines[channel_id][0]
+            line.set_data(*traces['time'][row])
+            line.set_label(label)
+            legend_lines.append(line)
+        self.line_sweep.set_data(*traces['sweep'])
+        if self.input_legend is not None:
+            for text, line in zip(self.input_legend.texts, legend_lines): text.set_text(line.get_label())
+
+        self.phosphor_image.set_visible(mode == 'phosphor')
+        self.line_xy.set_visible(mode == 'xy')
+        for line in (self.line_scope_fwd, self.line_scope_ret, *(lines[1] for lines in self.channel_lines.values())):
+            line.set_visible(mode == 'lines')
+        if mode == 'phosphor':
+            self.update_phosphor(frame)
+        elif mode == 'xy':
+            self.update_xy(frame)
+        elif mode == 'lines':
+            fwd_x, fwd_y, ret_x, ret_y = traces['scope'][0]
+            self.line_scope_fwd.set_data(fwd_x, fwd_y)
+            self.line_scope_ret.set_data(ret_x, ret_y)
+            for channel_id, (fwd_x, fwd_y) in zip(frame.channel_ids[1:], traces['scope'][1:]):
+                self.channel_lines[channel_id][1].set_data(fwd_x, fwd_y)
+        for channel_id, (freqs, values) in zip(frame.channel_ids, traces['spectrum']):
+            line = self.line_spectrum if channel_id == 1 else self.channel_lines[channel_id][2]
+            line.set_data(freqs, values)
+
+        ax2.title.set_text(f'2. Horiz. Sweep (Tqt={Tqt:.3f}s, Tqn={Tqn:.3f}s)')
+        show_texts = timing.total_time > 0 and timing.T_total_sweep > 0 and Tqt > 1e-9 and Tqn > 1e-9
+        for txt, mid in zip(self.sweep_texts, (Tqt / 2, Tqt + Tqn / 2)):
+            txt.set_x(mid)
+            txt.set_visible(show_texts and mid < timing.total_time)
+        if self.show_hud: self.hud_text.set_text(self.profiler.hud_text())
+
+    def update_phosphor(self, frame):
+        """Fades the persistence histogram, adds this frame's sweeps and refreshes the image."""
+        ax3 = self.ax[2]
+        y_range = (-frame.y_lim, frame.y_lim)
+        width, height = ax3.bbox.width, ax3.bbox.height
+        if self.phosphor is None:
+            self.phosphor = PhosphorDisplay(width, height, SCOPE_XLIM, y_range)
+        else:
+            self.phosphor.resize(width, height)
+            self.phosphor.set_ranges(SCOPE_XLIM, y_range)
+        self.phosphor.fade()
+        self.phosphor.accumulate_frame(frame)
+        self.phosphor_image.set_data(self.phosphor.intensity())
+        self.phosphor_image.set_extent((*SCOPE_XLIM, *y_range))
+
+    def spectrum_traces(self, frame, n_cols):
+        """Transforms all channels at full transform size, then keeps one peak per pixel column; one (freqs, values) per channel."""
+        with self.lock: freqs, values = self.spectrum.compute(frame.t, frame.channel_data)
+        # The frequency axis is logarithmic, so the DC bin is left out and columns are spaced in log10(f)
+        freqs = freqs[1:]; values = values[:, 1:]
+        if n_cols is None or freqs.size <= n_cols: return [(freqs, row) for row in values]
+        log_f = np.log10(freqs)
+        traces = []
+        for row in values:
+            peak_log_f, peaks = peak_decimate(log_f, row, n_cols)
+            traces.append((10.0 ** peak_log_f, peaks))
+        return traces
+
+    def update_xy(self, frame):
+        """Plots channel 1 against the next enabled channel (Lissajous figure)."""
+        ys = frame.channel_data
+        if ys.shape[0] < 2: self.line_xy.set_data([], []); return
+        step = max(-(-ys.shape[1] // XY_MAX_POINTS), 1)
+        self.line_xy.set_data(ys[0, ::step], ys[1, ::step])
+
+    def apply_static(self, frame):
+        """Applies theme colors, fonts, limits and locators to all four axes."""
+        theme = self.theme; sizes = self.font_sizes()
+        ax_bg_color = theme['ax_bg']; text_color = theme['text']; grid_major_color = theme['grid_major']
+        ax1, ax2, ax3, ax4 = self.ax
+        total_time = frame.timing.total_time
+        y_lim_val = frame.y_lim
+
+        for ax_i in self.ax:
+            ax_i.set_facecolor(ax_bg_color)
+            ax_i.grid(True, which='major', axis='both', linestyle='-', linewidth='0.6', color=grid_major_color)
+            ax_i.grid(True, which='minor', axis='both', linestyle=':', linewidth='0.4', color=theme['grid_minor'])
+            ax_i.tick_params(axis='both', colors=text_color, labelsize=sizes['tick'], which='both')
+            for spine in ax_i.spines.values():
+                spine.set_edgecolor(theme['spine'])
+            ax_i.title.set_color(text_color)
+            ax_i.xaxis.label.set_color(text_color)
+            ax_i.yaxis.label.set_color(text_color)
+
+        # Axis 1: Input Signal
+        ax1.set_title('1. Input Signal', fontsize=sizes['title'], color=text_color)
+        ax1.set_xlabel('Time (s)', fontsize=sizes['label'], color=text_color)
+        ax1.set_ylabel('Input Signal', fontsize=sizes['label'], color=text_color)
+        ax1.set_xlim(0, total_time)
+        ax1.set_ylim(-y_lim_val, y_lim_val)
+        major_step_y0 = max(y_lim_val / 4, 1e-6); minor_step_y0 = major_step_y0 / 5
+        ax1.yaxis.set_major_locator(MultipleLocator(major_step_y0))
+        ax1.yaxis.set_minor_locator(MultipleLocator(minor_step_y0))
+        ax1.xaxis.set_minor_locator(AutoMinorLocator())
+        channel_time_lines = [self.line_input] + [lines[0] for lines in self.channel_lines.values()]
+        self.input_legend = ax1.legend(handles=channel_time_lines, fontsize=sizes['legend'], loc='center left', bbox_to_anchor=(1, 0.5),
+                                       facecolor=ax_bg_color, edgecolor=grid_major_color, labelcolor=text_color)
+
+        # Axis 2: Sweep Signal
+        ax2.title.set_fontsize(sizes['title'])
+        ax2.set_xlabel('Time (s)', fontsize=sizes['label'], color=text_color)
+        ax2.set_ylabel('Norm. Horiz. Pos.', fontsize=sizes['label'], color=text_color)
+        ax2.set_xlim(0, total_time)
+        ax2.set_ylim(-0.1, 1.1)
+        ax2.xaxis.set_minor_locator(AutoMinorLocator())
+        ax2.yaxis.set_major_locator(MultipleLocator(0.2))
+        ax2.yaxis.set_minor_locator(MultipleLocator(0.05))
+        for txt in self.sweep_texts: txt.set_fontsize(sizes['text'])
+
+        # Axis 3: Oscilloscope Screen
+        x_range, y_range, x_steps, y_steps = scope_axes(self.display_mode, y_lim_val)
+        if self.display_mode == 'xy':
+            y_channel = frame.channel_ids[1] if len(frame.channel_ids) > 1 else 2
+            ax3.set_title(f'3. Oscilloscope (XY: CH1 vs CH{y_channel})', fontsize=sizes['title'], color=text_color)
+            ax3.set_xlabel('CH1', fontsize=sizes['label'], color=text_color)
+            ax3.set_ylabel(f'CH{y_channel}', fontsize=sizes['label'], color=text_color)
+        else:
+            ax3.set_title('3. Oscilloscope (Y vs Sweep)', fontsize=sizes['title'], color=text_color)
+            ax3.set_xlabel('Normalized Sweep Position', fontsize=sizes['label'], color=text_color)
+            ax3.set_ylabel('Output Signal y(t)', fontsize=sizes['label'], color=text_color)
+        ax3.set_xlim(*x_range)
+        ax3.set_ylim(*y_range)
+        ax3.xaxis.set_major_locator(MultipleLocator(x_steps[0]))
+        ax3.xaxis.set_minor_locator(MultipleLocator(x_steps[1]))
+        ax3.yaxis.set_major_locator(MultipleLocator(y_steps[0]))
+        ax3.yaxis.set_minor_locator(MultipleLocator(y_steps[1]))
+        if self.display_mode == 'lines':
+            ax3.legend(fontsize=sizes['legend'], loc='center left', bbox_to_anchor=(1, 0.5),
+                       facecolor=ax_bg_color, edgecolor=grid_major_color, labelcolor=text_color)
+        elif ax3.get_legend() is not None:
+            ax3.get_legend().remove()
+
+        # Axis 4: Spectrum
+        sample_rate = frame.t.size / total_time
+        resolution = sample_rate / max(min(frame.t.size, self.spectrum.fft_size), 1) # Bin spacing
+        nyquist = 0.5 * sample_rate
+        scale = self.spectrum.scale
+        ax4.set_title(f'4. Spectrum ({self.spectrum.window_name} window)', fontsize=sizes['title'], color=text_color)
+        ax4.set_xlabel('Frequency (Hz)', fontsize=sizes['label'], color=text_color)
+        ax4.set_ylabel('Amplitude (dB)' if scale == 'db' else 'Amplitude', fontsize=sizes['label'], color=text_color)
+        ax4.set_xscale('log')
+        ax4.set_xlim(resolution, max(nyquist, resolution * 10))
+        ax4.set_ylim(*self.spectrum.y_limits(y_lim_val))
+        ax4.yaxis.set_major_locator(MultipleLocator(20.0 if scale == 'db' else max(y_lim_val / 4, 1e-6)))
+
+        animated = self.use_blit
+        for artist in self.dynamic_artists(): artist.set_animated(animated)
+
+    def layout(self):
+        try:
+            self.fig.tight_layout(rect=LAYOUT_RECT)
+        except ValueError as e:
+            print(f"Warning: tight_layout failed: {e}. Plot might overlap.")
+
+    def blit_dynamic(self):
+        """
+        Restores the cached background and redraws only the dynamic artists.
+        The sweep panel is kept as a second cached layer and only redrawn when
+        its content changes: its title and labels cost more to rasterize than
+        all the traces together. It shares no pixels with the other dynamic
+        artists, so drawing it first does not change the stacking.
+        """
+        canvas = self.fig.canvas
+        sweep_artists = self.sweep_layer_artists()
+        key = self._sweep_layer_key()
+        if self._sweep_layer is not None and self._sweep_layer[0] == key:
+            canvas.restore_region(self._sweep_layer[1])
+        else:
+            canvas.restore_region(self._background)
+            self._draw_dynamic(sweep_artists)
+            self._sweep_layer = (key, canvas.copy_from_bbox(self.fig.bbox))
+        self._draw_dynamic([artist for artist in self.dynamic_artists() if artist not in sweep_artists])
+        canvas.blit(self.fig.bbox)
+
+    def _draw_dynamic(self, artists=None):
+        for artist in self.dynamic_artists() if artists is None else artists:
+            if artist.get_animated(): self.fig.draw_artist(artist)
+
+    # --- Canvas Callbacks ---
+    def _on_draw(self, event):
+        """Every full draw (ours or a window resize) refreshes the cached background."""
+        if not self._artists_ready or not self.use_blit: return
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._sweep_layer = None
+        self._draw_dynamic()
+
+    def _on_resize(self, event):
+        """Re-runs the layout for the new size; the redraw that follows recaptures the background."""
+        if self._artists_ready and self._static_key is not None: self.layout()
@@ -0,0 +1,266 @@
+"""
+Record and replay of control sessions.
+
+A session is the full control state when recording started plus one event
+per change: a timestamp, what caused it ('slider', 'phi_unit', 'quick_set',
+'theme', ...) and only the controls that changed. Replaying feeds the
+events back through the frame pipeline (compute, trigger, measurements,
+ScopeView.render) on an Agg canvas, either at the recorded pace, where
+events that arrive while a frame is still rendering are coalesced like in
+the GUI and counted as dropped frames, or as fast as possible. Either way
+it reports the latency of every event, so a captured "bad drag" becomes a
+repeatable performance test:
+
+    python session.py bad_drag.json.gz
+    python session.py bad_drag.json.gz --fast --out report.json
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+
+import numpy as np
+
+from signal_engine import SignalParams, ChannelParams
+from themes import THEMES, DEFAULT_THEME, DEFAULT_BASE_FONT_SIZE
+from sources import open_capture, ExpressionSource, frame_data_key
+from averaging import SweepAverager
+
+SESSION_VERSION = 1
+FIGSIZE = (10, 12) # Same as the GUI figure
+DEFAULT_DPI = 100
+FRAME_BUDGET = 1.0 / 60 # Frames slower than this count as over budget
+
+# --- Control State ---
+# Flat dict of every control the GUI exposes; SignalParams fields keep their names.
+SIGNAL_KEYS = ('A', 'x_factor', 'phi', 'tqt_factor', 'tqn_factor', 'func', 'phi_unit', 'points')
+
+
+def params_from_controls(controls):
+    """SignalParams from a control state (see read_controls in oscilloscope.py)."""
+    values = {key: controls[key] for key in SIGNAL_KEYS if key in controls}
+    if 'points' in values: values['points'] = int(values['points'])
+    channels = tuple(ChannelParams(**ch) for ch in controls.get('channels', ()))
+    return SignalParams(channels=channels, **values)
+
+
+def diff_controls(old, new):
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+class SessionRecorder:
+    """Collects control changes with timestamps relative to the start of the recording."""
+
+    def __init__(self, controls):
+        self.initial = dict(controls)
+        self.events = []
+        self._state = dict(controls)
+        self._start = time.perf_counter()
+
+    def record(self, controls, kind='controls'):
+        """Stores the controls that differ from the last recorded state; returns False if nothing changed."""
+        changes = diff_controls(self._state, controls)
+        if not changes: return False
+        self._state.update(changes)
+        self.events.append([round(time.perf_counter() - self._start, 6), kind, changes])
+        return True
+
+    @property
+    def duration(self):
+        return self.events[-1][0] if self.events else 0.0
+
+    def save(self, path):
+        save_session(path, {'version': SESSION_VERSION, 'initial': self.initial, 'events': self.events})
+
+
+def save_session(path, session):
+    """Compact JSON, gzip-compressed when `path` ends in .gz."""
+    data = json.dumps(session, separators=(',', ':')).encode()
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wb') as f: f.write(data)
+
+
+def load_session(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f: session = json.loads(f.read().decode())
+    if session.get('version') != SESSION_VERSION: raise ValueError(f"Unsupported session version {session.get('version')} in '{path}'")
+    return session
+
+
+# --- Replay ---
+class SessionPlayer:
+    """Headless frame pipeline driven by control states."""
+
+    def __init__(self, figsize=FIGSIZE, dpi=DEFAULT_DPI):
+        # matplotlib is only needed for replay, not for recording from the GUI
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from scope_view import ScopeView, style_figure
+        from signal_engine import SignalEngine
+        from trigger import TriggerEngine
+        from measurements import MeasurementEngine
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.fig.subplots(4, 1)
+        self.view = ScopeView(self.fig)
+        self._style_figure = style_figure
+        self.engine = SignalEngine()
+        self.trigger = TriggerEngine()
+        self.measurements = MeasurementEngine()
+        self.averager = SweepAverager()
+        self._style = None
+        self._capture = None; self._capture_key = None; self._expression = None
+        self.raster = None # RasterScreen, while the session has the fast screen on
+
+    def _apply_view(self, controls):
+        style = (controls.get('theme', DEFAULT_THEME), int(controls.get('font_size', DEFAULT_BASE_FONT_SIZE)))
+        if style != self._style:
+            theme = THEMES.get(style[0], THEMES[DEFAULT_THEME])
+            self._style_figure(self.fig, theme, style[1])
+            self.view.set_theme(theme, style[1])
+            self._style = style
+        display = controls.get('display', 'lines')
+        if display != self.view.display_mode: self.view.set_display_mode(display)
+        fast_screen = bool(controls.get('fast_screen', False))
+        if fast_screen != self.view.fast_screen: self.view.set_fast_screen(fast_screen)
+        spectrum = {'window_name': controls.get('spectrum_window'), 'scale': controls.get('spectrum_scale'),
+                    'averaging': controls.get('spectrum_averaging')}
+        current = {'window_name': self.view.spectrum.window_name, 'scale': self.view.spectrum.scale,
+                   'averaging': self.view.spectrum.averaging}
+        if any(value is not None and value != current[key] for key, value in spectrum.items()): self.view.set_spectrum(**spectrum)
+
+    def _source(self, controls):
+        """The expression or capture source when the session used one (and the file is still there), else None."""
+        if controls.get('func') == 'expr' and controls.get('expression'):
+            if self._expression is None or self._expression.name != controls['expression']:
+                self._expression = ExpressionSource(controls['expression'])
+            return self._expression
+        capture = controls.get('capture')
+        if controls.get('func') != 'capture' or not capture: return None
+        key = (capture['path'], capture.get('sample_rate'))
+        if key != self._capture_key:
+            self._capture_key = key
+            try: self._capture = open_capture(capture['path'], sample_rate=capture.get('sample_rate'))
+            except OSError as e: print(f"Capture '{capture['path']}' not available ({e}); replaying with sin"); self._capture = None
+        if self._capture is None: return None
+        return self._capture.at_offset(float(controls.get('capture_offset', 0.0)))
+
+    def render(self, controls):
+        """One frame for `controls`, as update_plot would draw it."""
+        self._apply_view(controls)
+        params = params_from_controls(controls)
+        source = self._source(controls)
+        if source is None and params.func in ('capture', 'expr'): params = params.with_changes(func='sin')
+        frame = self.engine.compute(params, source)
+        self.trigger.configure(mode=controls.get('trigger_mode', 'free'), slope=controls.get('trigger_slope', 'rising'),
+                               level=controls.get('trigger_level', 0.0), hysteresis=controls.get('trigger_hysteresis', 0.05),
+                               holdoff=controls.get('holdoff_factor', 0.0) * frame.timing.Ty)
+        frame = self.trigger.apply(frame)
+        data_key = frame_data_key(params, source, self.trigger.settings)
+        self.averager.configure(mode=controls.get('averaging', 'normal'), count=controls.get('averaging_count'))
+        if self.averager.mode != 'normal' and frame is not self.trigger.held_frame:
+            frame = self.averager.apply(frame, key=data_key); data_key = (data_key, self.averager.updates)
+        self.measurements.update(frame, key=data_key)
+        self.view.render(frame)
+        if self.view.fast_screen: self._render_raster(frame)
+
+    def _render_raster(self, frame):
+        """Rasterizes the scope panel as the GUI's fast screen does (up to the PPM handed to Tk)."""
+        from raster_screen import RasterScreen
+        bbox = self.view.ax[2].bbox
+        if self.raster is None: self.raster = RasterScreen(bbox.width, bbox.height, theme=self.view.theme)
+        elif self.raster.theme is not self.view.theme: self.raster.set_theme(self.view.theme)
+        self.raster.resize(bbox.width, bbox.height)
+        self.raster.render(frame, self.view.display_mode)
+        self.raster.ppm()
+
+
+def replay(session, player=None, realtime=True, frame_budget=FRAME_BUDGET):
+    """
+    Replays `session` and returns a report dict. In real time, each frame
+    applies every event whose timestamp has passed; all but the last of
+    them never get a frame of their own and are counted as dropped.
+    """
+    player = player or SessionPlayer()
+    state = dict(session['initial'])
+    events = session['events']
+    player.render(state) # Initial frame (full draw) is not part of the measurement
+
+    latencies = np.empty(len(events)); frame_times = []
+    kinds = [kind for _, kind, _ in events]
+    dropped = 0
+    start = time.perf_counter()
+    i = 0
+    while i < len(events):
+        if realtime:
+            wait = start + events[i][0] - time.perf_counter()
+            if wait > 0: time.sleep(wait)
+            now = time.perf_counter() - start
+            batch_end = i + 1
+            while batch_end < len(events) and events[batch_end][0] <= now: batch_end += 1
+        else:
+            batch_end = i + 1
+        for _, _, changes in events[i:batch_end]: state.update(changes)
+        frame_start = time.perf_counter()
+        player.render(state)
+        frame_end = time.perf_counter()
+        frame_times.append(frame_end - frame_start)
+        for j in range(i, batch_end):
+            # Real time: from when the event happened; fast: from when its frame started
+            latencies[j] = frame_end - (start + events[j][0] if realtime else frame_start)
+        dropped += batch_end - i - 1
+        i = batch_end
+    wall = time.perf_counter() - start
+
+    frame_times = np.asarray(frame_times)
+    report = {'events': len(events), 'frames': int(frame_times.size), 'dropped_frames': dropped,
+              'over_budget_frames': int(np.sum(frame_times > frame_budget)), 'frame_budget_ms': frame_budget * 1e3,
+              'realtime': realtime, 'recorded_s': events[-1][0] if events else 0.0, 'wall_s': wall,
+              'latency_ms': summarize_ms(latencies), 'frame_ms': summarize_ms(frame_times), 'by_kind': {}}
+    for kind in sorted(set(kinds)):
+        report['by_kind'][kind] = summarize_ms(latencies[[k == kind for k in kinds]])
+    return report
+
+
+def summarize_ms(seconds):
+    if len(seconds) == 0: return None
+    ms = np.asarray(seconds) * 1e3
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'max': float(np.max(ms)), 'count': int(ms.size)}
+
+
+def format_report(report):
+    lat = report['latency_ms']
+    lines = [f"{report['events']} events -> {report['frames']} frames, {report['dropped_frames']} dropped, "
+             f"{report['over_budget_frames']} over {report['frame_budget_ms']:.1f} ms "
+             f"({'real time' if report['realtime'] else 'fast'}, {report['wall_s']:.2f}s for {report['recorded_s']:.2f}s recorded)"]
+    if lat: lines.append(f"latency  p50 {lat['p50']:.1f}  p95 {lat['p95']:.1f}  p99 {lat['p99']:.1f}  max {lat['max']:.1f} ms")
+    for kind, stats in report['by_kind'].items():
+        lines.append(f"  {kind:<12} p50 {stats['p50']:.1f}  p95 {stats['p95']:.1f}  max {stats['max']:.1f} ms  n={stats['count']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded control session headlessly and report latencies.")
+    parser.add_argument('session', help="session file saved from the GUI (.json or .json.gz)")
+    parser.add_argument('--fast', action='store_true', help="render every event back to back instead of at the recorded pace")
+    parser.add_argument('--budget-ms', type=float, default=FRAME_BUDGET * 1e3, help="frame time budget")
+    parser.add_argument('--out', help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        session = load_session(args.session)
+    except (OSError, ValueError) as e:
+        print(f"Error loading session '{args.session}': {e}"); return 1
+    report = replay(session, realtime=not args.fast, frame_budget=args.budget_ms / 1e3)
+    print(format_report(report))
+    if args.out:
+        with open(args.out, 'w') as f: json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,382 @@
+"""
+Headless signal engine for the oscilloscope simulation.
+
+All of the math behind the three plot views (input signal, horizontal sweep,
+forward/return masks) lives here as plain NumPy code. Nothing in this module
+touches Tk or Matplotlib, so it can be imported and driven from scripts and
+tests without a display.
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from decimation import minmax_decimate, should_decimate
+
+# --- Engine Defaults ---
+DEFAULT_POINTS = 1000
+MIN_SWEEP_TIME = 0.001  # Lower bound for Tqt / Tqn (seconds)
+MIN_X_FACTOR = 1e-6
+FUNCS = ('sin', 'cos')
+FUNC_PHASE = {'sin': 0.0, 'cos': 0.5 * np.pi} # cos(x) = sin(x + π/2), so every channel shares one np.sin pass
+
+
+@dataclass(frozen=True)
+class ChannelParams:
+    """Waveform controls of one additional input channel; sweep and record length are shared."""
+    A: float = 1.0
+    x_factor: float = 2.0
+    phi: float = 0.0
+    func: str = 'sin'
+    phi_unit: str = 'deg'
+    enabled: bool = True
+
+    @property
+    def phi_rad(self):
+        return float(np.deg2rad(self.phi)) if self.phi_unit == 'deg' else float(self.phi)
+
+    @property
+    def phi_deg(self):
+        return float(self.phi) if self.phi_unit == 'deg' else float(np.rad2deg(self.phi))
+
+
+@dataclass(frozen=True)
+class SignalParams:
+    """
+    One set of control values, as read from the sliders.
+
+    The fields up to `func` describe channel 1, which also sets the
+    timebase; `channels` holds ChannelParams for channels 2, 3, ...
+    """
+    A: float = 1.0
+    x_factor: float = 2.0
+    phi: float = 0.0
+    tqt_factor: float = 1.0
+    tqn_factor: float = 0.25
+    func: str = 'sin'
+    phi_unit: str = 'deg'
+    points: int = DEFAULT_POINTS
+    channels: tuple = ()
+
+    @property
+    def phi_rad(self):
+        return float(np.deg2rad(self.phi)) if self.phi_unit == 'deg' else float(self.phi)
+
+    @property
+    def phi_deg(self):
+        return float(self.phi) if self.phi_unit == 'deg' else float(np.rad2deg(self.phi))
+
+    def with_changes(self, **changes):
+        """Returns a copy with the given fields replaced."""
+        return replace(self, **changes)
+
+    def active_channels(self):
+        """(channel number, params) of every enabled channel, channel 1 first."""
+        return [(1, self)] + [(i, ch) for i, ch in enumerate(self.channels, start=2) if ch.enabled]
+
+
+@dataclass(frozen=True)
+class SweepTiming:
+    """Derived timing values for one parameter set (all in seconds)."""
+    omega: float
+    Ty: float
+    Tqt: float
+    Tqn: float
+    T_total_sweep: float
+    total_time: float
+
+
+@dataclass
+class Frame:
+    """
+    Result of one engine evaluation.
+
+    `t`, `y` and `x_sweep` are float64 arrays of length `params.points`;
+    `forward_mask`/`return_mask` are boolean arrays of the same length.
+    `sweep_starts` holds the sweep start times of a triggered frame and is
+    None for a free-running sweep. Multi-channel frames carry all enabled
+    channels in `ys` (channels × samples, numbered by `channel_ids`), with
+    `y` being its first row (channel 1).
+    """
+    params: SignalParams
+    timing: SweepTiming
+    t: np.ndarray
+    y: np.ndarray
+    x_sweep: np.ndarray
+    forward_mask: np.ndarray
+    return_mask: np.ndarray
+    sweep_starts: np.ndarray = None
+    ys: np.ndarray = None
+    channel_ids: tuple = (1,)
+
+    @property
+    def channel_data(self):
+        """All channels as a 2D (channels × samples) array."""
+        return self.ys if self.ys is not None else self.y[None, :]
+
+    @property
+    def y_lim(self):
+        amplitude = max(abs(ch.A) for _, ch in self.params.active_channels())
+        return max(amplitude * 1.1, 0.5)
+
+    @property
+    def num_cycles(self):
+        if self.sweep_starts is not None: return int(self.sweep_starts.size)
+        T_total_sweep = self.timing.T_total_sweep
+        if T_total_sweep <= 1e-9: return 1
+        return int(np.ceil(self.timing.total_time / T_total_sweep))
+
+
+@dataclass
+class BatchFrame:
+    """
+    Result of a batched evaluation over a broadcast parameter grid.
+
+    Parameter/timing arrays have the broadcast grid shape `G`; sample arrays
+    have shape `G + (points,)`.
+    """
+    A: np.ndarray
+    x_factor: np.ndarray
+    phi_rad: np.ndarray
+    tqt_factor: np.ndarray
+    tqn_factor: np.ndarray
+    omega: np.ndarray
+    Ty: np.ndarray
+    Tqt: np.ndarray
+    Tqn: np.ndarray
+    T_total_sweep: np.ndarray
+    total_time: np.ndarray
+    t: np.ndarray
+    y: np.ndarray
+    x_sweep: np.ndarray
+    forward_mask: np.ndarray
+
+    @property
+    def shape(self):
+        return self.A.shape
+
+    @property
+    def return_mask(self):
+        return ~self.forward_mask
+
+
+# --- Scalar Helpers ---
+def sweep_timing(params):
+    """Computes omega, Ty, Tqt, Tqn and the displayed time span for `params`."""
+    x_factor = float(params.x_factor)
+    omega = x_factor * np.pi
+    Ty = 2.0 / max(x_factor, MIN_X_FACTOR)  # Period of input signal
+    Tqt = max(MIN_SWEEP_TIME, params.tqt_factor * Ty)
+    Tqn = max(MIN_SWEEP_TIME, params.tqn_factor * Ty)
+    T_total_sweep = Tqt + Tqn
+    total_time = max(0.1, 3 * T_total_sweep, 5 * Ty, 1.5 * Tqt)  # Ensure enough time
+    return SweepTiming(omega, Ty, Tqt, Tqn, T_total_sweep, total_time)
+
+
+def wave_func(func):
+    """NumPy ufunc for the 'sin'/'cos' input selection."""
+    if func not in FUNCS: raise ValueError(f"Unknown input function '{func}', expected one of {FUNCS}")
+    return np.cos if func == 'cos' else np.sin
+
+
+def channel_arrays(channels):
+    """
+    Column vectors (A, omega, phase) for a list of channel params, shaped
+    (channels, 1) to broadcast against a time row. cos channels get +π/2 of
+    phase so a single np.sin covers all of them.
+    """
+    for ch in channels:
+        if ch.func not in FUNCS: raise ValueError(f"Unknown input function '{ch.func}', expected one of {FUNCS}")
+    A = np.array([[ch.A] for ch in channels], dtype=np.float64)
+    omega = np.array([[ch.x_factor * np.pi] for ch in channels], dtype=np.float64)
+    phase = np.array([[ch.phi_rad + FUNC_PHASE[ch.func]] for ch in channels], dtype=np.float64)
+    return A, omega, phase
+
+
+def fill_sweep(t, Tqt, Tqn, out, forward_mask, scratch):
+    """
+    Writes the normalized sweep x(t) into `out` and the forward mask into
+    `forward_mask`. Works for scalar or broadcastable Tqt/Tqn and allocates
+    nothing beyond the buffers passed in.
+    """
+    T_total_sweep = Tqt + Tqn
+    np.remainder(t, T_total_sweep, out=scratch)           # t_cycle
+    np.less(scratch, Tqt, out=forward_mask)
+    np.divide(scratch, Tqt, out=out)                       # forward ramp
+    np.subtract(scratch, Tqt, out=scratch)                 # time in return
+    np.divide(scratch, Tqn, out=scratch)
+    np.subtract(1.0, scratch, out=scratch)                 # return ramp
+    np.copyto(scratch, out, where=forward_mask)
+    np.clip(scratch, 0.0, 1.0, out=out)
+    return out
+
+
+# --- Engine ---
+class SignalEngine:
+    """
+    Reusable evaluator that keeps its sample buffers between calls.
+
+    `compute()` returns a Frame whose arrays are views into the engine's
+    buffers, so they are overwritten by the next call. Use `compute_frame()`
+    when an independent copy is needed.
+    """
+
+    def __init__(self, points=DEFAULT_POINTS):
+        self._points = 0
+        self._n_channels = 1
+        self._allocate(points)
+
+    def _allocate(self, points, n_channels=None):
+        points = int(points)
+        n_channels = self._n_channels if n_channels is None else int(n_channels)
+        if points < 2: raise ValueError(f"points must be >= 2, got {points}")
+        if points == self._points and n_channels == self._n_channels: return
+        if points == self._points:
+            self._n_channels = n_channels
+            self._ys = np.empty((n_channels, points), dtype=np.float64)
+            return
+        self._points = points; self._n_channels = n_channels
+        self._unit = np.arange(points, dtype=np.float64) / points  # linspace(0, 1, endpoint=False)
+        self._t = np.empty(points, dtype=np.float64)
+        self._ys = np.empty((n_channels, points), dtype=np.float64)
+        self._x = np.empty(points, dtype=np.float64)
+        self._scratch = np.empty(points, dtype=np.float64)
+        self._fwd = np.empty(points, dtype=bool)
+        self._ret = np.empty(points, dtype=bool)
+
+    @property
+    def points(self):
+        return self._points
+
+    def compute(self, params, source=None):
+        """
+        Evaluates one parameter set into the engine's buffers. `source` (see
+        sources.py) replaces the built-in sin/cos input of channel 1 when given.
+
+        All enabled channels are evaluated together as one (channels × points)
+        broadcast, so another channel costs one more row, not another pass.
+        """
+        active = params.active_channels()
+        self._allocate(params.points, len(active))
+        timing = sweep_timing(params)
+        t, ys, x = self._t, self._ys, self._x
+
+        np.multiply(self._unit, timing.total_time, out=t)
+        generated = ys[1:] if source is not None else ys
+        channels = [ch for _, ch in active[1:]] if source is not None else [ch for _, ch in active]
+        if channels:
+            A, omega, phase = channel_arrays(channels)
+            np.multiply(omega, t, out=generated)
+            np.add(generated, phase, out=generated)
+            np.sin(generated, out=generated)
+            np.multiply(generated, A, out=generated)
+        if source is not None: source.fill(params, t, ys[0], channels=dict(zip((i for i, _ in active[1:]), ys[1:])))
+
+        fill_sweep(t, timing.Tqt, timing.Tqn, x, self._fwd, self._scratch)
+        np.logical_not(self._fwd, out=self._ret)
+        return Frame(params, timing, t, ys[0], x, self._fwd, self._ret,
+                     ys=ys, channel_ids=tuple(i for i, _ in active))
+
+
+def _nan_separated(x, y, mask, starts, n_cols=None, x_range=None):
+    """
+    Compresses x/y to `mask` and puts a NaN before every segment start,
+    min/max-decimating to `n_cols` pixel columns when there are enough samples.
+    """
+    selected_starts = starts[mask]
+    n_segments = max(int(np.count_nonzero(selected_starts)), 1)
+    if should_decimate(selected_starts.size, n_cols * n_segments if n_cols else None):
+        return minmax_decimate(x[mask], y[mask], n_cols, x_range=x_range, breaks=selected_starts)
+    positions = np.flatnonzero(selected_starts[1:]) + 1
+    return np.insert(x[mask], positions, np.nan), np.insert(y[mask], positions, np.nan)
+
+
+def sweep_segment_starts(x_sweep, forward_mask):
+    """
+    Marks the first sample of every forward/return segment.
+
+    A segment starts where the sweep direction flips, or where the ramp
+    restarts without a sample of the other direction in between (a forward
+    ramp that drops, a return ramp that jumps up). Works on any window of
+    the sweep, not just one that starts at t = 0.
+    """
+    starts = np.empty(forward_mask.shape, dtype=bool)
+    if starts.size == 0: return starts
+    starts[0] = True
+    np.not_equal(forward_mask[1:], forward_mask[:-1], out=starts[1:])
+    dx = np.diff(x_sweep)
+    starts[1:] |= np.where(forward_mask[1:], dx < 0, dx > 0)
+    return starts
+
+
+def split_sweep_segments(frame, y=None, n_cols=None, x_range=(0.0, 1.0)):
+    """
+    Splits a frame's scope trace into forward and return polylines in one pass.
+
+    Returns `(fwd_x, fwd_y, ret_x, ret_y)` where consecutive sweep segments are
+    separated by NaN, so each direction can be drawn by a single Line2D no
+    matter how many sweep cycles are visible. `y` defaults to `frame.y`.
+    Passing the plot width in pixels as `n_cols` min/max-decimates each
+    segment to about two points per pixel column.
+
+    Samples are assigned by the frame's own sweep (its masks and x), not by
+    recomputed `k·T_total_sweep` boundaries, so every point sits on the
+    ramp it is drawn with. A sample that rounding puts a hair before a cycle
+    boundary (t mod T_total_sweep just under T_total_sweep) is the last,
+    x ≈ 0, point of the return segment, and likewise at the forward/return
+    turn. The original per-cycle loop's `(t >= k·T) & (t < k·T + Tqt)`
+    masks put such samples on either side, depending on how `k·T` rounded.
+    """
+    y = frame.y if y is None else y
+    fwd = frame.forward_mask
+    ret = frame.return_mask
+    starts = sweep_segment_starts(frame.x_sweep, fwd)
+    return (_nan_separated(frame.x_sweep, y, fwd, starts, n_cols, x_range)
+            + _nan_separated(frame.x_sweep, y, ret, starts, n_cols, x_range))
+
+
+def decimate_time_trace(frame, y, n_cols):
+    """Min/max-decimates a trace sampled on `frame.t` to `n_cols` pixel columns."""
+    if not should_decimate(y.size, n_cols): return frame.t, y
+    return minmax_decimate(frame.t, y, n_cols, x_range=(0.0, frame.timing.total_time))
+
+
+def compute_frame(params, source=None):
+    """Evaluates one parameter set and returns a Frame with freshly allocated arrays."""
+    frame = SignalEngine(params.points).compute(params, source)
+    frame.ys = frame.ys.copy(); frame.t = frame.t.copy(); frame.y = frame.ys[0]; frame.x_sweep = frame.x_sweep.copy()
+    frame.forward_mask = frame.forward_mask.copy(); frame.return_mask = frame.return_mask.copy()
+    return frame
+
+
+def compute_frames_batch(A=1.0, x_factor=2.0, phi=0.0, tqt_factor=1.0, tqn_factor=0.25,
+                         func='sin', phi_unit='deg', points=DEFAULT_POINTS):
+    """
+    Evaluates a whole grid of parameter sets in one vectorized broadcast.
+
+    The five parameter arguments may be scalars or arrays and are broadcast
+    against each other with NumPy rules, so e.g. passing `A[:, None]` and
+    `x_factor[None, :]` evaluates the full A × x_factor grid. `phi` is in
+    degrees unless `phi_unit='rad'`, as in SignalParams.
+    """
+    A, x_factor, phi, tqt_factor, tqn_factor = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (A, x_factor, phi, tqt_factor, tqn_factor)))
+    phi_rad = np.deg2rad(phi) if phi_unit == 'deg' else phi
+
+    omega = x_factor * np.pi
+    Ty = 2.0 / np.maximum(x_factor, MIN_X_FACTOR)
+    Tqt = np.maximum(MIN_SWEEP_TIME, tqt_factor * Ty)
+    Tqn = np.maximum(MIN_SWEEP_TIME, tqn_factor * Ty)
+    T_total_sweep = Tqt + Tqn
+    total_time = np.maximum.reduce([np.full_like(Ty, 0.1), 3 * T_total_sweep, 5 * Ty, 1.5 * Tqt])
+
+    unit = np.arange(int(points), dtype=np.float64) / int(points)
+    t = total_time[..., None] * unit
+    y = wave_func(func)(omega[..., None] * t + phi_rad[..., None])
+    y *= A[..., None]
+
+    x_sweep = np.empty_like(t)
+    forward_mask = np.empty(t.shape, dtype=bool)
+    fill_sweep(t, Tqt[..., None], Tqn[..., None], x_sweep, forward_mask, np.empty_like(t))
+
+    return BatchFrame(A, x_factor, phi_rad, tqt_factor, tqn_factor, omega, Ty, Tqt, Tqn,
+                      T_total_sweep, total_time, t, y, x_sweep, forward_mask)
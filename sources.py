@@ -0,0 +1,271 @@
+"""
+Input sources for the signal pipeline.
+
+A source fills the input signal y for a frame's time grid through
+`fill(params, t, out, channels=None)`, where `channels` maps the numbers of
+the other enabled channels to their samples on the same grid.
+FunctionSource is the built-in `A·sin/cos(ωt+φ)` selected by the sin/cos
+radio buttons; CaptureSource plays back recorded waveforms (raw
+int16/float32 dumps, .npy files, WAV) through the same sweep/scope
+pipeline; ExpressionSource evaluates a user expression (expressions.py).
+`data_key` identifies what a source produces for given params, for the
+measurement cache; None means it changes on every frame.
+
+Capture files are opened with np.memmap / np.load(mmap_mode='r'), so opening
+costs the same for a kilobyte as for many gigabytes, and each frame only
+touches the samples inside the window being viewed. Windows holding more
+samples than the frame has points are min/max-decimated block by block.
+"""
+import os
+import struct
+
+import numpy as np
+
+from signal_engine import wave_func
+from expressions import compile_expression
+
+DEFAULT_CAPTURE_RATE = 1000.0 # Samples per second assumed for files without a rate
+READ_BLOCK = 1 << 22 # Samples per block when decimating a large window
+RAW_DTYPES = {'.i16': '<i2', '.raw': '<i2', '.pcm': '<i2', '.f32': '<f4', '.bin': '<f4'}
+CAPTURE_EXTENSIONS = ('.wav', '.npy') + tuple(RAW_DTYPES)
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class FunctionSource:
+    """The built-in `A·func(ωt + φ)` input, with func 'sin' or 'cos'."""
+
+    name = 'function'
+    data_key = 'function'
+
+    def fill(self, params, t, out, channels=None):
+        omega = params.x_factor * np.pi
+        np.multiply(t, omega, out=out)
+        np.add(out, params.phi_rad, out=out)
+        wave_func(params.func)(out, out=out)
+        np.multiply(out, params.A, out=out)
+        return out
+
+
+class CaptureSource:
+    """
+    Recorded waveform backed by a read-only memory map.
+
+    `data` is a 1-D view of the selected channel (possibly strided for
+    interleaved multi-channel files); `scale` converts stored integers to
+    signal units after subtracting `bias` (the mid-scale code of unsigned
+    formats). The frame time grid is shifted by `offset` seconds, so
+    panning is a change of `offset` and zooming is a change of the frame's
+    time span. `A` from the controls acts as a vertical gain.
+
+    The GUI never moves `offset` on the shared source: each frame job gets
+    its own `at_offset` copy, so panning cannot race a frame being filled.
+    """
+
+    def __init__(self, data, sample_rate, scale=1.0, bias=0.0, offset=0.0, name='capture', path=None):
+        if data.ndim != 1: raise ValueError(f"Capture data must be 1-D after channel selection, got shape {data.shape}")
+        if not sample_rate > 0: raise ValueError(f"sample_rate must be positive, got {sample_rate}")
+        self.data = data
+        self.sample_rate = float(sample_rate)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self.offset = float(offset)
+        self.name = name
+        self.path = path
+
+    @property
+    def data_key(self):
+        """File identity (path, or the data itself when not opened from a file), format and position."""
+        return (self.path if self.path is not None else id(self.data), self.sample_rate, self.scale, self.bias, self.offset)
+
+    def at_offset(self, offset):
+        """A copy positioned at `offset` seconds, sharing the memory map."""
+        return CaptureSource(self.data, self.sample_rate, scale=self.scale, bias=self.bias, offset=offset,
+                             name=self.name, path=self.path)
+
+    @property
+    def n_samples(self):
+        return int(self.data.shape[0])
+
+    @property
+    def duration(self):
+        return self.n_samples / self.sample_rate
+
+    def fill(self, params, t, out, channels=None):
+        """Writes the capture over `offset + t` into `out` (0 outside the file), times A."""
+        n_points = out.shape[0]
+        if n_points == 0: return out
+        fs = self.sample_rate
+        start = (self.offset + t[0]) * fs
+        step = (t[1] - t[0]) * fs if n_points > 1 else 1.0
+        i0 = max(int(np.floor(start)), 0)
+        i1 = min(int(np.ceil(start + step * n_points)) + 1, self.n_samples)
+        out.fill(0.0)
+        if i1 <= i0: return out
+
+        if (i1 - i0) > 2 * n_points:
+            self._fill_decimated(start, step, i0, i1, out)
+        else:
+            window = np.asarray(self.data[i0:i1], dtype=np.float64)
+            positions = start + step * np.arange(n_points)
+            inside = (positions >= i0) & (positions <= i1 - 1)
+            out[inside] = np.interp(positions[inside], np.arange(i0, i1), window) - self.bias
+        np.multiply(out, self.scale * params.A, out=out)
+        return out
+
+    def _fill_decimated(self, start, step, i0, i1, out):
+        """Peak-detect decimation: each pair of output points holds one bin's min and max."""
+        n_points = out.shape[0]
+        n_bins = n_points // 2
+        edges = np.floor(start + 2 * step * np.arange(n_bins + 1)).astype(np.int64)
+        np.clip(edges, i0, i1, out=edges)
+        nonempty = edges[1:] > edges[:-1]
+        lo = np.zeros(n_bins); hi = np.zeros(n_bins); rising = np.ones(n_bins, dtype=bool)
+
+        # Walk the window in blocks of whole bins so memory stays bounded for huge windows
+        b = 0
+        while b < n_bins:
+            b_end = int(np.searchsorted(edges, edges[b] + READ_BLOCK, side='right')) - 1
+            b_end = min(max(b_end, b + 1), n_bins)
+            bins = np.arange(b, b_end)[nonempty[b:b_end]]
+            if bins.size:
+                block_start = edges[b]
+                block = np.asarray(self.data[block_start:edges[b_end]], dtype=np.float64)
+                idx = edges[bins] - block_start
+                ends = edges[bins + 1] - block_start - 1
+                lo[bins] = np.minimum.reduceat(block, idx)
+                hi[bins] = np.maximum.reduceat(block, idx)
+                rising[bins] = block[idx] <= block[ends]
+            b = b_end
+
+        np.subtract(lo, self.bias, out=lo); np.subtract(hi, self.bias, out=hi)
+        lo[~nonempty] = 0.0; hi[~nonempty] = 0.0
+        out[0:2 * n_bins:2] = np.where(rising, lo, hi)
+        out[1:2 * n_bins:2] = np.where(rising, hi, lo)
+        if n_points % 2: out[-1] = out[-2]
+
+
+class ExpressionSource:
+    """
+    Channel 1 from an expression such as `A*sin(w*t + phi) + 0.3*sin(3*w*t)`,
+    `square(w*t) + 0.1*noise()` or `ch1*ch2`. The Input Signal controls are
+    the variables A, x, w (= xπ rad/s), f (Hz) and phi (radians); `ch1` is
+    the plain A·sin(ωt+φ) and ch2, ch3, ... are the other enabled channels.
+    The expression is compiled once (and cached by its text), so each
+    frame costs a few ufunc passes. Every source evaluates into its own
+    temporaries, so two sources for the same text can run on two threads.
+    """
+
+    def __init__(self, text):
+        self.expression = compile_expression(text.strip()).copy()
+        self.name = self.expression.text
+        self._ch1 = np.empty(0)
+
+    @property
+    def data_key(self):
+        return None if self.expression.random else self.name
+
+    def fill(self, params, t, out, channels=None):
+        omega = params.x_factor * np.pi
+        variables = {'t': t, 'A': params.A, 'x': params.x_factor, 'w': omega, 'f': omega / (2.0 * np.pi), 'phi': params.phi_rad}
+        if channels: variables.update((f'ch{i}', y) for i, y in channels.items())
+        if 'ch1' in self.expression.names:
+            if self._ch1.shape != t.shape: self._ch1 = np.empty(t.shape)
+            np.multiply(t, omega, out=self._ch1)
+            np.add(self._ch1, params.phi_rad, out=self._ch1)
+            np.sin(self._ch1, out=self._ch1)
+            variables['ch1'] = np.multiply(self._ch1, params.A, out=self._ch1)
+        return self.expression.evaluate(variables, out)
+
+
+def frame_data_key(params, source, trigger=None):
+    """
+    Measurement cache key of a static frame: its parameters, source data
+    and trigger settings (which move the sweep); None (measure every
+    frame) for random sources.
+    """
+    if source is None: return (params, None, trigger)
+    return None if source.data_key is None else (params, source.data_key, trigger)
+
+
+# --- File Opening ---
+def open_capture(path, sample_rate=None, dtype=None, channels=1, channel=0, offset=0.0):
+    """
+    Opens a capture file without reading its samples.
+
+    WAV files carry their own rate, sample format and channel count. Raw
+    dumps use `dtype` (default from the extension: .i16/.raw/.pcm = int16,
+    .f32/.bin = float32) and `channels` for interleaved data; .npy files
+    may be 1-D or (samples, channels). Integer samples are scaled to ±1
+    (unsigned ones around their mid-scale code).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    name = os.path.basename(path)
+    if ext == '.wav':
+        data, wav_rate = _open_wav(path)
+        sample_rate = wav_rate if sample_rate is None else sample_rate
+    elif ext == '.npy':
+        data = np.load(path, mmap_mode='r')
+    else:
+        raw_dtype = np.dtype(dtype if dtype is not None else RAW_DTYPES.get(ext, '<f4'))
+        n_frames = os.path.getsize(path) // (raw_dtype.itemsize * channels)
+        if n_frames == 0: raise ValueError(f"Capture file '{path}' holds no complete samples")
+        data = np.memmap(path, dtype=raw_dtype, mode='r', shape=(n_frames, channels) if channels > 1 else (n_frames,))
+
+    if data.ndim == 2: data = data[:, channel]
+    elif data.ndim != 1: raise ValueError(f"Unsupported capture shape {data.shape} in '{path}'")
+    scale, bias = _int_scale(data.dtype)
+    return CaptureSource(data, sample_rate if sample_rate is not None else DEFAULT_CAPTURE_RATE,
+                         scale=scale, bias=bias, offset=offset, name=name, path=os.path.abspath(path))
+
+
+def _int_scale(dtype):
+    """(scale, bias) mapping stored integer codes onto ±1; floats pass through."""
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'i': return 1.0 / float(-np.iinfo(dtype).min), 0.0
+    if dtype.kind == 'u':
+        mid = (float(np.iinfo(dtype).max) + 1.0) / 2.0
+        return 1.0 / mid, mid
+    return 1.0, 0.0
+
+
+def _open_wav(path):
+    """Parses RIFF chunk headers and memory-maps the 'data' chunk as (frames, channels)."""
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE': raise ValueError(f"'{path}' is not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8: raise ValueError(f"No 'data' chunk found in '{path}'")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size % 2: f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+    if fmt is None: raise ValueError(f"No 'fmt ' chunk before 'data' in '{path}'")
+
+    audio_format, channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if audio_format == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        audio_format = struct.unpack('<H', fmt[24:26])[0] # First two bytes of the SubFormat GUID
+    if audio_format == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        dtype = np.dtype(f'<f{bits // 8}')
+    elif audio_format == WAVE_FORMAT_PCM and bits in (8, 16, 32):
+        dtype = np.dtype('u1' if bits == 8 else f'<i{bits // 8}')
+    else:
+        raise ValueError(f"Unsupported WAV encoding (format {audio_format}, {bits} bits) in '{path}'")
+
+    # Streaming writers often leave the data size as 0 or 0xFFFFFFFF; trust the file size instead
+    available = file_size - data_offset
+    data_size = chunk_size if 0 < chunk_size <= available else available
+    n_frames = data_size // block_align
+    if n_frames == 0: raise ValueError(f"WAV file '{path}' holds no samples")
+    data = np.memmap(path, dtype=dtype, mode='r', offset=data_offset, shape=(n_frames, channels))
+    return data, float(sample_rate)
@@ -0,0 +1,133 @@
+"""
+Frequency-domain (spectrum analyzer) view of the input channels.
+
+Each frame is windowed and transformed with np.fft.rfft, all channels in one
+call. Window arrays are built once per (window, length) and cached. The
+transform length is capped independently of the display: records longer
+than `fft_size` are analysed over their first `fft_size` samples, and the
+resulting bins are reduced to one peak per pixel column before drawing.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+WINDOWS = ('rectangular', 'hann', 'blackman-harris', 'flat-top')
+SCALES = ('db', 'linear')
+AVERAGING = ('none', 'rms', 'peak')
+DEFAULT_WINDOW = 'hann'
+DEFAULT_FFT_SIZE = 1 << 21 # Largest transform; longer records are truncated to this many samples
+DEFAULT_AVERAGES = 8 # Frames in the RMS running average
+DB_RANGE = 120.0 # Displayed dB span below the top of the scale
+DB_FLOOR = 1e-12 # Amplitude floor so log10 never sees zero
+
+# Cosine-sum coefficients a0, a1, ... of w[k] = Σ (-1)^j a_j cos(2πjk/N)
+_COSINE_WINDOWS = {
+    'hann': (0.5, 0.5),
+    'blackman-harris': (0.35875, 0.48829, 0.14128, 0.01168),
+    'flat-top': (0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368),
+}
+
+
+@lru_cache(maxsize=16)
+def window(name, n):
+    """Periodic (DFT-even) window of length `n`; cached and returned read-only."""
+    if name not in WINDOWS: raise ValueError(f"Unknown window '{name}', expected one of {WINDOWS}")
+    if name == 'rectangular':
+        w = np.ones(n)
+    else:
+        phase = 2.0 * np.pi * np.arange(n) / n
+        w = np.zeros(n)
+        for j, a in enumerate(_COSINE_WINDOWS[name]):
+            w += (-1) ** j * a * np.cos(j * phase)
+    w.flags.writeable = False
+    return w
+
+
+@lru_cache(maxsize=16)
+def amplitude_correction(name, n):
+    """Factor turning |rfft| of a windowed record into single-sided peak amplitude."""
+    return 2.0 / float(np.sum(window(name, n)))
+
+
+class SpectrumAnalyzer:
+    """
+    Windowed rfft of (channels × samples) records with optional averaging.
+
+    'rms' averaging keeps a running mean of the power over the last
+    `averages` frames; 'peak' holds the maximum amplitude seen per bin.
+    The averaged state restarts whenever the bin layout changes.
+    """
+
+    def __init__(self, window_name=DEFAULT_WINDOW, scale='db', averaging='none', averages=DEFAULT_AVERAGES,
+                 fft_size=DEFAULT_FFT_SIZE):
+        self.window_name = window_name
+        self.scale = scale
+        self.averaging = averaging
+        self.averages = averages
+        self.fft_size = int(fft_size)
+        self.frames_averaged = 0
+        self._state = None # Averaged power (rms) or amplitude (peak), shape (channels, bins)
+        self._state_key = None
+        self._windowed = np.empty((0, 0))
+
+    def configure(self, window_name=None, scale=None, averaging=None, averages=None):
+        """Changes settings; a new window or averaging mode restarts the average."""
+        if window_name is not None and window_name not in WINDOWS: raise ValueError(f"Unknown window '{window_name}', expected one of {WINDOWS}")
+        if scale is not None and scale not in SCALES: raise ValueError(f"Unknown scale '{scale}', expected one of {SCALES}")
+        if averaging is not None and averaging not in AVERAGING: raise ValueError(f"Unknown averaging '{averaging}', expected one of {AVERAGING}")
+        if window_name not in (None, self.window_name) or averaging not in (None, self.averaging): self.reset()
+        if window_name is not None: self.window_name = window_name
+        if scale is not None: self.scale = scale
+        if averaging is not None: self.averaging = averaging
+        if averages is not None: self.averages = max(int(averages), 1)
+
+    def reset(self):
+        self._state = None
+        self.frames_averaged = 0
+
+    def compute(self, t, ys):
+        """
+        Returns `(freqs, values)` for the uniformly sampled records `ys`
+        (1-D or channels × samples) on the time grid `t`. Values are peak
+        amplitudes, or dB of them with the 'db' scale.
+        """
+        ys = np.atleast_2d(ys)
+        n = min(ys.shape[1], self.fft_size)
+        if n < 2: return np.zeros(1), np.zeros((ys.shape[0], 1))
+        dt = float(t[1] - t[0])
+        freqs = np.fft.rfftfreq(n, dt)
+
+        if self._windowed.shape != (ys.shape[0], n): self._windowed = np.empty((ys.shape[0], n))
+        np.multiply(ys[:, :n], window(self.window_name, n), out=self._windowed)
+        amplitude = np.abs(np.fft.rfft(self._windowed, axis=-1))
+        amplitude *= amplitude_correction(self.window_name, n)
+        amplitude[:, 0] *= 0.5 # DC is not folded
+
+        amplitude = self._average(amplitude, (ys.shape[0], n, dt))
+        if self.scale == 'db':
+            np.maximum(amplitude, DB_FLOOR, out=amplitude)
+            np.log10(amplitude, out=amplitude)
+            amplitude *= 20.0
+        return freqs, amplitude
+
+    def _average(self, amplitude, key):
+        if self.averaging == 'none': return amplitude
+        if key != self._state_key or self._state is None:
+            self._state_key = key
+            self._state = np.square(amplitude) if self.averaging == 'rms' else amplitude.copy()
+            self.frames_averaged = 1
+        elif self.averaging == 'rms':
+            self.frames_averaged += 1
+            weight = 1.0 / min(self.frames_averaged, self.averages)
+            self._state += weight * (np.square(amplitude) - self._state)
+        else:
+            self.frames_averaged += 1
+            np.maximum(self._state, amplitude, out=self._state)
+        return np.sqrt(self._state) if self.averaging == 'rms' else self._state.copy()
+
+    def y_limits(self, y_lim):
+        """Display range for signals bounded by ±`y_lim`."""
+        if self.scale == 'db':
+            top = 20.0 * np.log10(y_lim) + 10.0
+            return top - DB_RANGE, top
+        return 0.0, y_lim
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from acquisition import LiveAcquisition, RingBuffer
+from signal_engine import SignalParams
+
+
+def stream(n, channels=None):
+    values = np.arange(n, dtype=np.float64)
+    return values if channels is None else np.vstack([values + 1000.0 * c for c in range(channels)])
+
+
+@pytest.mark.parametrize('chunk', [1, 3, 7, 10, 25])
+@pytest.mark.parametrize('channels', [None, 3])
+def test_ring_buffer_wraparound_keeps_newest_samples(chunk, channels):
+    capacity = 10
+    ring = RingBuffer(capacity, channels=channels)
+    data = stream(53, channels)
+    out = np.empty(data.shape[:-1] + (capacity,))
+    written = 0
+    while written < data.shape[-1]:
+        ring.write(data[..., written:written + chunk])
+        written = min(written + chunk, data.shape[-1])
+        assert len(ring) == min(written, capacity)
+        for n in (1, 4, capacity):
+            expected = data[..., max(written - n, 0):written]
+            np.testing.assert_array_equal(ring.read_latest(n, out), expected)
+    assert ring.total_written == data.shape[-1]
+
+
+def test_ring_buffer_write_larger_than_capacity():
+    ring = RingBuffer(4)
+    ring.write(stream(2))
+    ring.write(stream(11))
+    assert ring.write_pos == 0 and len(ring) == 4
+    np.testing.assert_array_equal(ring.read_latest(4, np.empty(4)), [7, 8, 9, 10])
+
+
+def test_ring_buffer_clear_and_partial_read():
+    ring = RingBuffer(5)
+    ring.write(stream(3))
+    np.testing.assert_array_equal(ring.read_latest(10, np.empty(5)), [0, 1, 2]) # Never more than was written
+    ring.clear()
+    assert len(ring) == 0 and ring.read_latest(3, np.empty(5)).size == 0
+
+
+def test_live_acquisition_is_phase_continuous_across_chunks():
+    params = SignalParams(points=1000, x_factor=2.0)
+    chunked = LiveAcquisition(params, chunk_size=64)
+    whole = LiveAcquisition(params, chunk_size=4096)
+    for n in (100, 333, 1, 900): chunked.generate(n)
+    whole.generate(1334)
+    np.testing.assert_allclose(chunked.snapshot().ys, whole.snapshot().ys, atol=1e-12)
+    t = np.arange(1334 - 1000, 1334) / whole.sample_rate
+    np.testing.assert_allclose(whole.snapshot().y, np.sin(2.0 * np.pi * t), atol=1e-9)
@@ -0,0 +1,92 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from averaging import SweepAverager
+from signal_engine import SignalParams, compute_frame
+from trigger import TriggerEngine, TriggerSettings
+
+PARAMS = SignalParams(points=4000, x_factor=1.0)
+SIGMA = 0.2
+
+
+def with_ys(frame, ys):
+    ys = np.array(ys, dtype=np.float64)
+    return replace(frame, ys=ys, y=ys[0])
+
+
+def averaged_frames(averager, frame, n_frames, sigma, seed=0):
+    """Feeds `n_frames` fresh acquisitions of `frame` plus white noise; returns the last reduced record."""
+    rng = np.random.default_rng(seed)
+    for _ in range(n_frames):
+        shown = averager.apply(with_ys(frame, frame.ys + rng.normal(0.0, sigma, frame.ys.shape)))
+    return shown.ys
+
+
+@pytest.mark.parametrize('mode', ['average', 'exponential'])
+def test_averaging_reduces_noise(mode):
+    frame = compute_frame(PARAMS)
+    clean = averaged_frames(SweepAverager(mode, 16), frame, 16, 0.0)
+    noisy = averaged_frames(SweepAverager(mode, 16), frame, 16, SIGMA)
+    single = averaged_frames(SweepAverager('normal'), frame, 1, SIGMA)
+    assert np.std(single - frame.ys) == pytest.approx(SIGMA, rel=0.1)
+    assert np.std(noisy - clean) < SIGMA / 3
+
+
+def test_hires_reduces_noise():
+    frame = compute_frame(PARAMS)
+    clean = averaged_frames(SweepAverager('hires', 16), frame, 1, 0.0)
+    noisy = averaged_frames(SweepAverager('hires', 16), frame, 1, SIGMA)
+    assert np.std(noisy - clean) < SIGMA / 3
+
+
+def test_peak_detect_envelope_contains_every_sweep():
+    frame = compute_frame(PARAMS)
+    averager = SweepAverager('peak')
+    rng = np.random.default_rng(3)
+    seen = []
+    for _ in range(8):
+        raw = frame.ys + rng.normal(0.0, SIGMA, frame.ys.shape)
+        seen.append(raw.copy())
+        shown = averager.apply(with_ys(frame, raw)).ys
+    # Samples alternate between their bin's maximum and minimum
+    seen = np.array(seen)
+    assert np.all(shown[:, 0::2] >= seen.max(axis=0)[:, 0::2])
+    assert np.all(shown[:, 1::2] <= seen.min(axis=0)[:, 1::2])
+
+
+def test_unchanged_key_is_not_accumulated_twice():
+    averager = SweepAverager('average', 16)
+    frame = compute_frame(PARAMS)
+    averager.apply(with_ys(frame, frame.ys), key='k')
+    sweeps, updates = averager.sweeps, averager.updates
+    averager.apply(with_ys(frame, frame.ys), key='k')
+    assert (averager.sweeps, averager.updates) == (sweeps, updates)
+
+
+def triggered_frame():
+    params = SignalParams(points=20000, x_factor=1.0, tqt_factor=0.5, tqn_factor=0.1)
+    return TriggerEngine(TriggerSettings(mode='normal', holdoff=0.5)).apply(compute_frame(params))
+
+
+@pytest.mark.parametrize('mode', ['average', 'exponential', 'peak'])
+def test_idle_samples_are_not_counted_or_overwritten(mode):
+    frame = triggered_frame()
+    idle = ~(frame.forward_mask | frame.return_mask)
+    assert idle.any() and frame.sweep_starts.size
+    raw = frame.ys.copy()
+    averager = SweepAverager(mode, 16)
+    shown = averager.apply(with_ys(frame, raw)).ys
+    assert averager.sweeps == frame.sweep_starts.size
+    np.testing.assert_array_equal(shown[:, idle], raw[:, idle])
+
+
+def test_status_strings():
+    averager = SweepAverager('exponential', 16)
+    frame = compute_frame(PARAMS)
+    averaged_frames(averager, frame, 3, 0.0)
+    assert averager.status == f"Exponential (N=16), {averager.sweeps} sweeps"
+    averager.configure(mode='average')
+    assert averager.status == "Average 0/16"
+    with pytest.raises(ValueError): averager.configure(mode='median')
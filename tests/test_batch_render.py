@@ -0,0 +1,32 @@
+import pytest
+
+from batch_render import config_params, parse_axis
+from signal_engine import ChannelParams
+
+
+def test_config_params_builds_channels():
+    params = config_params({'A': 2.0, 'points': '500', 'channels': [{'x_factor': 3.0}, {'func': 'cos', 'enabled': False}]})
+    assert params.A == 2.0 and params.points == 500
+    assert params.channels == (ChannelParams(x_factor=3.0), ChannelParams(func='cos', enabled=False))
+
+
+@pytest.mark.parametrize('channels', ['x', 3, {'A': 1.0}, ['x'], [1.0]])
+def test_config_params_rejects_malformed_channels(channels):
+    with pytest.raises(ValueError, match="'channels'"):
+        config_params({'channels': channels})
+
+
+def test_config_params_names_unknown_channel_keys():
+    with pytest.raises(ValueError, match=r"\['gain'\] in 'channels'\[1\]"):
+        config_params({'channels': [{}, {'gain': 2.0}]})
+
+
+def test_config_params_rejects_unknown_keys():
+    with pytest.raises(ValueError, match='amplitude'):
+        config_params({'amplitude': 1.0})
+
+
+def test_parse_axis():
+    assert parse_axis('phi=-90,0,90') == ('phi', [-90.0, 0.0, 90.0])
+    assert parse_axis('A=0:1:3') == ('A', [0.0, 0.5, 1.0])
+    with pytest.raises(ValueError): parse_axis('phi')
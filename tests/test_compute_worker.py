@@ -0,0 +1,195 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from compute_worker import Cancelled, ComputeWorker
+from signal_engine import SignalParams
+
+TIMEOUT = 5.0
+
+
+def wait_for_result(worker):
+    deadline = time.perf_counter() + TIMEOUT
+    while time.perf_counter() < deadline:
+        result = worker.poll()
+        if result is not None: return result
+        time.sleep(0.001)
+    raise AssertionError("no result from the compute worker")
+
+
+@pytest.fixture
+def worker_factory():
+    workers = []
+    def make(pipeline, **kwargs):
+        workers.append(ComputeWorker(pipeline, **kwargs))
+        return workers[-1]
+    yield make
+    for worker in workers: worker.stop()
+
+
+def test_newer_job_abandons_the_running_one(worker_factory):
+    started = threading.Event(); proceed = threading.Event()
+    stages = []
+
+    def pipeline(engine, job, checkpoint):
+        if job == 'old':
+            started.set(); proceed.wait(TIMEOUT)
+        checkpoint()
+        stages.append(job)
+        return job
+
+    worker = worker_factory(pipeline, max_stale=60.0)
+    worker.submit('old')
+    assert started.wait(TIMEOUT)
+    worker.submit('new')
+    proceed.set()
+    result = wait_for_result(worker)
+    assert result.value == 'new' and stages == ['new']
+    assert worker.cancelled == 1 and worker.completed == 1
+    worker.release(result)
+
+
+def test_queued_job_is_replaced_before_it_starts(worker_factory):
+    release = threading.Event()
+    worker = worker_factory(lambda engine, job, checkpoint: release.wait(TIMEOUT) and job, max_stale=60.0)
+    worker.submit('first')
+    time.sleep(0.05)
+    worker.submit('second'); worker.submit('third') # 'second' is replaced while 'first' runs
+    release.set()
+    values = []
+    while len(values) < 2 and worker.busy:
+        result = wait_for_result(worker)
+        values.append(result.value); worker.release(result)
+    assert 'second' not in values and values[-1] == 'third'
+
+
+def test_stale_frames_are_finished_anyway(worker_factory):
+    started = threading.Event(); proceed = threading.Event()
+
+    def pipeline(engine, job, checkpoint):
+        if job == 'old': started.set(); proceed.wait(TIMEOUT)
+        checkpoint()
+        return job
+
+    worker = worker_factory(pipeline, max_stale=0.0) # Nothing delivered for "too long": finish superseded jobs
+    worker.submit('old'); assert started.wait(TIMEOUT)
+    worker.submit('new'); proceed.set()
+    seen = []
+    while worker.busy or not seen:
+        result = wait_for_result(worker)
+        seen.append(result.value); worker.release(result)
+    assert seen[-1] == 'new' and worker.cancelled == 0
+
+
+def test_buffers_are_reused_in_fifo_order(worker_factory):
+    worker = worker_factory(lambda engine, job, checkpoint: engine)
+    slots = []
+    for job in range(6):
+        worker.submit(job)
+        result = wait_for_result(worker)
+        assert result.value is worker.engines[result.slot]
+        slots.append(result.slot); worker.release(result)
+    assert slots == [0, 1, 0, 1, 0, 1]
+
+
+def test_buffer_on_screen_is_not_written(worker_factory):
+    worker = worker_factory(lambda engine, job, checkpoint: engine.compute(SignalParams(points=500, A=job)))
+    worker.submit(1.0)
+    shown = wait_for_result(worker) # Held, as while the Tk thread draws it
+    y = shown.value.y.copy()
+    for A in (2.0, 3.0):
+        worker.submit(A)
+        result = wait_for_result(worker)
+        assert result.slot != shown.slot
+        worker.release(result)
+    np.testing.assert_array_equal(shown.value.y, y)
+    worker.release(shown)
+
+
+def test_pipeline_errors_free_the_buffer(worker_factory, capsys):
+    def pipeline(engine, job, checkpoint):
+        if job == 'bad': raise RuntimeError('boom')
+        return job
+    worker = worker_factory(pipeline)
+    worker.submit('bad')
+    deadline = time.perf_counter() + TIMEOUT
+    while worker.busy and time.perf_counter() < deadline: time.sleep(0.001)
+    worker.submit('good')
+    result = wait_for_result(worker)
+    assert result.value == 'good' and 'boom' in capsys.readouterr().out
+    worker.release(result)
+
+
+# --- The GUI pipeline, headless ---
+class Var:
+    """Stand-in for a Tk variable or slider."""
+    def __init__(self, value): self.value = value
+    def get(self): return self.value
+    def set(self, value): self.value = value
+
+
+@pytest.fixture
+def gui(monkeypatch):
+    osc = pytest.importorskip('oscilloscope')
+    from matplotlib.figure import Figure
+    from averaging import SweepAverager
+    from measurements import MeasurementEngine
+    from scope_view import ScopeView
+    from trigger import TriggerEngine
+    controls = dict(trigger_mode_var='normal', trigger_slope_var='rising', trig_level_slider=0.1, trig_hyst_slider=0.05,
+                    holdoff_factor_slider=0.0, trig_level_var='', trig_hyst_var='', holdoff_factor_var='',
+                    averaging_mode_var='average', averaging_count_var='16',
+                    spectrum_window_var='hann', spectrum_scale_var='db', spectrum_avg_var='rms')
+    for name, value in controls.items(): monkeypatch.setattr(osc, name, Var(value))
+    monkeypatch.setattr(osc, 'trigger_engine', TriggerEngine())
+    monkeypatch.setattr(osc, 'sweep_averager', SweepAverager())
+    monkeypatch.setattr(osc, 'measurement_engine', MeasurementEngine())
+    monkeypatch.setattr(osc, 'scope_view', ScopeView(Figure(), lock=osc.engine_lock))
+    return osc
+
+
+def engine_state(osc):
+    spectrum = osc.scope_view.spectrum
+    return {'trigger': (osc.trigger_engine.settings, osc.trigger_engine.last_trigger_count),
+            'average': (osc.sweep_averager.mode, osc.sweep_averager.updates, osc.sweep_averager.sweeps),
+            'measure': (osc.measurement_engine.frames, len(osc.measurement_engine.stats)),
+            'spectrum': (spectrum.window_name, spectrum.averaging, spectrum.frames_averaged)}
+
+
+def make_job(osc, params):
+    settings = {'trigger': osc.read_trigger_settings(osc.sweep_timing(params)), 'averaging': osc.read_averaging_settings(),
+                'spectrum': osc.read_spectrum_settings()}
+    return (params, None, osc.scope_view.columns(), osc.frame_data_key(params, None, settings['trigger']), settings)
+
+
+STAGES = ['trigger', 'average', 'measure', 'spectrum']
+
+
+@pytest.mark.parametrize('cancel_at', range(len(STAGES)))
+def test_abandoned_job_leaves_later_engines_unchanged(gui, cancel_at):
+    from signal_engine import SignalEngine
+    engine = SignalEngine()
+    gui.compute_pipeline(engine, make_job(gui, SignalParams(points=5000)), lambda: None) # Warm state to compare against
+    before = engine_state(gui)
+    calls = []
+
+    def checkpoint():
+        calls.append(None)
+        if len(calls) > cancel_at: raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        gui.compute_pipeline(engine, make_job(gui, SignalParams(points=5000, x_factor=3.0)), checkpoint)
+    after = engine_state(gui)
+    for stage in STAGES[cancel_at:]: assert after[stage] == before[stage], stage
+
+
+def test_pipeline_uses_the_settings_copied_into_the_job(gui):
+    from signal_engine import SignalEngine
+    job = make_job(gui, SignalParams(points=5000))
+    gui.averaging_mode_var.set('peak'); gui.spectrum_window_var.set('flattop'); gui.trigger_mode_var.set('free')
+    frame, measured, status, traces = gui.compute_pipeline(SignalEngine(), job, lambda: None)
+    assert gui.sweep_averager.mode == 'average' and gui.scope_view.spectrum.window_name == 'hann'
+    assert gui.trigger_engine.settings.mode == 'normal' and frame.sweep_starts is not None
+    assert status[1].startswith('Average') and set(measured[0]) >= {1, 'sweep'}
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from decimation import minmax_decimate, peak_decimate, pixel_columns, should_decimate
+from signal_engine import SignalParams, compute_frame, decimate_time_trace, split_sweep_segments
+
+
+def column_envelope(x, y, n_cols, x_range):
+    """{column: (min, max)} of the points that are not NaN separators, by a plain loop."""
+    keep = ~np.isnan(x)
+    x, y = x[keep], y[keep]
+    envelope = {}
+    for col, value in zip(pixel_columns(x, n_cols, x_range), y):
+        lo, hi = envelope.get(col, (value, value))
+        envelope[col] = (min(lo, value), max(hi, value))
+    return envelope
+
+
+@pytest.mark.parametrize('n, n_cols', [(100_000, 640), (1001, 7), (9_999, 333), (50, 3)])
+def test_minmax_keeps_the_per_column_envelope(n, n_cols):
+    rng = np.random.default_rng(n)
+    x = np.linspace(0.0, 2.0, n, endpoint=False)
+    y = np.sin(2 * np.pi * 3 * x) + rng.normal(0, 0.3, n)
+    y[rng.integers(0, n, 5)] = [9.0, -9.0, 7.5, -4.0, 6.0] # Narrow spikes must survive
+    x_out, y_out = minmax_decimate(x, y, n_cols, x_range=(0.0, 2.0))
+    assert x_out.size <= 2 * n_cols
+    assert column_envelope(x_out, y_out, n_cols, (0.0, 2.0)) == column_envelope(x, y, n_cols, (0.0, 2.0))
+    assert np.all(np.diff(x_out) >= 0)
+
+
+def test_runs_keep_visiting_order():
+    x = np.arange(8.0); y = np.array([0.0, 1.0, 2.0, 3.0, 3.0, 2.0, 1.0, 0.0])
+    x_out, y_out = minmax_decimate(x, y, 2, x_range=(0.0, 8.0))
+    np.testing.assert_array_equal(y_out, [0.0, 3.0, 3.0, 0.0]) # Rising run min first, falling run max first
+    np.testing.assert_array_equal(x_out, [0.0, 3.0, 4.0, 7.0])
+
+
+def test_few_samples_are_not_decimated():
+    frame = compute_frame(SignalParams(points=1000))
+    assert not should_decimate(1000, 1000) and not should_decimate(1000, 250) and should_decimate(1001, 250)
+    assert not should_decimate(10**6, None)
+    t, y = decimate_time_trace(frame, frame.y, 1000)
+    assert t is frame.t and y is frame.y
+    # Fewer samples than columns: every sample is its own run and comes back unchanged
+    x = np.linspace(0.0, 1.0, 20, endpoint=False); values = np.cos(x)
+    x_out, y_out = minmax_decimate(x, values, 100, x_range=(0.0, 1.0))
+    np.testing.assert_array_equal(x_out[0::2], x); np.testing.assert_array_equal(y_out[0::2], values)
+    np.testing.assert_array_equal(y_out[1::2], values)
+
+
+def test_breaks_become_nan_separators():
+    x = np.tile(np.linspace(0.0, 1.0, 1000, endpoint=False), 3)
+    y = np.concatenate([np.full(1000, 1.0), np.full(1000, 2.0), np.full(1000, 3.0)])
+    breaks = np.zeros(x.size, dtype=bool); breaks[[0, 1000, 2000]] = True
+    x_out, y_out = minmax_decimate(x, y, 10, x_range=(0.0, 1.0), breaks=breaks)
+    assert np.count_nonzero(np.isnan(x_out)) == 2
+    segments = np.split(y_out, np.flatnonzero(np.isnan(y_out)))
+    assert [set(s[~np.isnan(s)]) for s in segments] == [{1.0}, {2.0}, {3.0}]
+
+
+@pytest.mark.parametrize('points', [100_000, 123_457])
+def test_decimated_sweep_split_keeps_segments_and_envelope(points):
+    frame = compute_frame(SignalParams(points=points, x_factor=10.0, tqt_factor=0.05, tqn_factor=0.05))
+    full = split_sweep_segments(frame)
+    decimated = split_sweep_segments(frame, n_cols=200)
+    for (x, y), (dx, dy) in ((full[0:2], decimated[0:2]), (full[2:4], decimated[2:4])):
+        assert np.count_nonzero(np.isnan(dx)) == np.count_nonzero(np.isnan(x))
+        assert dx.size < x.size
+        for seg, dseg in zip(np.split(np.arange(x.size), np.flatnonzero(np.isnan(x))),
+                             np.split(np.arange(dx.size), np.flatnonzero(np.isnan(dx)))):
+            assert column_envelope(dx[dseg], dy[dseg], 200, (0.0, 1.0)) == column_envelope(x[seg], y[seg], 200, (0.0, 1.0))
+
+
+def test_peak_decimate_keeps_column_maxima():
+    x = np.geomspace(1.0, 1e4, 5001); y = np.random.default_rng(0).normal(size=x.size)
+    log_x = np.log10(x)
+    px, py = peak_decimate(log_x, y, 97)
+    assert px.size == len(column_envelope(log_x, y, 97, None))
+    assert {col: hi for col, (_, hi) in column_envelope(log_x, y, 97, None).items()} == dict(zip(pixel_columns(px, 97, (0.0, 4.0)), py))
+
+
+def test_empty_input():
+    x_out, y_out = minmax_decimate(np.empty(0), np.empty(0), 10)
+    assert x_out.size == 0 and y_out.size == 0
+    assert peak_decimate(np.empty(0), np.empty(0), 10)[0].size == 0
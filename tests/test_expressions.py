@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from expressions import compile_expression, sawtooth, square, triangle
+
+T = np.linspace(-1.0, 3.0, 1001)
+SCALARS = {'A': 1.5, 'x': 2.0, 'w': 2.0 * np.pi, 'f': 1.0, 'phi': 0.3}
+CH2 = np.cos(3.0 * T)
+
+
+def evaluate(text, out=None):
+    out = np.empty_like(T) if out is None else out
+    return compile_expression(text).evaluate(dict(SCALARS, t=T, ch2=CH2), out)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('A*sin(w*t + phi) + 0.3*sin(3*w*t)', lambda: 1.5 * np.sin(2 * np.pi * T + 0.3) + 0.3 * np.sin(3 * 2 * np.pi * T)),
+    ('-t**2 / (1 + abs(t)) % 0.7', lambda: np.remainder(-T ** 2 / (1 + np.abs(T)), 0.7)),
+    ('exp(-abs(t)) * cos(2*pi*f*t)', lambda: np.exp(-np.abs(T)) * np.cos(2 * np.pi * T)),
+    ('clip(ch2 * A, -1, 0.5) + max(t, 0) - min(t, 1)', lambda: np.clip(CH2 * 1.5, -1, 0.5) + np.maximum(T, 0) - np.minimum(T, 1)),
+    ('sqrt(abs(t)) + log10(1 + t*t) + tanh(t) + sign(t) + floor(t)',
+     lambda: np.sqrt(np.abs(T)) + np.log10(1 + T * T) + np.tanh(T) + np.sign(T) + np.floor(T)),
+    ('square(w*t, 0.25) + triangle(w*t) * sawtooth(w*t + phi)',
+     lambda: square(2 * np.pi * T, 0.25) + triangle(2 * np.pi * T) * sawtooth(2 * np.pi * T + 0.3)),
+    ('sin(sin(sin(t) + cos(t)) * (t + 1) - (t - 1) / 3)', lambda: np.sin(np.sin(np.sin(T) + np.cos(T)) * (T + 1) - (T - 1) / 3)),
+    ('A * x + phi', lambda: np.full_like(T, 1.5 * 2.0 + 0.3)),
+    ('2 * pi + e', lambda: np.full_like(T, 2 * np.pi + np.e)),
+])
+def test_matches_numpy(text, expected):
+    np.testing.assert_allclose(evaluate(text), expected(), rtol=1e-12, atol=1e-12)
+
+
+def test_repeated_evaluation_reuses_temporaries():
+    text = 'sin(t) * cos(t) + t'
+    first = evaluate(text).copy()
+    np.testing.assert_array_equal(evaluate(text), first)
+    assert compile_expression(text) is compile_expression(text)
+
+
+def test_waveform_helpers():
+    theta = 2 * np.pi * np.array([0.0, 0.1, 0.3, 0.6, 0.9])
+    np.testing.assert_allclose(square(theta), [1, 1, 1, -1, -1])
+    np.testing.assert_allclose(sawtooth(theta), [-1, -0.8, -0.4, 0.2, 0.8])
+    np.testing.assert_allclose(triangle(theta), [0, 0.4, 0.8, -0.4, -0.4], atol=1e-12)
+
+
+def test_noise_is_random_and_scaled():
+    expression = compile_expression('noise(0.5)')
+    assert expression.random and not compile_expression('sin(t)').random
+    out = expression.evaluate({}, np.empty(100_000))
+    assert np.std(out) == pytest.approx(0.5, rel=0.02)
+
+
+@pytest.mark.parametrize('text', [
+    "__import__('os').system('true')",
+    "t.__class__",
+    "(lambda: 1)()",
+    "[t for t in t]",
+    "sin(t) if t else 0",
+    "t[0]",
+    "open('x')",
+    "sin(t, out=t)",
+    "t < 1",
+    "'text'",
+    "True",
+    "a = 1",
+    "y",
+    "sin(",
+    "",
+    "t +" + " t +" * 200 + " t",
+])
+def test_rejects_unsafe_or_invalid_syntax(text):
+    with pytest.raises(ValueError):
+        compile_expression(text)
+
+
+def test_wrong_argument_count():
+    with pytest.raises(ValueError, match='takes 1 positional'):
+        compile_expression('sin(t, t)')
+
+
+def test_missing_channel_is_reported():
+    with pytest.raises(ValueError, match='ch3'):
+        compile_expression('ch3 + t').evaluate({'t': T}, np.empty_like(T))
+
+
+def test_sources_for_the_same_text_do_not_share_temporaries():
+    from signal_engine import SignalParams
+    from sources import ExpressionSource
+    text = 'sin(t) * cos(3*t) + ch1 * t'
+    first, second = ExpressionSource(text), ExpressionSource(text)
+    assert first.expression is not second.expression # compile_expression() itself is cached by text
+    params = SignalParams()
+    out_first, out_second = np.empty_like(T), np.empty_like(T)
+    first.fill(params, T, out_first)
+    second.fill(params, T, out_second)
+    np.testing.assert_array_equal(out_first, out_second)
+    assert first.expression._temps and second.expression._temps
+    for a in first.expression._temps:
+        assert not any(np.shares_memory(a, b) for b in second.expression._temps)
+
+
+def test_copy_has_its_own_noise_generator():
+    expression = compile_expression('noise() + t')
+    clone = expression.copy()
+    assert clone._rng is not expression._rng
+    assert all(func.__self__ is clone for func, _, _ in clone.steps if getattr(func, '__name__', '') == '_noise')
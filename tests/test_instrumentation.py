@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+import pytest
+
+import instrumentation
+from instrumentation import FrameProfiler, TimingRing
+
+
+def test_ring_keeps_the_last_capacity_samples():
+    ring = TimingRing(capacity=4)
+    for ms in range(1, 7): ring.add(ms * 1e-3)
+    assert ring.total == 6 and ring.index == 2
+    np.testing.assert_allclose(np.sort(ring.values()), [3e-3, 4e-3, 5e-3, 6e-3])
+
+
+def test_ring_summary_across_the_wrap():
+    ring = TimingRing(capacity=4)
+    assert ring.summary() is None
+    for ms in (10, 20, 30, 40, 1, 2): ring.add(ms * 1e-3)
+    summary = ring.summary()
+    assert summary['count'] == 6
+    assert summary['last_ms'] == pytest.approx(2.0)
+    assert summary['max_ms'] == pytest.approx(40.0)
+    assert summary['mean_ms'] == pytest.approx(np.mean([30, 40, 1, 2]))
+    assert summary['p50_ms'] == pytest.approx(np.percentile([30, 40, 1, 2], 50))
+
+
+def test_last_sample_at_the_end_of_the_buffer():
+    ring = TimingRing(capacity=3)
+    for ms in (1, 2, 3): ring.add(ms * 1e-3)
+    assert ring.index == 0 and ring.summary()['last_ms'] == pytest.approx(3.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(instrumentation.time, 'perf_counter', lambda: now[0])
+    return now
+
+
+def test_stages_record_durations(clock):
+    profiler = FrameProfiler(capacity=8)
+    for ms in (5, 7):
+        with profiler.stage('compute'): clock[0] += ms * 1e-3
+    assert profiler.stage('compute') is profiler.stage('compute') # Reused
+    np.testing.assert_allclose(profiler.rings['compute'].values(), [5e-3, 7e-3])
+
+
+def test_fps_over_the_window(clock):
+    profiler = FrameProfiler(capacity=4)
+    assert profiler.fps() == 0.0
+    for _ in range(10):
+        with profiler.frame(): clock[0] += 0.01
+        clock[0] += 0.01
+    assert profiler.fps() == pytest.approx(50.0) # One frame every 20 ms
+    assert profiler.rings['frame'].total == 10
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = FrameProfiler(enabled=False)
+    with profiler.frame():
+        with profiler.stage('draw'): pass
+    profiler.count('coalesced')
+    assert profiler.stats() == {'fps': 0.0, 'counters': {}, 'stages': {}}
+
+
+def test_counters_report_and_dump(clock, tmp_path, capsys):
+    profiler = FrameProfiler()
+    profiler.count('coalesced'); profiler.count('coalesced', 2)
+    with profiler.stage('draw'): clock[0] += 0.02
+    profiler.dump()
+    report = capsys.readouterr().out
+    assert 'coalesced 3' in report and 'draw' in report and '20.00' in report
+    path = tmp_path / 'stats.json'
+    profiler.dump(path)
+    stats = json.loads(path.read_text())
+    assert stats['counters'] == {'coalesced': 3} and stats['stages']['draw']['count'] == 1
+    profiler.reset()
+    assert profiler.stats()['stages'] == {}
+
+
+def test_hud_text_is_throttled(clock):
+    profiler = FrameProfiler()
+    with profiler.stage('draw'): clock[0] += 0.01
+    text = profiler.hud_text()
+    assert 'draw' in text and 'compute' not in text
+    with profiler.stage('compute'): clock[0] += 0.01
+    assert profiler.hud_text() is text
+    clock[0] += instrumentation.HUD_REFRESH
+    assert 'compute' in profiler.hud_text()
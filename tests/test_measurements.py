@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from acquisition import LiveAcquisition
+from measurements import MeasurementEngine, RunningStats, measure, measure_channel
+from signal_engine import SignalParams
+
+FS = 10_000.0
+
+
+def grid(seconds=2.0, fs=FS):
+    return np.arange(int(seconds * fs)) / fs
+
+
+def test_sine_frequency_and_vpp():
+    t = grid()
+    result = measure_channel(t, 1.5 * np.sin(2 * np.pi * 7.0 * t) + 0.2)
+    assert result['frequency'] == pytest.approx(7.0, rel=1e-4)
+    assert result['period'] == pytest.approx(1 / 7.0, rel=1e-4)
+    assert result['vpp'] == pytest.approx(3.0, rel=1e-3)
+    assert result['mean'] == pytest.approx(0.2, abs=1e-3)
+    assert result['rms'] == pytest.approx(np.sqrt(1.5 ** 2 / 2 + 0.2 ** 2), rel=1e-3)
+    assert result['duty'] == pytest.approx(0.5, abs=1e-3)
+
+
+@pytest.mark.parametrize('duty', [0.2, 0.5, 0.75])
+def test_square_wave_duty(duty):
+    t = grid()
+    y = np.where((t * 5.0) % 1.0 < duty, 1.0, -1.0)
+    result = measure_channel(t, y)
+    assert result['frequency'] == pytest.approx(5.0, rel=1e-3)
+    assert result['vpp'] == pytest.approx(2.0)
+    assert result['duty'] == pytest.approx(duty, abs=2e-3)
+
+
+def test_rise_time_of_a_ramp_edge():
+    t = grid()
+    # Trapezoid: 10 ms linear edges, so 10%..90% takes 8 ms
+    y = np.interp((t * 4.0) % 1.0, [0.0, 0.04, 0.5, 0.54, 1.0], [0.0, 1.0, 1.0, 0.0, 0.0])
+    result = measure_channel(t, y)
+    assert result['rise_time'] == pytest.approx(0.008, rel=1e-2)
+    assert result['fall_time'] == pytest.approx(0.008, rel=1e-2)
+
+
+@pytest.mark.parametrize('degrees', [-120.0, -30.0, 45.0, 170.0])
+def test_phase_between_channels(degrees):
+    t = grid()
+    omega = 2 * np.pi * 3.0
+    results = measure(t, np.vstack((np.sin(omega * t), 0.5 * np.sin(omega * t + np.radians(degrees)))))
+    assert results[0]['phase'] == 0.0
+    assert results[1]['phase'] == pytest.approx(degrees, abs=0.5)
+
+
+def test_phase_needs_matching_frequencies():
+    t = grid()
+    results = measure(t, np.vstack((np.sin(2 * np.pi * 3.0 * t), np.sin(2 * np.pi * 5.0 * t))))
+    assert np.isnan(results[1]['phase'])
+
+
+def test_flat_record_has_no_timing_measurements():
+    result = measure_channel(grid(), np.full(grid().size, 0.3))
+    assert result['vpp'] == 0.0
+    assert np.isnan(result['frequency']) and np.isnan(result['duty'])
+
+
+def test_running_stats_merge_matches_numpy():
+    values = np.random.default_rng(0).normal(3.0, 2.0, 1000)
+    stats = RunningStats()
+    for batch in np.array_split(values, 7): stats.add(batch)
+    stats.add([np.nan])
+    assert stats.count == values.size
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std == pytest.approx(values.std())
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+
+def test_static_key_measures_once():
+    t = grid()
+    frame = SimpleNamespace(t=t, channel_data=np.sin(2 * np.pi * 7.0 * t)[None, :], channel_ids=(1,))
+    engine = MeasurementEngine(include_sweep=False)
+    for _ in range(3): engine.update(frame, key='same')
+    assert engine.frames == 1
+    assert engine.statistic(1, 'frequency').count == 12 # 13 complete rising edges in 2 s of 7 Hz
+
+
+def test_live_statistics_count_each_cycle_once():
+    acquisition = LiveAcquisition(SignalParams(points=2000, x_factor=2.0))
+    engine = MeasurementEngine(include_sweep=False)
+    for _ in range(40):
+        acquisition.generate(300)
+        engine.update(acquisition.snapshot(), sample_index=acquisition.sample_index)
+    # Same cycles as measuring the whole stream in one record
+    t = np.arange(acquisition.sample_index) / acquisition.sample_rate
+    whole = measure_channel(t, np.sin(2.0 * np.pi * t))
+    assert engine.statistic(1, 'frequency').count == whole['cycles']['frequency'].size
+    assert engine.statistic(1, 'rise_time').count == whole['cycles']['rise_time'].size
+    assert engine.statistic(1, 'frequency').mean == pytest.approx(1.0, rel=1e-3)
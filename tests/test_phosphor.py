@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from phosphor import PhosphorDisplay
+from signal_engine import ChannelParams, SignalParams, compute_frame
+
+
+def display(width=10, height=4, **kwargs):
+    return PhosphorDisplay(width, height, x_range=(0.0, 1.0), y_range=(0.0, 1.0), **kwargs)
+
+
+def test_samples_land_in_their_pixel():
+    screen = display()
+    screen.accumulate([0.05, 0.95, 0.95], [0.1, 0.9, 0.9], interpolate=False)
+    expected = np.zeros((4, 10)); expected[0, 0] = 1; expected[3, 9] = 2
+    np.testing.assert_array_equal(screen.hits, expected)
+    assert screen.waveforms == 1
+
+
+def test_off_screen_and_nan_samples_are_dropped():
+    screen = display()
+    screen.accumulate([-0.1, 1.0, 0.5, np.nan, 0.5], [0.5, 0.5, 1.5, 0.5, np.nan], interpolate=False)
+    assert screen.hits.sum() == 0
+
+
+def test_fade_decays_exponentially():
+    screen = display(decay=0.5)
+    screen.accumulate([0.5] * 8, [0.5] * 8, interpolate=False)
+    for expected in (4.0, 2.0, 1.0):
+        screen.fade()
+        assert screen.hits.max() == pytest.approx(expected)
+
+
+def test_accumulation_adds_on_top_of_decayed_hits():
+    screen = display(decay=0.5)
+    screen.accumulate([0.5] * 4, [0.5] * 4, interpolate=False)
+    screen.fade()
+    screen.accumulate([0.5] * 4, [0.5] * 4, interpolate=False, waveforms=3)
+    assert screen.hits[2, 5] == pytest.approx(6.0) and screen.waveforms == 4
+
+
+def test_interpolation_connects_samples():
+    screen = display(height=1)
+    screen.accumulate([0.05, 0.95], [0.5, 0.5])
+    assert (screen.hits[0] > 0).all()
+
+
+def test_breaks_keep_segments_apart():
+    screen = display(height=1)
+    screen.accumulate([0.05, 0.35, 0.65, 0.95], [0.5] * 4, breaks=np.array([True, False, True, False]))
+    assert screen.hits[0, 4:6].sum() == 0 # Nothing drawn between the two segments
+    assert (screen.hits[0, :4] > 0).all() and (screen.hits[0, 6:] > 0).all()
+
+
+def test_batch_shape_is_flattened():
+    screen = display()
+    x = np.tile([0.05, 0.95], (3, 1)); y = np.full((3, 2), 0.1)
+    screen.accumulate(x, y, interpolate=False, waveforms=3)
+    assert screen.hits[0, 0] == 3 and screen.hits[0, 9] == 3 and screen.waveforms == 3
+
+
+def test_resize_and_new_ranges_clear():
+    screen = display()
+    screen.accumulate([0.5], [0.5], interpolate=False)
+    screen.resize(10, 4)
+    assert screen.hits.sum() == 1 # Same size: kept
+    screen.set_ranges((0.0, 2.0), (0.0, 1.0))
+    assert screen.hits.sum() == 0 and screen.waveforms == 0
+    screen.accumulate([0.5], [0.5], interpolate=False)
+    screen.resize(20, 8)
+    assert screen.shape == (8, 20) and screen.hits.sum() == 0
+
+
+def test_intensity_is_log_scaled_to_the_peak():
+    screen = display()
+    assert screen.intensity().max() == 0
+    screen.accumulate([0.05] * 9 + [0.95], [0.1] * 10, interpolate=False)
+    intensity = screen.intensity()
+    assert intensity[0, 0] == pytest.approx(1.0)
+    assert intensity[0, 9] == pytest.approx(np.log1p(1) / np.log1p(9))
+    assert intensity is screen.intensity() # Reused buffer
+
+
+def test_accumulate_frame_counts_every_sweep_of_every_channel():
+    frame = compute_frame(SignalParams(points=2000, channels=(ChannelParams(x_factor=3.0),)))
+    screen = PhosphorDisplay(200, 100, x_range=(-1.0, 1.0), y_range=(-1.5, 1.5))
+    screen.accumulate_frame(frame)
+    assert screen.waveforms == frame.num_cycles * 2
+    assert screen.hits.sum() >= frame.t.size * 2
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+import raster_screen
+from raster_screen import RasterScreen, rgba32
+from signal_engine import SignalParams, compute_frame
+from themes import THEMES, DEFAULT_THEME
+
+THEME = THEMES[DEFAULT_THEME]
+RED = rgba32('red')
+
+
+def lit(screen, color=RED):
+    return screen._pixels32 == color
+
+
+def naive_spans(width, height, cols, top, bottom):
+    mask = np.zeros((height, width), dtype=bool)
+    for col, t, b in zip(cols, top, bottom):
+        t, b = max(t, 0), min(b, height - 1)
+        if 0 <= col < width and t <= b: mask[t:b + 1, col] = True
+    return mask
+
+
+def test_rgba32_is_bytes_in_memory_order():
+    pixel = np.zeros((1, 1, 4), dtype=np.uint8)
+    pixel.view(np.uint32)[0, 0, 0] = rgba32((1.0, 0.5, 0.0, 1.0))
+    assert list(pixel[0, 0]) == [255, 128, 0, 255]
+
+
+def test_coordinates_cover_the_screen():
+    screen = RasterScreen(11, 5)
+    screen.x_range = (0.0, 1.0); screen.y_range = (-1.0, 1.0)
+    assert list(screen.to_columns(np.array([0.0, 0.5, 1.0, -0.5, 2.0, np.nan]))) == [0, 5, 10, -1, 11, -1]
+    assert list(screen.to_rows(np.array([1.0, 0.0, -1.0, 5.0]))) == [0, 2, 4, -1]
+
+
+@pytest.mark.parametrize('direct', [True, False])
+def test_fill_spans_lights_exactly_the_spans(monkeypatch, direct):
+    monkeypatch.setattr(raster_screen, 'SPAN_PIXELS_DIRECT', 1.0 if direct else 0.0)
+    screen = RasterScreen(20, 12)
+    rng = np.random.default_rng(3)
+    cols = rng.integers(-2, 22, 40); top = rng.integers(-3, 14, 40); bottom = top + rng.integers(-2, 8, 40)
+    screen.fill_spans(cols, top, bottom, RED)
+    np.testing.assert_array_equal(lit(screen), naive_spans(20, 12, cols, top, bottom))
+
+
+def test_draw_segments_include_both_ends():
+    screen = RasterScreen(10, 10)
+    screen.draw_segments(np.array([0, 9]), np.array([0, 0]), np.array([9, 9]), np.array([9, 5]), RED)
+    mask = lit(screen)
+    assert mask[np.arange(10), np.arange(10)].all() # Diagonal
+    assert mask[0:6, 9].all()
+    assert mask.sum() == 10 + 6
+
+
+def test_segments_off_screen_are_clipped():
+    screen = RasterScreen(10, 10)
+    screen.draw_segments(np.array([-5]), np.array([5]), np.array([15]), np.array([5]), RED)
+    assert lit(screen)[5].all() and lit(screen).sum() == 10
+
+
+def test_render_draws_over_the_graticule():
+    screen = RasterScreen(200, 100, theme=THEME)
+    frame = compute_frame(SignalParams(points=5000))
+    pixels = screen.render(frame)
+    assert pixels is screen.pixels and pixels.shape == (100, 200, 4)
+    assert (screen._pixels32[0] == rgba32(THEME['spine'])).all()
+    fwd = lit(screen, rgba32(THEME['trace_yt_fwd']))
+    first, last = screen.to_columns(np.array([frame.x_sweep.min(), frame.x_sweep.max()]))
+    assert fwd.any(axis=0)[first + 1:last].all() # The forward sweep crosses every column it spans
+    background = screen._background.view(np.uint32)[..., 0]
+    assert not (background == rgba32(THEME['trace_yt_fwd'])).any()
+
+
+def test_ppm_header_and_pixels():
+    screen = RasterScreen(7, 3)
+    screen.pixels[...] = np.arange(7 * 3 * 4, dtype=np.uint8).reshape(3, 7, 4)
+    ppm = screen.ppm()
+    header = b'P6 7 3 255\n'
+    assert bytes(ppm[:len(header)]) == header and len(ppm) == len(header) + 7 * 3 * 3
+    rgb = np.frombuffer(bytes(ppm[len(header):]), dtype=np.uint8).reshape(3, 7, 3)
+    np.testing.assert_array_equal(rgb, screen.pixels[..., :3])
+
+
+def test_ppm_buffer_is_reused_until_the_size_changes():
+    screen = RasterScreen(7, 3)
+    ppm = screen.ppm()
+    screen.pixels[0, 0, :3] = (1, 2, 3)
+    assert screen.ppm() is ppm and bytes(ppm[11:14]) == b'\x01\x02\x03'
+    screen.resize(12, 4)
+    resized = screen.ppm()
+    assert resized is not ppm and bytes(resized).startswith(b'P6 12 4 255\n')
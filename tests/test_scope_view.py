@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from scope_view import ScopeView
+from signal_engine import SignalParams, compute_frame
+
+
+def make_view():
+    fig = Figure(figsize=(6, 8), dpi=50)
+    FigureCanvasAgg(fig)
+    fig.subplots(4, 1)
+    return ScopeView(fig)
+
+
+def pixels(view):
+    return np.asarray(view.fig.canvas.buffer_rgba()).copy()
+
+
+@pytest.fixture
+def frames():
+    return [compute_frame(SignalParams(points=2000, phi=phi)) for phi in (0.0, 30.0, 60.0)]
+
+
+def test_phi_ticks_blit_and_reuse_the_sweep_layer(frames):
+    view = make_view()
+    view.render(frames[0])
+    view.render(frames[1])
+    layer = view._sweep_layer
+    view.render(frames[2])
+    assert view.full_redraws == 1 and view.blit_redraws == 2
+    assert view._sweep_layer is layer
+
+
+def test_sweep_layer_matches_a_plain_blit(frames):
+    view = make_view()
+    for frame in frames: view.render(frame)
+    layered = pixels(view)
+    view._sweep_layer = None # Redraw the sweep panel from the background
+    view.blit_dynamic()
+    np.testing.assert_array_equal(pixels(view), layered)
+
+
+def test_sweep_layer_follows_the_sweep_texts(frames):
+    view = make_view()
+    view.render(frames[0]); view.render(frames[1])
+    layer = view._sweep_layer
+    view.sweep_texts[0].set_visible(False)
+    view.blit_dynamic()
+    assert view._sweep_layer is not layer
+
+
+def test_full_draw_drops_the_sweep_layer(frames):
+    view = make_view()
+    view.render(frames[0]); view.render(frames[1])
+    view.fig.canvas.draw()
+    assert view._sweep_layer is None
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+import session as session_module
+from session import SessionPlayer, SessionRecorder, load_session, params_from_controls, replay, save_session
+
+INITIAL = {'A': 1.0, 'x_factor': 2.0, 'phi': 0.0, 'tqt_factor': 1.0, 'tqn_factor': 0.25, 'func': 'sin', 'phi_unit': 'deg',
+           'points': 2000, 'theme': 'Dark Scope', 'display': 'lines'}
+
+
+class StatePlayer:
+    """Player stand-in that keeps every control state it was asked to render."""
+    def __init__(self, delay=0.0):
+        self.states = []; self.delay = delay
+    def render(self, controls):
+        self.states.append(dict(controls))
+        time.sleep(self.delay)
+
+
+def record(steps):
+    recorder = SessionRecorder(INITIAL)
+    controls = dict(INITIAL)
+    for kind, changes in steps:
+        controls = dict(controls, **changes)
+        recorder.record(controls, kind)
+    return recorder
+
+
+STEPS = [('slider', {'phi': 10.0}), ('slider', {'phi': 20.0, 'A': 1.5}), ('phi_unit', {'phi_unit': 'rad', 'phi': 0.35}),
+         ('theme', {'theme': 'Light'})]
+
+
+def test_recorder_stores_only_changes():
+    recorder = record(STEPS)
+    assert [kind for _, kind, _ in recorder.events] == [kind for kind, _ in STEPS]
+    assert recorder.events[1][2] == {'phi': 20.0, 'A': 1.5}
+    assert not recorder.record(dict(INITIAL, phi=0.35, A=1.5, phi_unit='rad', theme='Light'))
+    times = [t for t, _, _ in recorder.events]
+    assert times == sorted(times) and recorder.duration == times[-1]
+
+
+@pytest.mark.parametrize('name', ['session.json', 'session.json.gz'])
+def test_save_load_round_trip(tmp_path, name):
+    recorder = record(STEPS)
+    path = str(tmp_path / name)
+    recorder.save(path)
+    loaded = load_session(path)
+    assert loaded['initial'] == INITIAL
+    assert loaded['events'] == [list(event) for event in recorder.events]
+
+
+def test_load_rejects_other_versions(tmp_path):
+    path = str(tmp_path / 'old.json')
+    save_session(path, {'version': session_module.SESSION_VERSION + 1, 'initial': {}, 'events': []})
+    with pytest.raises(ValueError, match='version'): load_session(path)
+
+
+def test_replay_applies_every_event_in_order(tmp_path):
+    path = str(tmp_path / 'session.json.gz')
+    record(STEPS).save(path)
+    player = StatePlayer()
+    report = replay(load_session(path), player=player, realtime=False)
+    assert player.states[0] == INITIAL
+    expected = dict(INITIAL)
+    for state, (_, changes) in zip(player.states[1:], STEPS):
+        expected.update(changes)
+        assert state == expected
+    assert report['events'] == report['frames'] == len(STEPS) and report['dropped_frames'] == 0
+    assert set(report['by_kind']) == {'slider', 'phi_unit', 'theme'} and report['by_kind']['slider']['count'] == 2
+
+
+def test_realtime_replay_coalesces_events_behind_a_slow_frame():
+    session = {'version': session_module.SESSION_VERSION, 'initial': INITIAL,
+               'events': [[0.0, 'slider', {'phi': 1.0}], [0.001, 'slider', {'phi': 2.0}], [0.002, 'slider', {'phi': 3.0}]]}
+    player = StatePlayer(delay=0.05)
+    report = replay(session, player=player, realtime=True)
+    assert report['frames'] == 2 and report['dropped_frames'] == 1
+    assert [state['phi'] for state in player.states] == [0.0, 1.0, 3.0]
+    assert report['latency_ms']['count'] == 3
+
+
+def test_params_from_controls():
+    params = params_from_controls(dict(INITIAL, points='500', channels=[{'x_factor': 3.0}], theme='Light'))
+    assert params.points == 500 and params.channels[0].x_factor == 3.0
+
+
+def test_session_player_replays_headlessly(tmp_path):
+    path = str(tmp_path / 'session.json')
+    record(STEPS + [('display', {'display': 'phosphor'}), ('trigger', {'trigger_mode': 'normal', 'trigger_level': 0.2})]).save(path)
+    player = SessionPlayer(figsize=(5, 6), dpi=50)
+    report = replay(load_session(path), player=player, realtime=False)
+    assert report['frames'] == len(STEPS) + 2
+    assert player.view.display_mode == 'phosphor' and player.trigger.settings.mode == 'normal'
+    assert player.view.full_redraws >= 1
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+from signal_engine import ChannelParams, SignalEngine, SignalParams, compute_frame, compute_frames_batch, fill_sweep, sweep_timing
+
+
+def baseline(A=1.0, x_factor=2.0, phi=0.0, phi_unit='deg', tqt_factor=1.0, tqn_factor=0.25, func='sin', points=1000):
+    """The signal math of the original update_plot, line for line."""
+    omega = x_factor * np.pi
+    phi_rad = np.deg2rad(phi) if phi_unit == 'deg' else phi
+    Ty = 2.0 / max(x_factor, 1e-6)
+    Tqt = max(0.001, tqt_factor * Ty)
+    Tqn = max(0.001, tqn_factor * Ty)
+    T_total_sweep = Tqt + Tqn
+    total_time = max(0.1, 3 * T_total_sweep, 5 * Ty, 1.5 * Tqt)
+    t = np.linspace(0, total_time, points, endpoint=False)
+    y = A * (np.cos if func == 'cos' else np.sin)(omega * t + phi_rad)
+    x = np.zeros_like(t)
+    t_cycle = t % T_total_sweep
+    forward = t_cycle < Tqt
+    x[forward] = t_cycle[forward] / Tqt
+    x[~forward] = 1.0 - (t_cycle[~forward] - Tqt) / Tqn
+    return {'t': t, 'y': y, 'x': np.clip(x, 0, 1), 'forward': forward, 'Ty': Ty, 'Tqt': Tqt, 'Tqn': Tqn,
+            'total_time': total_time}
+
+
+CASES = [
+    dict(),
+    dict(func='cos'),
+    dict(A=2.5, phi=45.0),
+    dict(phi=-1.2, phi_unit='rad', func='cos'),
+    dict(x_factor=10.0, tqt_factor=0.05, tqn_factor=0.05),
+    dict(x_factor=0.1, tqt_factor=5.0, tqn_factor=0.05, points=3333),
+    dict(x_factor=3.7, tqt_factor=0.3, tqn_factor=1.7, phi=270.0),
+]
+
+
+def assert_matches_baseline(t, y, x, forward, expected):
+    np.testing.assert_allclose(t, expected['t'], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(y, expected['y'], rtol=1e-9, atol=1e-9)
+    np.testing.assert_array_equal(forward, expected['forward'])
+    np.testing.assert_allclose(x, expected['x'], rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_compute_frame_matches_baseline(case):
+    expected = baseline(**case)
+    params = SignalParams(**{key: value for key, value in case.items()})
+    frame = compute_frame(params)
+    timing = sweep_timing(params)
+    assert (timing.Ty, timing.Tqt, timing.Tqn, timing.total_time) == pytest.approx(
+        (expected['Ty'], expected['Tqt'], expected['Tqn'], expected['total_time']))
+    assert_matches_baseline(frame.t, frame.y, frame.x_sweep, frame.forward_mask, expected)
+    np.testing.assert_array_equal(frame.return_mask, ~frame.forward_mask)
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_compute_frames_batch_matches_baseline(case):
+    case = dict(case)
+    points = case.pop('points', 1000)
+    expected = baseline(points=points, **case)
+    batch = compute_frames_batch(points=points, **case)
+    assert_matches_baseline(batch.t, batch.y, batch.x_sweep, batch.forward_mask, expected)
+
+
+def test_batch_grid_matches_single_frames():
+    A = np.array([0.5, 1.0, 2.0]); x_factor = np.array([1.0, 2.5, 7.0, 10.0])
+    batch = compute_frames_batch(A=A[:, None], x_factor=x_factor[None, :], phi=30.0, tqt_factor=0.4, points=800)
+    assert batch.shape == (3, 4) and batch.y.shape == (3, 4, 800)
+    for i, a in enumerate(A):
+        for j, x in enumerate(x_factor):
+            frame = compute_frame(SignalParams(A=a, x_factor=x, phi=30.0, tqt_factor=0.4, points=800))
+            np.testing.assert_allclose(batch.y[i, j], frame.y, atol=1e-12)
+            np.testing.assert_allclose(batch.x_sweep[i, j], frame.x_sweep, atol=1e-12)
+
+
+def test_batch_phi_defaults_to_degrees():
+    degrees = compute_frames_batch(phi=90.0, points=100)
+    radians = compute_frames_batch(phi=np.pi / 2, phi_unit='rad', points=100)
+    np.testing.assert_allclose(degrees.y, radians.y)
+    np.testing.assert_allclose(degrees.y, compute_frame(SignalParams(phi=90.0, points=100)).y)
+
+
+def test_engine_buffer_reuse_does_not_change_results():
+    engine = SignalEngine()
+    settings = [SignalParams(points=500), SignalParams(points=2000, func='cos', x_factor=5.0),
+                SignalParams(points=500, channels=(ChannelParams(A=0.3, x_factor=3.0, enabled=True),)),
+                SignalParams(points=500, tqt_factor=0.05, tqn_factor=0.05, phi=-30.0)]
+    for params in settings * 2:
+        frame = engine.compute(params)
+        fresh = compute_frame(params)
+        for name in ('t', 'x_sweep', 'forward_mask', 'return_mask'):
+            np.testing.assert_array_equal(getattr(frame, name), getattr(fresh, name))
+        np.testing.assert_array_equal(frame.channel_data, fresh.channel_data)
+        assert frame.channel_ids == fresh.channel_ids
+
+
+def test_extra_channels_follow_the_same_formula():
+    params = SignalParams(points=700, channels=(ChannelParams(A=0.5, x_factor=4.0, phi=30.0, func='cos', enabled=True),
+                                                ChannelParams(A=9.0, enabled=False)))
+    frame = compute_frame(params)
+    assert frame.channel_ids == (1, 2)
+    np.testing.assert_allclose(frame.ys[1], 0.5 * np.cos(4.0 * np.pi * frame.t + np.deg2rad(30.0)), atol=1e-12)
+
+
+def test_fill_sweep_broadcasts_per_row():
+    t = np.linspace(0.0, 3.0, 301)[None, :].repeat(2, axis=0)
+    Tqt = np.array([[0.5], [1.0]]); Tqn = np.array([[0.25], [0.5]])
+    x = np.empty_like(t); forward = np.empty(t.shape, dtype=bool)
+    fill_sweep(t, Tqt, Tqn, x, forward, np.empty_like(t))
+    for row in range(2):
+        phase = t[row] % (Tqt[row, 0] + Tqn[row, 0])
+        np.testing.assert_array_equal(forward[row], phase < Tqt[row, 0])
+        expected = np.where(phase < Tqt[row, 0], phase / Tqt[row, 0], 1.0 - (phase - Tqt[row, 0]) / Tqn[row, 0])
+        np.testing.assert_allclose(x[row], np.clip(expected, 0, 1), atol=1e-12)
@@ -0,0 +1,98 @@
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from signal_engine import SignalParams
+from sources import CaptureSource, frame_data_key, open_capture
+
+FS = 100.0
+PARAMS = SignalParams()
+
+
+def fill(source, n, step=1.0, params=PARAMS):
+    t = np.arange(n) * step / FS
+    return source.fill(params, t, np.full(n, np.nan))
+
+
+@pytest.fixture
+def ramp():
+    return CaptureSource(np.arange(50, dtype=np.float32) + 1.0, FS)
+
+
+def test_fill_inside_the_file_reads_samples(ramp):
+    np.testing.assert_array_equal(fill(ramp.at_offset(0.1), 5), [11, 12, 13, 14, 15])
+
+
+def test_fill_before_the_start_is_zero(ramp):
+    out = fill(ramp.at_offset(-0.03), 6)
+    np.testing.assert_array_equal(out, [0, 0, 0, 1, 2, 3])
+
+
+def test_fill_past_the_end_is_zero(ramp):
+    out = fill(ramp.at_offset(0.47), 6)
+    np.testing.assert_array_equal(out, [48, 49, 50, 0, 0, 0])
+
+
+def test_fill_entirely_outside_is_zero(ramp):
+    assert not fill(ramp.at_offset(-1.0), 10).any()
+    assert not fill(ramp.at_offset(0.5), 10).any()
+
+
+def test_fill_interpolates_between_samples_and_applies_gain(ramp):
+    out = fill(ramp.at_offset(0.105), 3, params=SignalParams(A=2.0))
+    np.testing.assert_allclose(out, [23.0, 25.0, 27.0])
+
+
+def test_decimated_window_keeps_extremes_at_the_edges():
+    data = np.zeros(10_000, dtype=np.float32)
+    data[0] = -5.0; data[-1] = 7.0; data[5_000] = 3.0
+    source = CaptureSource(data, FS)
+    out = fill(source, 100, step=100.0) # 10 000 samples over 100 points
+    assert out.min() == -5.0 and out.max() == 7.0 and 3.0 in out
+    # A window hanging over the end decimates the part inside the file and zero-fills the rest
+    out = fill(source.at_offset(50.0), 100, step=100.0)
+    assert out.max() == 7.0 and not out[60:].any()
+
+
+def test_scale_and_bias():
+    source = CaptureSource(np.array([0, 128, 255], dtype=np.uint8), FS, scale=1 / 128, bias=128.0)
+    np.testing.assert_allclose(fill(source, 3), [-1.0, 0.0, 127 / 128])
+
+
+def test_data_key_identifies_file_format_and_offset(tmp_path):
+    path = tmp_path / 'ramp.npy'
+    np.save(path, np.arange(10, dtype=np.float32))
+    first = open_capture(str(path))
+    assert open_capture(str(path)).data_key == first.data_key
+    assert open_capture(str(path), sample_rate=500.0).data_key != first.data_key
+    assert first.at_offset(1.0).data_key != first.data_key
+    other = CaptureSource(np.arange(10.0), first.sample_rate)
+    assert other.data_key != CaptureSource(np.arange(10.0), first.sample_rate).data_key
+    assert frame_data_key(PARAMS, first) != frame_data_key(PARAMS, first.at_offset(1.0))
+
+
+def test_at_offset_leaves_the_original_untouched(ramp):
+    moved = ramp.at_offset(0.2)
+    assert ramp.offset == 0.0 and moved.offset == 0.2 and moved.data is ramp.data
+
+
+def test_open_raw_int16_and_stereo_wav(tmp_path):
+    raw = tmp_path / 'capture.i16'
+    np.array([0, 16384, -32768], dtype='<i2').tofile(raw)
+    source = open_capture(str(raw), sample_rate=FS)
+    np.testing.assert_allclose(fill(source, 3), [0.0, 0.5, -1.0])
+
+    path = tmp_path / 'stereo.wav'
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(2); f.setsampwidth(2); f.setframerate(8000)
+        f.writeframes(struct.pack('<6h', 100, -16384, 200, 0, 300, 16384))
+    right = open_capture(str(path), channel=1)
+    assert right.sample_rate == 8000.0 and right.n_samples == 3
+    np.testing.assert_allclose(np.asarray(right.data), [-16384, 0, 16384])
+
+
+def test_rejects_bad_data():
+    with pytest.raises(ValueError): CaptureSource(np.zeros((2, 2)), FS)
+    with pytest.raises(ValueError): CaptureSource(np.zeros(4), 0.0)
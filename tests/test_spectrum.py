@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from spectrum import SpectrumAnalyzer, amplitude_correction, window
+
+N = 1024
+FS = 1024.0
+T = np.arange(N) / FS
+
+
+def tone(freq, amplitude=1.0, phase=0.0):
+    return amplitude * np.sin(2 * np.pi * freq * T + phase)
+
+
+def test_windows_are_cached_and_read_only():
+    w = window('hann', N)
+    assert window('hann', N) is w
+    assert window('hann', N // 2) is not w
+    with pytest.raises(ValueError): w[0] = 1.0
+    with pytest.raises(ValueError): window('kaiser', N)
+
+
+@pytest.mark.parametrize('name, reference', [('rectangular', np.ones(N + 1)), ('hann', np.hanning(N + 1))])
+def test_windows_are_periodic(name, reference):
+    np.testing.assert_allclose(window(name, N), reference[:-1], atol=1e-12)
+
+
+@pytest.mark.parametrize('name', ['rectangular', 'hann', 'blackman-harris', 'flat-top'])
+def test_matches_np_fft(name):
+    ys = np.stack([tone(50, 0.5), tone(120, 2.0, 1.0) + 0.25])
+    freqs, values = SpectrumAnalyzer(name, scale='linear').compute(T, ys)
+    expected = np.abs(np.fft.rfft(ys * window(name, N), axis=-1)) * amplitude_correction(name, N)
+    expected[:, 0] /= 2
+    np.testing.assert_allclose(freqs, np.fft.rfftfreq(N, 1 / FS))
+    np.testing.assert_allclose(values, expected, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', ['rectangular', 'flat-top'])
+def test_bin_centred_tone_reads_its_amplitude(name):
+    freqs, values = SpectrumAnalyzer(name, scale='linear').compute(T, tone(64, 1.5) + 0.5)
+    assert values[0, 64] == pytest.approx(1.5, rel=1e-3)
+    assert values[0, 0] == pytest.approx(0.5, rel=1e-3)
+
+
+def test_db_scale():
+    analyzer = SpectrumAnalyzer('rectangular')
+    _, values = analyzer.compute(T, tone(64, 0.1))
+    assert values[0, 64] == pytest.approx(-20.0)
+    assert values.min() >= 20 * np.log10(1e-12)
+
+
+def test_fft_size_truncates_the_record():
+    freqs, values = SpectrumAnalyzer(scale='linear', fft_size=256).compute(T, tone(64))
+    assert freqs.size == 129 and values.shape == (1, 129)
+    np.testing.assert_allclose(freqs, np.fft.rfftfreq(256, 1 / FS))
+
+
+def spectra(analyzer, amplitudes):
+    return [analyzer.compute(T, tone(64, a))[1][0, 64] for a in amplitudes]
+
+
+def test_rms_averaging_is_the_mean_power():
+    analyzer = SpectrumAnalyzer('rectangular', scale='linear', averaging='rms', averages=4)
+    amplitudes = [1.0, 2.0, 3.0]
+    values = spectra(analyzer, amplitudes)
+    for i, value in enumerate(values, start=1):
+        assert value == pytest.approx(np.sqrt(np.mean(np.square(amplitudes[:i]))))
+    assert analyzer.frames_averaged == 3
+
+
+def test_rms_averaging_becomes_exponential_after_averages_frames():
+    analyzer = SpectrumAnalyzer('rectangular', scale='linear', averaging='rms', averages=2)
+    values = spectra(analyzer, [1.0, 1.0, 3.0])
+    assert values[-1] == pytest.approx(np.sqrt(0.5 * 1.0 + 0.5 * 9.0))
+
+
+def test_peak_averaging_holds_the_maximum():
+    analyzer = SpectrumAnalyzer('rectangular', scale='linear', averaging='peak')
+    assert spectra(analyzer, [1.0, 3.0, 2.0]) == pytest.approx([1.0, 3.0, 3.0])
+
+
+def test_average_restarts_on_new_settings_or_bins():
+    analyzer = SpectrumAnalyzer('rectangular', scale='linear', averaging='peak')
+    spectra(analyzer, [3.0])
+    analyzer.configure(scale='db') # Scale only: kept
+    analyzer.configure(scale='linear')
+    assert spectra(analyzer, [1.0]) == pytest.approx([3.0])
+    analyzer.configure(window_name='hann')
+    assert analyzer.frames_averaged == 0
+    analyzer.configure(window_name='rectangular')
+    spectra(analyzer, [3.0])
+    _, values = analyzer.compute(T[:512], tone(64, 1.0)[:512]) # New bin layout
+    assert analyzer.frames_averaged == 1 and values[0, 32] == pytest.approx(1.0)
+
+
+def test_configure_rejects_unknown_settings():
+    analyzer = SpectrumAnalyzer()
+    for settings in ({'window_name': 'kaiser'}, {'scale': 'log'}, {'averaging': 'median'}):
+        with pytest.raises(ValueError): analyzer.configure(**settings)
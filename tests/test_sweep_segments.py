@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from signal_engine import SignalParams, compute_frame, split_sweep_segments, sweep_segment_starts
+
+WORST = dict(x_factor=10.0, tqt_factor=0.05, tqn_factor=0.05)
+CASES = [dict(), WORST, dict(WORST, points=10_000), dict(x_factor=3.7, tqt_factor=0.3, tqn_factor=1.7, points=1234),
+         dict(x_factor=0.5, tqt_factor=5.0, tqn_factor=0.05)]
+
+
+def join(segments):
+    """Polylines joined with NaN separators, as one Line2D draws them."""
+    if not segments: return np.empty(0), np.empty(0)
+    x = np.concatenate([np.append(sx, np.nan) for sx, _ in segments])[:-1]
+    y = np.concatenate([np.append(sy, np.nan) for _, sy in segments])[:-1]
+    return x, y
+
+
+def loop_reference(frame, forward_in_cycle):
+    """The original per-cycle `ax3.plot` loop, with a given rule for which cycle and direction a sample is in."""
+    t, timing = frame.t, frame.timing
+    T = timing.T_total_sweep
+    cycle, forward = forward_in_cycle(t, T, timing.Tqt)
+    fwd, ret = [], []
+    for k in range(int(np.ceil(timing.total_time / T)) + 1):
+        idx_fwd = (cycle == k) & forward
+        idx_ret = (cycle == k) & ~forward
+        if np.any(idx_fwd): fwd.append((frame.x_sweep[idx_fwd], frame.y[idx_fwd]))
+        if np.any(idx_ret): ret.append((frame.x_sweep[idx_ret], frame.y[idx_ret]))
+    return fwd, ret
+
+
+def sweep_phase_rule(t, T, Tqt):
+    """The documented rule: cycle and direction from the sweep phase t mod T, as fill_sweep computes it."""
+    phase = np.remainder(t, T)
+    return np.rint((t - phase) / T).astype(int), phase < Tqt
+
+
+def original_mask_rule(t, T, Tqt):
+    """`(t >= k·T) & (t < k·T + Tqt)` masks of the original loop."""
+    cycle = np.full(t.shape, -1); forward = np.zeros(t.shape, dtype=bool)
+    for k in range(int(np.ceil(t[-1] / T)) + 1):
+        t_start = k * T; t_mid = t_start + Tqt; t_end = (k + 1) * T
+        idx_tqt = (t >= t_start) & (t < t_mid); idx_tqn = (t >= t_mid) & (t < t_end)
+        cycle[idx_tqt | idx_tqn] = k; forward[idx_tqt] = True
+    return cycle, forward
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_split_matches_per_cycle_loop(case):
+    frame = compute_frame(SignalParams(**case))
+    fwd, ret = loop_reference(frame, sweep_phase_rule)
+    fwd_x, fwd_y, ret_x, ret_y = split_sweep_segments(frame)
+    assert np.count_nonzero(np.isnan(fwd_x)) + 1 == len(fwd)
+    assert np.count_nonzero(np.isnan(ret_x)) + 1 == len(ret)
+    for (x, y), (ref_x, ref_y) in (((fwd_x, fwd_y), join(fwd)), ((ret_x, ret_y), join(ret))):
+        np.testing.assert_array_equal(x, ref_x)
+        np.testing.assert_array_equal(y, ref_y)
+
+
+def test_boundary_samples_end_the_return_segment():
+    frame = compute_frame(SignalParams(**WORST))
+    T = frame.timing.T_total_sweep
+    cycle, forward = original_mask_rule(frame.t, T, frame.timing.Tqt)
+    phase_cycle, phase_forward = sweep_phase_rule(frame.t, T, frame.timing.Tqt)
+    differs = np.flatnonzero((cycle != phase_cycle) | (forward != phase_forward))
+    # Only samples sitting on a cycle or forward/return boundary are assigned differently from the original masks...
+    assert differs.size
+    fraction = np.remainder(frame.t[differs] / T + 1e-9, 1.0) - 1e-9
+    boundary = np.minimum(np.abs(fraction), np.abs(fraction - frame.timing.Tqt / T))
+    assert np.all(boundary < 1e-9)
+    for k in (3, 7, 14, 28):
+        i = int(np.argmin(np.abs(frame.t / T - k)))
+        # ...and the split always draws them as the x ≈ 0 end of the return ramp
+        assert not frame.forward_mask[i] and frame.x_sweep[i] == pytest.approx(0.0, abs=1e-12)
+        assert frame.forward_mask[i + 1] and not frame.forward_mask[i - 1]
+    fwd, ret = loop_reference(frame, sweep_phase_rule)
+    assert np.count_nonzero(sweep_segment_starts(frame.x_sweep, frame.forward_mask)) == len(fwd) + len(ret)
+
+
+def test_segments_of_a_window_not_starting_at_zero():
+    frame = compute_frame(SignalParams(**WORST))
+    window = slice(37, 611)
+    starts = sweep_segment_starts(frame.x_sweep[window], frame.forward_mask[window])
+    full = sweep_segment_starts(frame.x_sweep, frame.forward_mask)[window].copy()
+    full[0] = True
+    np.testing.assert_array_equal(starts, full)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from trigger import find_edges
+
+
+def find_edges_loop(y, level, slope='rising', hysteresis=0.0):
+    """Sample-by-sample Schmitt trigger, the behaviour find_edges vectorizes."""
+    if slope == 'falling': y = -np.asarray(y); level = -level
+    edges = []
+    armed = False
+    for i, value in enumerate(y):
+        if value >= level:
+            if armed: edges.append(i)
+            armed = False
+        elif value < level - hysteresis:
+            armed = True
+    return np.asarray(edges, dtype=np.intp)
+
+
+@pytest.mark.parametrize('slope', ['rising', 'falling'])
+@pytest.mark.parametrize('hysteresis', [0.0, 0.05, 0.3])
+@pytest.mark.parametrize('seed', range(5))
+def test_find_edges_matches_loop_reference(slope, hysteresis, seed):
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0.0, 10.0, 5000)
+    y = np.sin(2 * np.pi * 1.3 * t) + rng.normal(0.0, 0.1, t.size)
+    level = rng.uniform(-0.5, 0.5)
+    np.testing.assert_array_equal(find_edges(y, level, slope, hysteresis), find_edges_loop(y, level, slope, hysteresis))
+
+
+def test_hysteresis_suppresses_noise_bursts():
+    t = np.linspace(0.0, 4.0, 8000)
+    y = np.sin(2 * np.pi * t) + np.random.default_rng(1).normal(0.0, 0.05, t.size)
+    assert find_edges(y, 0.0, hysteresis=0.0).size > 4
+    assert find_edges(y, 0.0, hysteresis=0.3).size == 4
+
+
+def test_no_edge_before_the_trigger_is_armed():
+    # Starting above the level is not an edge, and dipping into the hysteresis band does not re-arm
+    y = np.array([1.0, 1.0, 0.4, 1.0, -1.0, 1.0])
+    np.testing.assert_array_equal(find_edges(y, 0.5, hysteresis=0.2), [5])
+
+
+def test_short_input_and_unknown_slope():
+    assert find_edges([1.0], 0.0).size == 0
+    with pytest.raises(ValueError): find_edges([0.0, 1.0], 0.0, slope='up')
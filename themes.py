@@ -0,0 +1,16 @@
+"""
+Theme presets shared by the GUI, the scope view and the batch tools.
+
+Plain data only, so the Tk front end can build and style its controls
+before matplotlib is imported.
+"""
+
+# --- Theme Definitions ---
+THEMES = {
+    "Dark Scope": {'tk_bg': '#2E2E2E', 'tk_fg': 'white', 'ttk_theme': 'clam', 'fig_bg': 'black', 'ax_bg': 'black', 'text': 'white', 'grid_major': '#888888', 'grid_minor': '#555555', 'spine': '#888888', 'trace_input': 'cyan', 'trace_sweep': '#FFDD00', 'trace_yt_fwd': 'cyan', 'trace_yt_ret': '#FF8888', 'trace_channels': ['#FF66FF', '#66FF66', '#FF9933'], 'button_bg': '#4F4F4F', 'button_active_bg': '#6A6A6A'},
+    "Light": {'tk_bg': '#F0F0F0', 'tk_fg': 'black', 'ttk_theme': 'vista', 'fig_bg': 'white', 'ax_bg': 'white', 'text': 'black', 'grid_major': '#D0D0D0', 'grid_minor': '#EAEAEA', 'spine': 'black', 'trace_input': 'blue', 'trace_sweep': 'orange', 'trace_yt_fwd': 'blue', 'trace_yt_ret': 'red', 'trace_channels': ['purple', 'green', '#CC6600'], 'button_bg': '#E1E1E1', 'button_active_bg': '#CFCFCF'},
+    "Blueprint": {'tk_bg': '#D0E0F0', 'tk_fg': '#1A2E40', 'ttk_theme': 'alt', 'fig_bg': '#2A4D69', 'ax_bg': '#4B86B4', 'text': '#FFFFFF', 'grid_major': '#ADCBE3', 'grid_minor': '#63ACE5', 'spine': '#ADCBE3', 'trace_input': '#FFFFB3', 'trace_sweep': '#FFD633', 'trace_yt_fwd': '#FFFFB3', 'trace_yt_ret': '#FF8888', 'trace_channels': ['#FFB3FF', '#B3FFB3', '#FFCC99'], 'button_bg': '#87CEEB', 'button_active_bg': '#A1DFFF'}
+}
+DEFAULT_THEME = "Dark Scope"
+DEFAULT_BASE_FONT_SIZE = 11
+FIGURE_TITLE = 'Oscilloscope Simulation'
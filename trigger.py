@@ -0,0 +1,188 @@
+"""
+Edge trigger for the oscilloscope sweep.
+
+Without a trigger the sweep free-runs: cycle k starts at k * T_total_sweep,
+so the scope trace is only stable when the signal period happens to divide
+the sweep period. The trigger finds level crossings (with slope and
+hysteresis) in one vectorized pass over the record, and each sweep then
+starts at a trigger instant instead.
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+TRIGGER_MODES = ('free', 'auto', 'normal', 'single')
+TRIGGER_SLOPES = ('rising', 'falling')
+
+
+@dataclass(frozen=True)
+class TriggerSettings:
+    """
+    Trigger controls. `level` and `hysteresis` are in signal units, `holdoff`
+    in seconds. With `auto_timeout=None`, auto mode waits one sweep period
+    for a real trigger before forcing one.
+    """
+    mode: str = 'free'
+    slope: str = 'rising'
+    level: float = 0.0
+    hysteresis: float = 0.05
+    holdoff: float = 0.0
+    auto_timeout: float = None
+
+
+def find_edges(y, level, slope='rising', hysteresis=0.0):
+    """
+    Returns the indices i where the signal crosses `level` between samples
+    i-1 and i in the direction given by `slope`.
+
+    This is a Schmitt trigger: after firing, the signal must fall back past
+    `level - hysteresis` (rising slope) before the next edge can fire, so
+    noise around the level does not produce bursts of triggers. The state
+    machine is evaluated without a Python loop by forward-filling the last
+    definite (armed/fired) state with np.maximum.accumulate.
+    """
+    if slope not in TRIGGER_SLOPES: raise ValueError(f"Unknown trigger slope '{slope}', expected one of {TRIGGER_SLOPES}")
+    y = np.asarray(y)
+    if y.size < 2: return np.empty(0, dtype=np.intp)
+    if slope == 'falling': y = -y; level = -level
+    hysteresis = max(float(hysteresis), 0.0)
+
+    # +1 = at/above level (fired), -1 = below level - hysteresis (armed), 0 = in the band
+    state = np.zeros(y.shape, dtype=np.int8)
+    state[y >= level] = 1
+    state[y < level - hysteresis] = -1
+    last_definite = np.where(state != 0, np.arange(y.size), 0)
+    np.maximum.accumulate(last_definite, out=last_definite)
+    filled = state[last_definite]
+
+    return np.flatnonzero((filled[1:] == 1) & (filled[:-1] == -1)) + 1
+
+
+def edge_times(t, y, edges, level):
+    """Sub-sample trigger instants, linearly interpolated between samples i-1 and i."""
+    y0 = y[edges - 1]; y1 = y[edges]
+    t0 = t[edges - 1]; t1 = t[edges]
+    dy = y1 - y0
+    frac = np.divide(level - y0, dy, out=np.zeros_like(dy), where=dy != 0)
+    return t0 + np.clip(frac, 0.0, 1.0) * (t1 - t0)
+
+
+def select_sweep_starts(candidates, t_start, t_end, min_spacing, mode='normal', auto_timeout=0.0):
+    """
+    Picks the trigger instants that actually start a sweep.
+
+    A new sweep can only start once the previous one (forward + return) and
+    the holdoff are over, i.e. `min_spacing` after the previous start. In
+    auto mode a sweep is forced when no trigger arrives within
+    `auto_timeout` of the sweep being ready. The loop runs once per
+    displayed sweep, not per sample.
+    """
+    starts = []
+    ready = t_start
+    n = candidates.size
+    while ready < t_end:
+        i = int(np.searchsorted(candidates, ready, side='left'))
+        if i < n and (mode != 'auto' or candidates[i] <= ready + auto_timeout):
+            start = candidates[i]
+        elif mode == 'auto':
+            start = ready + auto_timeout
+        else:
+            break
+        if start >= t_end: break
+        starts.append(start)
+        if mode == 'single': break
+        ready = start + min_spacing
+    return np.asarray(starts, dtype=np.float64)
+
+
+def fill_triggered_sweep(t, sweep_starts, Tqt, Tqn, x_out, fwd_out, ret_out):
+    """
+    Writes the triggered sweep: each start begins a forward ramp over Tqt and a
+    return over Tqn; afterwards the beam idles at x = 0 (neither forward nor
+    return) until the next start.
+    """
+    x_out.fill(0.0); fwd_out.fill(False); ret_out.fill(False)
+    if sweep_starts.size == 0: return
+    k = np.searchsorted(sweep_starts, t, side='right') - 1
+    active = k >= 0
+    tau = t - sweep_starts[np.maximum(k, 0)]
+    np.logical_and(active, tau < Tqt, out=fwd_out)
+    np.logical_and(active, (tau >= Tqt) & (tau < Tqt + Tqn), out=ret_out)
+    np.divide(tau, Tqt, out=x_out, where=fwd_out)
+    np.copyto(x_out, 1.0 - (tau - Tqt) / Tqn, where=ret_out)
+    np.clip(x_out, 0.0, 1.0, out=x_out)
+
+
+class TriggerEngine:
+    """
+    Applies TriggerSettings to signal_engine Frames, triggering on channel 1.
+
+    Sweep buffers are reused between frames of the same length. In single
+    mode the first triggered frame is kept (copied) and returned until
+    `arm()` is called again.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings if settings is not None else TriggerSettings()
+        self.armed = True
+        self.held_frame = None
+        self.last_trigger_count = 0
+        self.last_sweep_count = 0
+        self._x = np.empty(0); self._fwd = np.empty(0, dtype=bool); self._ret = np.empty(0, dtype=bool)
+
+    def configure(self, **changes):
+        """Updates settings; switching into single mode re-arms."""
+        old_mode = self.settings.mode
+        self.settings = replace(self.settings, **changes)
+        if self.settings.mode != old_mode and self.settings.mode == 'single': self.arm()
+
+    def arm(self):
+        self.armed = True
+        self.held_frame = None
+
+    @property
+    def status(self):
+        mode = self.settings.mode
+        if mode == 'free': return "Free running"
+        if mode == 'single': return "Armed" if self.armed else "Stopped (single)"
+        return "Triggered" if self.last_trigger_count else ("Waiting for trigger" if mode == 'normal' else "Auto (no trigger)")
+
+    def _buffers(self, n):
+        if self._x.size != n:
+            self._x = np.empty(n); self._fwd = np.empty(n, dtype=bool); self._ret = np.empty(n, dtype=bool)
+        return self._x, self._fwd, self._ret
+
+    def apply(self, frame, out=None):
+        """
+        Returns `frame` with its sweep restarted at trigger instants (unchanged
+        in free mode). `out=(x, fwd, ret)` receives the triggered sweep instead
+        of the engine's shared buffers, e.g. the frame's own sweep arrays when
+        frames are double-buffered.
+        """
+        settings = self.settings
+        if settings.mode not in TRIGGER_MODES: raise ValueError(f"Unknown trigger mode '{settings.mode}', expected one of {TRIGGER_MODES}")
+        if settings.mode == 'free': return frame
+        if settings.mode == 'single' and not self.armed and self.held_frame is not None: return self.held_frame
+
+        timing = frame.timing
+        t, y = frame.t, frame.y
+        edges = find_edges(y, settings.level, settings.slope, settings.hysteresis)
+        self.last_trigger_count = int(edges.size)
+        candidates = edge_times(t, y, edges, settings.level)
+        auto_timeout = timing.T_total_sweep if settings.auto_timeout is None else settings.auto_timeout
+        dt = t[1] - t[0] if t.size > 1 else 0.0
+        sweep_starts = select_sweep_starts(candidates, t[0] if t.size else 0.0, t[-1] + dt if t.size else 0.0,
+                                           timing.T_total_sweep + settings.holdoff, settings.mode, auto_timeout)
+        self.last_sweep_count = int(sweep_starts.size)
+
+        x, fwd, ret = out if out is not None else self._buffers(t.size)
+        fill_triggered_sweep(t, sweep_starts, timing.Tqt, timing.Tqn, x, fwd, ret)
+        triggered = replace(frame, x_sweep=x, forward_mask=fwd, return_mask=ret, sweep_starts=sweep_starts)
+
+        if settings.mode == 'single' and sweep_starts.size:
+            self.armed = False
+            ys = frame.channel_data.copy()
+            self.held_frame = replace(triggered, t=t.copy(), y=ys[0], ys=ys, x_sweep=x.copy(),
+                                      forward_mask=fwd.copy(), return_mask=ret.copy())
+            return self.held_frame
+        return triggered